@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Many open client connections against the WSGI (gunicorn) and ASGI (uvicorn) servers.
+
+Each simulated client (a gadget page) keeps one HTTP/1.1 connection, asks for a title,
+waits ``--think`` seconds, asks again, and reconnects when the server closes the
+connection. Both servers run one process with the same number of threads
+(``WEB_THREADS`` for gunicorn gthread, ``ASGI_THREADS`` for the ASGI pool).
+
+Usage (from the repository root; needs gunicorn and uvicorn):
+    python -m benchmarks.concurrency --connections 50,200,400 --think 2 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+from benchmarks.layouts import SRC_DIR, synthetic_workload_db, wait_until_up
+from benchmarks.loadtest import USER_AGENT, load_workload, request_stream
+from src.app.stats import latency_summary
+
+SERVERS = {
+    "wsgi": [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+    "asgi": [sys.executable, "-m", "uvicorn", "asgi:app", "--log-level", "warning", "--no-access-log"],
+}
+
+
+async def read_response(reader):
+    """Read one response; return ``(status, keep_alive)``."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    headers = dict(line.lower().split(": ", 1) for line in lines[1:] if ": " in line)
+    # ---
+    await reader.readexactly(int(headers.get("content-length", "0")))
+    # ---
+    return status, headers.get("connection") != "close"
+
+
+async def client(host, port, titles, think, deadline, results, rng):
+    reader = writer = None
+    # ---
+    # Spread the first requests over one think time
+    await asyncio.sleep(rng.uniform(0, think))
+    # ---
+    while time.monotonic() < deadline:
+        title = rng.choice(titles)
+        request = f"GET /api/{quote(title, safe='')} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {USER_AGENT}\r\n\r\n"
+        start = time.perf_counter()
+        # ---
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request.encode("latin-1"))
+            status, keep_alive = await asyncio.wait_for(read_response(reader), timeout=30)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            status, keep_alive = "connection", False
+        # ---
+        results.append({"status": status, "time": time.perf_counter() - start})
+        # ---
+        if not keep_alive and writer is not None:
+            writer.close()
+            writer = None
+        # ---
+        await asyncio.sleep(think)
+    # ---
+    if writer is not None:
+        writer.close()
+
+
+async def run_clients(port, titles, connections, think, duration):
+    results = []
+    deadline = time.monotonic() + duration
+    rng = random.Random(1)
+    # ---
+    await asyncio.gather(
+        *(client("127.0.0.1", port, titles, think, deadline, results, random.Random(rng.random())) for _ in range(connections))
+    )
+    # ---
+    return results
+
+
+def report(server, connections, results, duration):
+    errors = [r for r in results if r["status"] == "connection" or r["status"] >= 400]
+    # ---
+    return {
+        "server": server,
+        "connections": connections,
+        "requests": len(results),
+        "throughput": round(len(results) / duration, 1),
+        "errors": len(errors),
+        "latency": latency_summary([r["time"] for r in results if r not in errors]),
+    }
+
+
+def run_server(server, titles, connection_counts, think, duration, threads, port, home):
+    env = dict(
+        os.environ,
+        HOME=home,
+        PORT=str(port),
+        LOG_LEVEL="WARNING",
+        WEB_WORKERS="1",
+        WEB_THREADS=str(threads),
+        ASGI_THREADS=str(threads),
+    )
+    command = SERVERS[server] + (["--port", str(port)] if server == "asgi" else [])
+    # ---
+    process = subprocess.Popen(command, cwd=SRC_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # ---
+    try:
+        if not wait_until_up(f"http://127.0.0.1:{port}", timeout=120):
+            raise RuntimeError(f"{server} did not start")
+        # ---
+        asyncio.run(run_clients(port, titles, threads, 0, 5))
+        # ---
+        rows = []
+        # ---
+        for connections in connection_counts:
+            results = asyncio.run(run_clients(port, titles, connections, think, duration))
+            rows.append(report(server, connections, results, duration))
+            print(markdown_row(rows[-1]), flush=True)
+        # ---
+        return rows
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def markdown_row(row):
+    latency = row["latency"]
+    # ---
+    def ms(key):
+        return f"{latency[key] * 1000:.0f}" if latency.get("count") else "-"
+    # ---
+    return (
+        f"| {row['server']} | {row['connections']} | {row['throughput']} | {ms('p50')} | {ms('p90')} "
+        f"| {ms('p99')} | {row['errors']} |"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Many open connections against the WSGI and ASGI servers.")
+    parser.add_argument("--db", help="logs database to take the titles from (default: synthetic)")
+    parser.add_argument("--servers", default="wsgi,asgi")
+    parser.add_argument("--connections", default="50,200,400", help="comma separated client counts")
+    parser.add_argument("--think", type=float, default=2.0, help="seconds between two requests of a client")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per client count")
+    parser.add_argument("--threads", type=int, default=4, help="threads of the server process")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args(argv)
+    # ---
+    rows = []
+    # ---
+    print("| server | connections | req/s | p50 ms | p90 ms | p99 ms | errors |")
+    print("|---|---|---|---|---|---|---|")
+    # ---
+    with tempfile.TemporaryDirectory() as home:
+        db_path = args.db
+        # ---
+        if not db_path:
+            db_path = str(Path(home) / "workload.db")
+            synthetic_workload_db(db_path)
+        # ---
+        workload = load_workload(db_path)
+        titles = [data for _, data in request_stream(workload, 5000, seed=1, batch_share=0.0)]
+        (Path(home) / "www" / "python" / "dbs").mkdir(parents=True)
+        # ---
+        for server in args.servers.split(","):
+            counts = [int(x) for x in args.connections.split(",")]
+            rows.extend(run_server(server, titles, counts, args.think, args.duration, args.threads, args.port, home))
+    # ---
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Compare gunicorn worker/thread layouts on the same replayed workload.
+
+For each layout, starts ``gunicorn -c src/gunicorn.conf.py`` with ``WEB_WORKERS`` and
+``WEB_THREADS`` set, warms the workers up, replays the requests of a logs database
+(see ``benchmarks.loadtest``) at each rate, and prints a Markdown table.
+
+Usage (from the repository root):
+    python -m benchmarks.layouts --db copy-of-new_logs.db --layouts 3x1,3x4,6x2 --rates 20,50
+    python -m benchmarks.layouts --synthetic    # generated titles, no logs database needed
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from benchmarks.loadtest import build_report, load_workload, replay, request_stream, workload_summary
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+COUNTRIES = ["Yemen", "Egypt", "France", "Brazil", "Japan", "Canada", "Kenya", "Peru", "Norway", "India"]
+
+
+def synthetic_workload_db(path, titles=2000, seed_batches=200):
+    """Write a small logs database with generated titles, skewed like real traffic."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE logs (request_data TEXT, response_count INTEGER, date_only TEXT)")
+    conn.execute("CREATE TABLE list_logs (request_data TEXT, response_count INTEGER, date_only TEXT)")
+    # ---
+    names = []
+    # ---
+    for i in range(titles):
+        country = COUNTRIES[i % len(COUNTRIES)]
+        year = 1900 + i % 120
+        pattern = i % 4
+        if pattern == 0:
+            names.append(f"Category:{year} births")
+        elif pattern == 1:
+            names.append(f"Category:{year} in {country}")
+        elif pattern == 2:
+            names.append(f"Category:Sportspeople from {country} {i}")
+        else:
+            names.append(f"Category:{year} establishments in {country}")
+    # ---
+    # Zipf-like popularity
+    conn.executemany(
+        "INSERT INTO logs VALUES (?, ?, '2025-01-01')", [(name, max(1, 1000 // (i + 1))) for i, name in enumerate(names)]
+    )
+    conn.executemany(
+        "INSERT INTO list_logs VALUES (?, ?, '2025-01-01')",
+        [(str(names[i : i + 1 + i % 50]), 1) for i in range(seed_batches)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def wait_until_up(url, timeout=60):
+    end = time.monotonic() + timeout
+    # ---
+    while time.monotonic() < end:
+        try:
+            with urllib.request.urlopen(f"{url}/", timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            time.sleep(0.2)
+    # ---
+    return False
+
+
+def run_layout(workload, workers, threads, rates, duration, port, home):
+    env = dict(os.environ, WEB_WORKERS=str(workers), WEB_THREADS=str(threads), PORT=str(port), HOME=home)
+    env["LOG_LEVEL"] = "WARNING"
+    url = f"http://127.0.0.1:{port}"
+    # ---
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+        cwd=SRC_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    # ---
+    try:
+        if not wait_until_up(url):
+            raise RuntimeError(f"gunicorn {workers}x{threads} did not start")
+        # ---
+        # Every worker loads the resolver tables on its first titles
+        warmup = list(request_stream(workload, 20 * workers * threads, seed=99, batch_share=0.0))
+        replay(url, warmup, rate=1000, concurrency=workers * threads)
+        # ---
+        rows = []
+        # ---
+        for rate in rates:
+            requests = request_stream(workload, int(rate * duration), seed=1)
+            results, wall = replay(url, requests, rate, concurrency=64)
+            report = build_report(results, wall, rate)
+            rows.append({"workers": workers, "threads": threads, **report})
+        # ---
+        return rows
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def markdown_table(rows):
+    lines = [
+        "| workers x threads | target req/s | achieved req/s | single p50 ms | single p99 ms | batch p50 ms | batch p99 ms | errors |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    # ---
+    for row in rows:
+        single = row["kinds"].get("single", {})
+        batch = row["kinds"].get("batch", {})
+        errors = sum(kind["errors"] for kind in row["kinds"].values())
+        # ---
+        def ms(kind, key):
+            return f"{kind['latency'][key] * 1000:.0f}" if kind else "-"
+        # ---
+        lines.append(
+            f"| {row['workers']}x{row['threads']} | {row['target_rate']:g} | {row['throughput']:.1f} "
+            f"| {ms(single, 'p50')} | {ms(single, 'p99')} | {ms(batch, 'p50')} | {ms(batch, 'p99')} | {errors} |"
+        )
+    # ---
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare gunicorn worker/thread layouts.")
+    parser.add_argument("--db", help="logs database to build the request mix from")
+    parser.add_argument("--synthetic", action="store_true", help="use generated titles instead of --db")
+    parser.add_argument("--layouts", default="1x1,1x4,2x2,3x1,3x4", help="comma separated WORKERSxTHREADS")
+    parser.add_argument("--rates", default="20,60", help="comma separated request rates")
+    parser.add_argument("--duration", type=float, default=15, help="seconds per rate")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="write all results as JSON")
+    args = parser.parse_args(argv)
+    # ---
+    if not args.db and not args.synthetic:
+        parser.error("give --db or --synthetic")
+    # ---
+    with tempfile.TemporaryDirectory() as home:
+        db_path = args.db
+        # ---
+        if args.synthetic:
+            db_path = str(Path(home) / "workload.db")
+            synthetic_workload_db(db_path)
+        # ---
+        workload = load_workload(db_path)
+        print(f"workload: {workload_summary(workload)}")
+        # ---
+        # The servers log into a database under this HOME, not the real one
+        (Path(home) / "www" / "python" / "dbs").mkdir(parents=True)
+        # ---
+        rows = []
+        # ---
+        for layout in args.layouts.split(","):
+            workers, threads = (int(x) for x in layout.split("x"))
+            rates = [float(x) for x in args.rates.split(",")]
+            rows.extend(run_layout(workload, workers, threads, rates, args.duration, args.port, home))
+            print(markdown_table(rows[-len(rates) :]).splitlines()[-1], flush=True)
+    # ---
+    print()
+    print(markdown_table(rows))
+    # ---
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
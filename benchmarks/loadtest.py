@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Replay production-like traffic against a running instance.
+
+Builds the request mix from a logs database: single titles from ``logs`` and
+logged batches from ``list_logs``, both weighted by ``response_count``, so the
+popularity skew and the batch-size mix match the logged traffic. Requests are
+sent open-loop at a fixed rate, and the achieved throughput, latency
+percentiles and error rates are reported.
+
+Usage (from the repository root, with the app running):
+    python -m benchmarks.loadtest --db ~/www/python/dbs/new_logs.db --url http://127.0.0.1:5000 --rate 50 --duration 60
+"""
+import argparse
+import ast
+import json
+import random
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
+from urllib.parse import quote
+
+from src.app.stats import latency_summary
+
+USER_AGENT = "ArWikiCatsWeb-loadtest/1.0"
+
+
+def date_filter(day="", date_from="", date_to=""):
+    added = []
+    params = []
+    # ---
+    if day:
+        added.append("date_only LIKE ?")
+        params.append(f"{day}%")
+    # ---
+    if date_from:
+        added.append("date_only >= ?")
+        params.append(date_from)
+    # ---
+    if date_to:
+        added.append("date_only <= ?")
+        params.append(date_to)
+    # ---
+    return (" WHERE " + " AND ".join(added) if added else ""), params
+
+
+def parse_batch(request_data):
+    """Return the titles of a ``list_logs`` row (stored as ``str(list)``), or None."""
+    try:
+        titles = ast.literal_eval(request_data)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+    # ---
+    if not isinstance(titles, list) or not titles:
+        return None
+    # ---
+    return [str(t) for t in titles]
+
+
+def load_workload(db_path, day="", date_from="", date_to=""):
+    """Return ``{"singles": [(title, weight)], "batches": [(titles, weight)]}`` from a logs database."""
+    where, params = date_filter(day, date_from, date_to)
+    # ---
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    # ---
+    try:
+        singles = conn.execute(
+            f"SELECT request_data, sum(response_count) FROM logs{where} GROUP BY request_data", params
+        ).fetchall()
+        # ---
+        batches = []
+        # ---
+        for request_data, count in conn.execute(f"SELECT request_data, response_count FROM list_logs{where}", params):
+            titles = parse_batch(request_data)
+            if titles:
+                batches.append((titles, count))
+    finally:
+        conn.close()
+    # ---
+    return {
+        "singles": [(title, count) for title, count in singles if title and count],
+        "batches": [(titles, count) for titles, count in batches if count],
+    }
+
+
+def workload_summary(workload):
+    single_hits = sum(w for _, w in workload["singles"])
+    batch_hits = sum(w for _, w in workload["batches"])
+    sizes = Counter()
+    # ---
+    for titles, weight in workload["batches"]:
+        sizes[len(titles)] += weight
+    # ---
+    return {
+        "single_titles": len(workload["singles"]),
+        "single_hits": single_hits,
+        "batches": len(workload["batches"]),
+        "batch_hits": batch_hits,
+        "batch_share": round(batch_hits / (single_hits + batch_hits), 4) if single_hits + batch_hits else 0.0,
+        "batch_sizes": latency_summary(list(sizes.elements())),
+    }
+
+
+def request_stream(workload, count, seed=0, batch_share=None):
+    """Yield ``count`` requests (``("single", title)`` or ``("batch", titles)``) drawn with the logged weights."""
+    rng = random.Random(seed)
+    # ---
+    singles = workload["singles"]
+    batches = workload["batches"]
+    # ---
+    if batch_share is None:
+        batch_share = workload_summary(workload)["batch_share"]
+    # ---
+    if not batches:
+        batch_share = 0.0
+    elif not singles:
+        batch_share = 1.0
+    # ---
+    single_weights = list(accumulate(w for _, w in singles))
+    batch_weights = list(accumulate(w for _, w in batches))
+    # ---
+    for _ in range(count):
+        if rng.random() < batch_share:
+            yield "batch", rng.choices(batches, cum_weights=batch_weights)[0][0]
+        else:
+            yield "single", rng.choices(singles, cum_weights=single_weights)[0][0]
+
+
+def send(base_url, kind, data, timeout):
+    """Send one request; return ``(status, seconds)``. The status is "connection" when no response came back."""
+    if kind == "single":
+        req = urllib.request.Request(f"{base_url}/api/{quote(data, safe='')}", headers={"User-Agent": USER_AGENT})
+    else:
+        req = urllib.request.Request(
+            f"{base_url}/api/list",
+            data=json.dumps({"titles": data}).encode("utf-8"),
+            headers={"User-Agent": USER_AGENT, "Content-Type": "application/json"},
+            method="POST",
+        )
+    # ---
+    start = time.perf_counter()
+    # ---
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = "connection"
+    # ---
+    return status, time.perf_counter() - start
+
+
+def replay(base_url, requests, rate, concurrency=32, timeout=30):
+    """Send ``requests`` open-loop at ``rate`` per second; return the per-request results."""
+    results = []
+    lock = threading.Lock()
+    # ---
+    def task(kind, data, scheduled):
+        lag = time.perf_counter() - scheduled
+        status, seconds = send(base_url, kind, data, timeout)
+        with lock:
+            results.append({"kind": kind, "status": status, "time": seconds, "lag": lag})
+    # ---
+    start = time.perf_counter()
+    # ---
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for i, (kind, data) in enumerate(requests):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(task, kind, data, scheduled)
+    # ---
+    return results, time.perf_counter() - start
+
+
+def build_report(results, wall, rate):
+    report = {
+        "target_rate": rate,
+        "requests": len(results),
+        "duration": round(wall, 3),
+        "throughput": round(len(results) / wall, 2) if wall else 0.0,
+        # Time requests waited for a free client thread: high values mean the client, not the server, is the limit
+        "client_lag": latency_summary([r["lag"] for r in results]),
+        "kinds": {},
+    }
+    # ---
+    for kind in ["single", "batch"]:
+        items = [r for r in results if r["kind"] == kind]
+        if not items:
+            continue
+        # ---
+        errors = [r for r in items if r["status"] == "connection" or r["status"] >= 400]
+        # ---
+        report["kinds"][kind] = {
+            "requests": len(items),
+            "errors": len(errors),
+            "error_rate": round(len(errors) / len(items), 4),
+            "statuses": dict(Counter(str(r["status"]) for r in items)),
+            "latency": latency_summary([r["time"] for r in items]),
+        }
+    # ---
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay logged traffic against a running instance.")
+    parser.add_argument("--db", required=True, help="logs database to build the request mix from")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="base URL of the running app")
+    parser.add_argument("--rate", type=float, default=20, help="requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of traffic to send")
+    parser.add_argument("--concurrency", type=int, default=32, help="client threads")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds")
+    parser.add_argument("--batch-share", type=float, help="share of /api/list requests (default: as logged)")
+    parser.add_argument("--day", default="", help="only use traffic of this day or month (YYYY-MM-DD or YYYY-MM)")
+    parser.add_argument("--from", dest="date_from", default="", help="first day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", default="", help="last day (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the request stream")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+    # ---
+    workload = load_workload(args.db, day=args.day, date_from=args.date_from, date_to=args.date_to)
+    summary = workload_summary(workload)
+    # ---
+    if not workload["singles"] and not workload["batches"]:
+        parser.error("no logged requests match the given days")
+    # ---
+    print(
+        f"workload: {summary['single_titles']:,} titles, {summary['batches']:,} batches, "
+        f"batch share {summary['batch_share']:.1%}, median batch size {summary['batch_sizes']['p50']}"
+    )
+    # ---
+    count = max(1, int(args.rate * args.duration))
+    requests = request_stream(workload, count, seed=args.seed, batch_share=args.batch_share)
+    # ---
+    results, wall = replay(args.url.rstrip("/"), requests, args.rate, args.concurrency, args.timeout)
+    report = build_report(results, wall, args.rate)
+    report["workload"] = summary
+    # ---
+    print(f"sent {report['requests']:,} requests in {report['duration']}s: {report['throughput']} req/s")
+    # ---
+    for kind, item in report["kinds"].items():
+        latency = item["latency"]
+        print(
+            f"{kind}: {item['requests']:,} requests, error rate {item['error_rate']:.2%}, "
+            f"p50 {latency['p50'] * 1000:.1f} ms, p90 {latency['p90'] * 1000:.1f} ms, p99 {latency['p99'] * 1000:.1f} ms"
+        )
+    # ---
+    if report["client_lag"]["p99"] > 0.1:
+        print("warning: requests waited for client threads, raise --concurrency")
+    # ---
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
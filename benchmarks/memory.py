@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Shared and unique memory of the WSGI workers, from ``/proc/<pid>/smaps_rollup`` (Linux).
+
+    shared  pages also mapped by another process (Shared_Clean + Shared_Dirty)
+    unique  pages only this process maps (Private_Clean + Private_Dirty): what one more
+            worker costs
+    pss     the process's share of everything it maps; the sum over the master and the
+            workers is the memory of the whole server
+
+Usage (from the repository root):
+    python -m benchmarks.memory --pid <uwsgi or gunicorn master pid>
+    python -m benchmarks.memory --compare --workers 3    # gunicorn with and without PRELOAD_RESOLVER
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.layouts import SRC_DIR, synthetic_workload_db, wait_until_up
+from benchmarks.loadtest import load_workload, replay, request_stream
+
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Swap")
+
+
+def parse_smaps_rollup(text):
+    """Return the kB values of ``FIELDS`` in the text of an smaps_rollup file."""
+    values = {}
+    # ---
+    for line in text.splitlines():
+        key, _, rest = line.partition(":")
+        if key in FIELDS:
+            values[key] = int(rest.split()[0])
+    # ---
+    return values
+
+
+def process_memory(pid):
+    """Return rss, pss, shared and unique memory of a process, in MiB."""
+    values = parse_smaps_rollup(Path(f"/proc/{pid}/smaps_rollup").read_text())
+    # ---
+    def mib(*keys):
+        return sum(values.get(key, 0) for key in keys) / 1024
+    # ---
+    return {
+        "pid": pid,
+        "rss": mib("Rss"),
+        "pss": mib("Pss"),
+        "shared": mib("Shared_Clean", "Shared_Dirty"),
+        "unique": mib("Private_Clean", "Private_Dirty"),
+    }
+
+
+def child_pids(pid):
+    children = []
+    # ---
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # The command may contain spaces; the fields after ") " don't
+            fields = stat.read_text().rpartition(")")[2].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(stat.parent.name))
+    # ---
+    return sorted(children)
+
+
+def server_memory(master_pid):
+    """Return the memory of the master and of each of its workers, and the totals."""
+    master = process_memory(master_pid)
+    workers = [process_memory(pid) for pid in child_pids(master_pid)]
+    # ---
+    return {
+        "master": master,
+        "workers": workers,
+        "total_pss": master["pss"] + sum(w["pss"] for w in workers),
+        "worker_unique": sum(w["unique"] for w in workers),
+    }
+
+
+def format_report(label, memory):
+    lines = [
+        f"{label}",
+        "| process | rss MiB | shared MiB | unique MiB | pss MiB |",
+        "|---|---|---|---|---|",
+    ]
+    # ---
+    rows = [("master", memory["master"])] + [(f"worker {w['pid']}", w) for w in memory["workers"]]
+    # ---
+    for name, m in rows:
+        lines.append(f"| {name} | {m['rss']:.1f} | {m['shared']:.1f} | {m['unique']:.1f} | {m['pss']:.1f} |")
+    # ---
+    lines.append(f"total pss: {memory['total_pss']:.1f} MiB, unique in workers: {memory['worker_unique']:.1f} MiB")
+    # ---
+    return "\n".join(lines)
+
+
+def measure_gunicorn(workload, workers, preload, requests, port, home):
+    env = dict(
+        os.environ,
+        WEB_WORKERS=str(workers),
+        WEB_THREADS="1",
+        PORT=str(port),
+        HOME=home,
+        LOG_LEVEL="WARNING",
+        PRELOAD_RESOLVER="1" if preload else "0",
+    )
+    url = f"http://127.0.0.1:{port}"
+    # ---
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+        cwd=SRC_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    # ---
+    try:
+        if not wait_until_up(url, timeout=120):
+            raise RuntimeError("gunicorn did not start")
+        # ---
+        # Sync workers take one request at a time, so the traffic reaches all of them
+        replay(url, list(request_stream(workload, requests, seed=1)), rate=1000, concurrency=workers)
+        time.sleep(1)
+        # ---
+        return server_memory(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared and unique memory of the WSGI workers.")
+    parser.add_argument("--pid", type=int, help="master pid of a running uwsgi or gunicorn")
+    parser.add_argument("--compare", action="store_true", help="start gunicorn with and without preloading")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=2000, help="requests replayed before measuring")
+    parser.add_argument("--db", help="logs database to build the request mix from (default: synthetic)")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args(argv)
+    # ---
+    if not args.pid and not args.compare:
+        parser.error("give --pid or --compare")
+    # ---
+    results = {}
+    # ---
+    if args.pid:
+        results["server"] = server_memory(args.pid)
+        print(format_report(f"pid {args.pid}", results["server"]))
+    # ---
+    if args.compare:
+        with tempfile.TemporaryDirectory() as home:
+            db_path = args.db
+            # ---
+            if not db_path:
+                db_path = str(Path(home) / "workload.db")
+                synthetic_workload_db(db_path)
+            # ---
+            workload = load_workload(db_path)
+            (Path(home) / "www" / "python" / "dbs").mkdir(parents=True)
+            # ---
+            for label, preload in (("per-worker load", False), ("preload", True)):
+                results[label] = measure_gunicorn(workload, args.workers, preload, args.requests, args.port, home)
+                print(format_report(f"{label} ({args.workers} workers)", results[label]))
+                print()
+    # ---
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the API and logging hot paths.
+
+Drives ``create_app()`` through the Flask test client with a stub resolver of
+configurable cost, against temporary databases, and writes a JSON report that
+can be compared with the report of another commit.
+
+Usage (from the repository root):
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --quick --compare bench-main.json
+"""
+import argparse
+import json
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+from src.app import create_app, logs_bot
+from src.app.logs_db import bot, db
+from src.app.stats import latency_summary
+
+USER_AGENT = {"User-Agent": "ArWikiCatsWeb-benchmark/1.0"}
+CACHE_DIR = Path(__file__).parent / ".cache"
+
+
+class StubResult:
+    def __init__(self, labels, no_labels):
+        self.labels = labels
+        self.no_labels = no_labels
+
+
+class StubResolver:
+    """Stands in for ArWikiCats: spins the CPU for ``cost_ms`` per title (or sleeps with ``sleep=True``)."""
+
+    def __init__(self, cost_ms=1.0, sleep=False):
+        self.cost = cost_ms / 1000
+        self.sleep = sleep
+
+    def work(self, titles=1):
+        if self.sleep:
+            time.sleep(self.cost * titles)
+            return
+        # ---
+        # Busy loop: holds the GIL like the real resolver does
+        end = time.perf_counter() + self.cost * titles
+        while time.perf_counter() < end:
+            pass
+
+    def resolve_arabic_category_label(self, title):
+        self.work()
+        return "" if title.endswith("0") else f"تصنيف:{title}"
+
+    def batch_resolve_labels(self, titles):
+        self.work(len(titles))
+        labels = {t: f"تصنيف:{t}" for t in titles if not t.endswith("0")}
+        return StubResult(labels, [t for t in titles if t not in labels])
+
+
+@contextmanager
+def temp_database(path=None):
+    original = db.db_path_main[1]
+    # ---
+    with tempfile.TemporaryDirectory() as tmp:
+        db.db_path_main[1] = str(path or Path(tmp) / "bench_logs.db")
+        db.init_db()
+        try:
+            yield db.db_path_main[1]
+        finally:
+            db.db_path_main[1] = original
+
+
+def synthetic_database(rows):
+    """Return the path of a cached database with ``rows`` synthetic log rows."""
+    CACHE_DIR.mkdir(exist_ok=True)
+    path = CACHE_DIR / f"synthetic_{rows}.db"
+    # ---
+    if path.exists():
+        return path
+    # ---
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.unlink(missing_ok=True)
+    # ---
+    original = db.db_path_main[1]
+    db.db_path_main[1] = str(tmp_path)
+    db.init_db()
+    db.db_path_main[1] = original
+    # ---
+    # 60% no_result, response_count skewed towards small values, a year of days
+    data = (
+        (
+            "/api/<title>",
+            f"Category:Synthetic {i}",
+            "no_result" if i % 5 < 3 else f"تصنيف:اصطناعي {i}",
+            0.01 + (i % 100) / 1000,
+            1 + (i % 97 == 0) * 50 + i % 3,
+            f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+        )
+        for i in range(rows)
+    )
+    # ---
+    conn = sqlite3.connect(tmp_path)
+    conn.executemany(
+        "INSERT INTO logs (endpoint, request_data, response_status, response_time, response_count, date_only) VALUES (?, ?, ?, ?, ?, ?)",
+        data,
+    )
+    conn.commit()
+    conn.close()
+    # ---
+    tmp_path.rename(path)
+    # ---
+    return path
+
+
+def timed(func, repeat):
+    latencies = []
+    # ---
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    # ---
+    return latencies
+
+
+def result(name, params, latencies, wall=None, errors=0):
+    wall = wall if wall is not None else sum(latencies)
+    # ---
+    return {
+        "name": name,
+        "params": params,
+        "ops": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency": latency_summary(latencies),
+    }
+
+
+def bench_title(app, threads, total):
+    """GET /api/<title> from ``threads`` concurrent clients."""
+    per_thread = max(1, total // threads)
+    # ---
+    def worker(index):
+        client = app.test_client()
+        latencies = []
+        errors = 0
+        # ---
+        for i in range(per_thread):
+            start = time.perf_counter()
+            response = client.get(f"/api/Category:Bench {index}-{i % 50}", headers=USER_AGENT)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+        # ---
+        return latencies, errors
+    # ---
+    start = time.perf_counter()
+    # ---
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        outcomes = list(executor.map(worker, range(threads)))
+    # ---
+    wall = time.perf_counter() - start
+    latencies = [x for lat, _ in outcomes for x in lat]
+    # ---
+    return result("api_title", {"threads": threads}, latencies, wall=wall, errors=sum(e for _, e in outcomes))
+
+
+def bench_list(app, size, repeat):
+    """POST /api/list with ``size`` titles."""
+    client = app.test_client()
+    titles = [f"Category:Bench list {i}" for i in range(size)]
+    errors = []
+    # ---
+    def call():
+        response = client.post("/api/list", json={"titles": titles}, headers=USER_AGENT)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+    # ---
+    return result("api_list", {"titles": size}, timed(call, repeat), errors=len(errors))
+
+
+def bench_log_request(total, distinct):
+    """log_request writes, ``distinct`` different titles (the rest are upserts of the same rows)."""
+    counter = iter(range(total))
+    # ---
+    def call():
+        i = next(counter)
+        bot.log_request("/api/<title>", f"Category:Log {i % distinct}", "no_result", 0.01)
+    # ---
+    return result("log_request", {"writes": total, "distinct": distinct}, timed(call, total))
+
+
+def bench_views(app, rows, repeat):
+    """view_logs and fetch_logs_by_date against a synthetic database of ``rows`` rows."""
+    results = []
+    # ---
+    queries = {
+        "default": "/logs",
+        "no_result": "/logs?status=no_result&order_by=response_count",
+        "like": "/logs?like=%25اصطناعي 1%25",
+        "day": "/logs?day=2025-03-03&per_page=200",
+        "deep_page": "/logs?page=2000&per_page=50&order_by=timestamp",
+    }
+    # ---
+    with temp_database(synthetic_database(rows)):
+        for name, url in queries.items():
+            def call():
+                with app.test_request_context(url):
+                    from flask import request
+
+                    logs_bot.view_logs(request)
+            # ---
+            results.append(result("view_logs", {"rows": rows, "query": name}, timed(call, repeat)))
+        # ---
+        results.append(result("fetch_logs_by_date", {"rows": rows}, timed(bot.fetch_logs_by_date, repeat)))
+    # ---
+    return results
+
+
+def bench_compression(app, rows, repeat):
+    """Large JSON responses by encoding and level: latency, and the body size in ``params``."""
+    from src.app.compression import brotli
+
+    results = []
+    client = app.test_client()
+    levels = [("identity", 0), ("gzip", 1), ("gzip", 6), ("gzip", 9)]
+    # ---
+    if brotli is not None:
+        levels += [("br", 1), ("br", 5), ("br", 9)]
+    # ---
+    with temp_database(synthetic_database(rows)):
+        for name, url in {"logs_200": "/api/logs?per_page=200", "all": "/api/all"}.items():
+            for encoding, level in levels:
+                app.config["COMPRESS_GZIP_LEVEL"] = app.config["COMPRESS_BROTLI_QUALITY"] = level
+                headers = {"Accept-Encoding": encoding}
+                size = len(client.get(url, headers=headers).data)
+                latencies = timed(lambda: client.get(url, headers=headers), repeat)
+                # ---
+                params = {"rows": rows, "response": name, "encoding": encoding, "level": level, "bytes": size}
+                results.append(result("compression", params, latencies))
+    # ---
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args):
+    app = create_app()
+    app.config["TESTING"] = True
+    stub = StubResolver(cost_ms=args.resolver_cost_ms, sleep=args.resolver_sleep)
+    quick = args.quick
+    results = []
+    # ---
+    with patch("src.app.routes.api.resolve_arabic_category_label", stub.resolve_arabic_category_label), patch(
+        "src.app.routes.api.batch_resolve_labels", stub.batch_resolve_labels
+    ):
+        if "api" in args.only:
+            with temp_database():
+                for threads in [1, 10, 100]:
+                    results.append(bench_title(app, threads, 200 if quick else 2000))
+        # ---
+        if "list" in args.only:
+            with temp_database():
+                for size in [1, 100, 10000]:
+                    repeat = 3 if size == 10000 else (10 if quick else 50)
+                    results.append(bench_list(app, size, repeat))
+    # ---
+    if "log" in args.only:
+        with temp_database():
+            total = 500 if quick else 5000
+            results.append(bench_log_request(total, distinct=total))
+            results.append(bench_log_request(total, distinct=10))
+    # ---
+    if "views" in args.only:
+        for rows in [100_000] if quick else [100_000, 1_000_000]:
+            results.extend(bench_views(app, rows, repeat=3 if quick else 5))
+    # ---
+    if "compression" in args.only:
+        results.extend(bench_compression(app, 100_000, repeat=3 if quick else 10))
+    # ---
+    return {
+        "commit": git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "resolver_cost_ms": args.resolver_cost_ms,
+        "resolver_sleep": args.resolver_sleep,
+        "quick": quick,
+        "results": results,
+    }
+
+
+def result_key(item):
+    return item["name"], json.dumps(item["params"], sort_keys=True)
+
+
+def compare(old, new):
+    """Print p50 latency and throughput changes between two reports."""
+    old_results = {result_key(item): item for item in old["results"]}
+    # ---
+    print(f"{'benchmark':<55} {'p50 ms':>21} {'ops/s':>21}")
+    # ---
+    for item in new["results"]:
+        before = old_results.get(result_key(item))
+        name = f"{item['name']} {json.dumps(item['params'], ensure_ascii=False)}"
+        p50 = item["latency"]["p50"] * 1000
+        # ---
+        if before is None:
+            print(f"{name:<55} {p50:>21.3f} {item['throughput']:>21.1f}")
+            continue
+        # ---
+        old_p50 = before["latency"]["p50"] * 1000
+        change = (p50 - old_p50) / old_p50 * 100 if old_p50 else 0.0
+        print(
+            f"{name:<55} {old_p50:>8.3f} -> {p50:>8.3f} ({change:+.0f}%)"
+            f" {before['throughput']:>8.1f} -> {item['throughput']:>8.1f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the API and logging hot paths.")
+    parser.add_argument("--output", default="bench.json", help="report file (default: bench.json)")
+    parser.add_argument("--compare", help="report of another commit to compare with")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, no 1M-row database")
+    parser.add_argument("--resolver-cost-ms", type=float, default=1.0, help="stub resolver cost per title")
+    parser.add_argument("--resolver-sleep", action="store_true", help="sleep instead of using the CPU")
+    parser.add_argument(
+        "--only",
+        default="api,list,log,views,compression",
+        help="comma separated subset of: api, list, log, views, compression",
+    )
+    args = parser.parse_args(argv)
+    args.only = set(args.only.split(","))
+    # ---
+    report = run(args)
+    # ---
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+    # ---
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+    else:
+        for item in report["results"]:
+            print(
+                f"{item['name']} {json.dumps(item['params'], ensure_ascii=False)}: "
+                f"p50 {item['latency']['p50'] * 1000:.3f} ms, p99 {item['latency']['p99'] * 1000:.3f} ms, "
+                f"{item['throughput']:.1f} ops/s, {item['errors']} errors"
+            )
+    # ---
+    print(f"report: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
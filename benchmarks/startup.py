@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Worker start time: ``python -X importtime`` report and a time budget.
+
+Runs a fresh interpreter (from ``src``, with an empty HOME) that imports the app,
+calls ``create_app()``, answers one UI request and then one API request, and prints
+the time of each step and the modules that took longest to import. Exits with
+status 1 when importing the app and ``create_app()`` together take longer than
+``--budget-ms``, so a change that pulls a heavy import into startup fails the check.
+
+Usage (from the repository root):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --budget-ms 400 --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.layouts import SRC_DIR
+
+DEFAULT_BUDGET_MS = 500
+
+# Runs in the child interpreter; the last line of stdout is the JSON result
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+client = app.test_client()
+client.get("/logs")
+ui = time.perf_counter()
+resolver_before_api = "ArWikiCats" in sys.modules
+client.get("/api/Category:Yemen", headers={"User-Agent": "startup-benchmark"})
+api = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_ui_ms": (ui - created) * 1000,
+    "first_api_ms": (api - ui) * 1000,
+    "resolver_before_api": resolver_before_api,
+}))
+"""
+
+
+def parse_importtime(text):
+    """Return the ``-X importtime`` lines of ``text`` as dicts, in the order printed."""
+    entries = []
+    # ---
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        # ---
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        # ---
+        entries.append(
+            {
+                "module": name.strip(),
+                # Two spaces of indent per level of nesting
+                "depth": (len(name) - len(name.lstrip(" ")) - 1) // 2,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+            }
+        )
+    # ---
+    return entries
+
+
+def slowest_packages(entries, top=10):
+    """Top-level packages (first dotted part) by the self time of their modules, in ms."""
+    totals = {}
+    # ---
+    for entry in entries:
+        package = entry["module"].split(".")[0]
+        totals[package] = totals.get(package, 0) + entry["self_us"]
+    # ---
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+    # ---
+    return [(package, us / 1000) for package, us in ranked]
+
+
+def measure():
+    with tempfile.TemporaryDirectory() as home:
+        (Path(home) / "www" / "python" / "dbs").mkdir(parents=True)
+        env = dict(os.environ, HOME=home, LOG_LEVEL="WARNING")
+        # ---
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE],
+            cwd=SRC_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    # ---
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["imports"] = parse_importtime(process.stderr)
+    # ---
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time report of the worker start, with a time budget.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="for import + create_app()")
+    parser.add_argument("--top", type=int, default=10, help="packages to list")
+    parser.add_argument("--output", help="write the result, with every import, as JSON")
+    args = parser.parse_args(argv)
+    # ---
+    result = measure()
+    startup_ms = result["import_ms"] + result["create_app_ms"]
+    # ---
+    print(f"import app:        {result['import_ms']:8.1f} ms")
+    print(f"create_app():      {result['create_app_ms']:8.1f} ms")
+    print(f"first UI request:  {result['first_ui_ms']:8.1f} ms")
+    print(f"first API request: {result['first_api_ms']:8.1f} ms (imports ArWikiCats: {not result['resolver_before_api']})")
+    print()
+    print("self time of the imports, by package:")
+    # ---
+    for package, ms in slowest_packages(result["imports"], args.top):
+        print(f"  {package:<30} {ms:8.1f} ms")
+    # ---
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=4)
+    # ---
+    print()
+    # ---
+    if startup_ms > args.budget_ms:
+        print(f"FAIL: start {startup_ms:.0f} ms > budget {args.budget_ms:.0f} ms")
+        sys.exit(1)
+    # ---
+    print(f"OK: start {startup_ms:.0f} ms <= budget {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,29 @@
 
 from __future__ import annotations
 
+import gc
+import os
 import sys
 
+# Set in uwsgi.ini: build the resolver tables here, in the master, see app/preload.py
+PRELOAD_RESOLVER = os.getenv("PRELOAD_RESOLVER") == "1"
+
+if PRELOAD_RESOLVER:
+    gc.disable()
+
 from app import create_app  # noqa: E402
-from app.logs_db import init_db
+from app.logs_db import init_db  # noqa: E402
+
+# Creates missing tables, indexes and triggers in existing databases
+init_db()
 
 app = create_app()
 
+if PRELOAD_RESOLVER:
+    from app.preload import preload_resolver  # noqa: E402
+
+    preload_resolver()
+
 if __name__ == "__main__":
-    init_db()
     debug = any(arg.lower() == "debug" for arg in sys.argv)
     app.run(debug=debug)
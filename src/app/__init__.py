@@ -4,13 +4,17 @@ from pathlib import Path
 
 from flask import Flask, render_template
 from flask_cors import CORS
-from .logging_config import setup_logging
+from .assets import init_assets
+from .compression import init_compression
+from .logging_config import setup_logging_from_env
+from .metrics import init_metrics
+from .profiling import init_profiling
+from .query_budgets import init_query_budgets
+from .rate_limit import init_rate_limit
 from .routes import api_bp, ui_bp
 
-setup_logging(
-    level="DEBUG",
-    name=Path(__file__).parent.name,
-)
+# LOG_LEVEL, LOG_FORMAT (color, plain, json), LOG_FILE and LOG_QUEUE; see logging_config
+setup_logging_from_env(name=Path(__file__).parent.name)
 
 
 def create_app() -> Flask:
@@ -27,12 +31,31 @@ def create_app() -> Flask:
         resources={r"/api/*": {"origins": ["https://ar.wikipedia.org", "https://www.ar.wikipedia.org"]}},
     )
 
+    # The client address behind the front proxy (PROXY_HOPS), for RATE_LIMIT_BY_IP
+    init_rate_limit(app)
+
     # Register the API Blueprint
     app.register_blueprint(api_bp)
 
     # Register the UI Blueprint
     app.register_blueprint(ui_bp)
 
+    # asset_url() in templates and /static/dist/ (hashed files, see app/assets.py)
+    init_assets(app)
+
+    # Prometheus metrics at /metrics
+    init_metrics(app)
+
+    # cProfile on demand (PROFILE_TOKEN) or for 1 in N requests (PROFILE_SAMPLE_RATE)
+    init_profiling(app)
+
+    # 422 "query too expensive" when a read runs past its time budget
+    init_query_budgets(app)
+
+    # gzip / brotli for large responses (COMPRESSION, COMPRESS_MIN_SIZE, levels); runs
+    # before the hooks registered above, so the metrics include its time
+    init_compression(app)
+
     @app.errorhandler(404)
     def page_not_found(e):
         return render_template("error.html", tt="invalid_url", error=str(e)), 404
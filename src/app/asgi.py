@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+ASGI adapter for the Flask app, for clients that keep many connections open.
+
+Open connections wait in the event loop, not in threads: only ``ASGI_THREADS``
+(default 8) requests run the Flask app, resolver calls included, at a time, in a
+thread pool; the others wait their turn as coroutines. Requests beyond
+``ASGI_MAX_PENDING`` (default 1000) get a 503 at once. Log writes go to the writer
+thread of ``logs_db.writer``, so no request thread waits on the SQLite write lock.
+
+All the Flask routes and hooks run unchanged (timing, metrics, query budgets, CORS);
+request bodies and responses are buffered, which suits the JSON API.
+
+The resolver holds the GIL, so a process uses one CPU at most; run one server process
+per CPU (``uvicorn --workers``), as with uWSGI.
+"""
+import asyncio
+import contextvars
+import io
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from .logs_db import start_log_writer, stop_log_writer
+
+logger = logging.getLogger(__name__)
+
+ASGI_THREADS = int(os.getenv("ASGI_THREADS", "8"))
+ASGI_MAX_PENDING = int(os.getenv("ASGI_MAX_PENDING", "1000"))
+
+
+def build_environ(scope, body):
+    """Return the WSGI environ of an ASGI http scope."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    # ---
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        # WSGI carries the path as latin-1 decoded bytes
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    # ---
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").lower()
+        value = value.decode("latin-1")
+        # ---
+        if name == "content-length":
+            continue
+        # ---
+        if name == "content-type":
+            environ["CONTENT_TYPE"] = value
+            continue
+        # ---
+        key = "HTTP_" + name.upper().replace("-", "_")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    # ---
+    return environ
+
+
+def call_wsgi(wsgi_app, environ):
+    """Run the WSGI app and return ``(status code, headers, body)``."""
+    response = []
+    # ---
+    def start_response(status, headers, exc_info=None):
+        response[:] = [int(status.split(" ", 1)[0]), headers]
+    # ---
+    result = wsgi_app(environ, start_response)
+    # ---
+    try:
+        body = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    # ---
+    return response[0], response[1], body
+
+
+async def read_body(receive):
+    chunks = []
+    # ---
+    while True:
+        message = await receive()
+        # ---
+        if message["type"] == "http.disconnect":
+            return None
+        # ---
+        chunks.append(message.get("body", b""))
+        # ---
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def send_response(send, status, headers, body):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class AsgiApp:
+    def __init__(self, wsgi_app, threads=ASGI_THREADS, max_pending=ASGI_MAX_PENDING):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self.max_pending = max_pending
+        # Requests waiting for or running in the pool; only changed in the event loop
+        self.pending = 0
+        self.executor = None
+
+    def get_executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="asgi")
+        return self.executor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        # ---
+        if scope["type"] != "http":
+            return
+        # ---
+        body = await read_body(receive)
+        # ---
+        if body is None:
+            return
+        # ---
+        if self.pending >= self.max_pending:
+            await send_response(
+                send,
+                503,
+                [("Content-Type", "application/json; charset=utf-8"), ("Retry-After", "1")],
+                b'{"error": "server busy"}',
+            )
+            return
+        # ---
+        environ = build_environ(scope, body)
+        loop = asyncio.get_running_loop()
+        # ---
+        self.pending += 1
+        try:
+            # A new context per request: the pool threads are reused
+            status, headers, response_body = await loop.run_in_executor(
+                self.get_executor(), contextvars.Context().run, call_wsgi, self.wsgi_app, environ
+            )
+        finally:
+            self.pending -= 1
+        # ---
+        await send_response(send, status, headers, response_body)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            # ---
+            if message["type"] == "lifespan.startup":
+                self.get_executor()
+                start_log_writer()
+                await send({"type": "lifespan.startup.complete"})
+            # ---
+            elif message["type"] == "lifespan.shutdown":
+                if self.executor is not None:
+                    self.executor.shutdown(wait=True)
+                    self.executor = None
+                # Writes the rows still queued
+                stop_log_writer()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app(flask_app=None, **kwargs):
+    if flask_app is None:
+        from . import create_app
+
+        flask_app = create_app()
+    # ---
+    return AsgiApp(flask_app, **kwargs)
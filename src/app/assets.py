@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Content-hashed static files with precompressed variants, cached for a year.
+
+``python -m app.assets`` (from ``src``, run by ``web_sh/update1.sh`` on deploy) copies
+every file of ``static/`` to ``static/dist/<name>.<hash>.<ext>``, with ``.gz`` and
+``.br`` (when ``brotli`` is installed) next to it, and writes ``dist/manifest.json``.
+Templates link files with ``asset_url("api.js")``, which gives the hashed URL; a new
+version of a file gets a new URL, so ``/static/dist/`` can be served with
+``Cache-Control: immutable`` and browsers don't ask again on repeat visits.
+
+Without a build (development) ``asset_url`` falls back to the plain ``/static/`` URL.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import sys
+from pathlib import Path
+
+from flask import abort, current_app, request, send_from_directory, url_for
+
+from .compression import brotli, choose_encoding
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).parent.parent / "static"
+
+MANIFEST = "manifest.json"
+
+# One year: the URL changes with the content
+MAX_AGE = 365 * 24 * 3600
+
+HASH_LENGTH = 10
+
+# Build time is not a concern: use the smallest settings
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def hashed_name(path, content):
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    return f"{path.stem}.{digest}{path.suffix}"
+
+
+def build_assets(static_dir=STATIC_DIR, dist_dir=None):
+    """Write the hashed and compressed copies of the files in ``static_dir``; return the manifest."""
+    static_dir = Path(static_dir)
+    dist_dir = Path(dist_dir) if dist_dir else static_dir / "dist"
+    dist_dir.mkdir(parents=True, exist_ok=True)
+    # ---
+    previous = load_manifest(dist_dir)
+    manifest = {}
+    # ---
+    for path in sorted(p for p in static_dir.iterdir() if p.is_file()):
+        content = path.read_bytes()
+        name = hashed_name(path, content)
+        manifest[path.name] = name
+        # ---
+        (dist_dir / name).write_bytes(content)
+        # mtime=0: the same input gives the same .gz
+        (dist_dir / f"{name}.gz").write_bytes(gzip.compress(content, GZIP_LEVEL, mtime=0))
+        # ---
+        if brotli is not None:
+            (dist_dir / f"{name}.br").write_bytes(brotli.compress(content, quality=BROTLI_QUALITY))
+    # ---
+    (dist_dir / MANIFEST).write_text(json.dumps(manifest, indent=4, sort_keys=True), encoding="utf-8")
+    # ---
+    # Pages rendered by the workers still running the previous build link its files,
+    # so those stay until the next build; older ones go
+    keep = set(manifest.values()) | set(previous.values())
+    # ---
+    for path in dist_dir.iterdir():
+        base = path.name.removesuffix(".gz").removesuffix(".br")
+        if path.name != MANIFEST and base not in keep:
+            path.unlink()
+    # ---
+    return manifest
+
+
+def load_manifest(dist_dir):
+    path = Path(dist_dir) / MANIFEST
+    # ---
+    if not path.exists():
+        return {}
+    # ---
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def asset_url(filename):
+    """URL of a static file: the hashed one when the assets are built."""
+    name = current_app.extensions["assets"].get(filename)
+    # ---
+    if name is None:
+        return url_for("static", filename=filename)
+    # ---
+    return url_for("asset", filename=name)
+
+
+def serve_asset(filename):
+    # The variants are picked below, from Accept-Encoding
+    if filename.startswith(MANIFEST) or filename.endswith((".gz", ".br")):
+        abort(404)
+    # ---
+    dist_dir = Path(current_app.config["ASSETS_DIR"])
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    # ---
+    available = [e for e, suffix in (("br", ".br"), ("gzip", ".gz")) if (dist_dir / f"{filename}{suffix}").exists()]
+    encoding = choose_encoding(request.accept_encodings, available)
+    suffix = {"br": ".br", "gzip": ".gz"}.get(encoding, "")
+    # ---
+    response = send_from_directory(dist_dir, filename + suffix, mimetype=mimetype, max_age=MAX_AGE)
+    # ---
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    # ---
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    # ---
+    return response
+
+
+def init_assets(app):
+    app.config.setdefault("ASSETS_DIR", str(Path(app.static_folder) / "dist"))
+    # ---
+    manifest = load_manifest(app.config["ASSETS_DIR"])
+    app.extensions["assets"] = manifest
+    # ---
+    if not manifest:
+        logger.info("no asset manifest in %s, serving the files of static/ as they are", app.config["ASSETS_DIR"])
+    # ---
+    app.add_template_global(asset_url)
+    app.add_url_rule("/static/dist/<path:filename>", "asset", serve_asset)
+
+
+def main():
+    static_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else STATIC_DIR
+    manifest = build_assets(static_dir)
+    # ---
+    for name, hashed in manifest.items():
+        print(f"{name} -> dist/{hashed}")
+
+
+if __name__ == "__main__":
+    main()
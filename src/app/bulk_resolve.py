@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Server-side re-resolution of the titles logged with ``no_result``.
+
+The titles are resolved in chunks with ``batch_resolve_labels``, across worker
+processes from the command line and in the request thread from
+``/api/no_result/resolve``, and nothing is written to the logs tables, so re-runs
+are not counted as user traffic.
+
+Usage (from ``src``):
+    python -m app.bulk_resolve --day 2025-01-27 --workers 4 --output diff.json
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .logs_db import get_no_result_titles
+from .resolver import lazy, load_resolver
+from .single_flight import canonical_title
+
+batch_resolve_labels = lazy("batch_resolve_labels")
+
+CHUNK_SIZE = 200
+
+
+def chunked(items, size=CHUNK_SIZE):
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def resolve_chunk(titles):
+    """Resolve one chunk of titles, returning only the titles that got a label."""
+    result = batch_resolve_labels(titles)
+    # ---
+    # The labels are keyed by the normalized title (no "_", no BOM), map them back
+    # to the titles that were sent
+    labels = {}
+    # ---
+    for title in titles:
+        label = result.labels.get(canonical_title(title))
+        if label:
+            labels[title] = label
+    # ---
+    return labels
+
+
+def run_in_pool(func, chunks, workers=1):
+    """
+    Apply ``func`` to every chunk, in worker processes when ``workers`` > 1.
+
+    Results are yielded in the order of ``chunks``.
+    """
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield func(chunk)
+        return
+    # ---
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+        yield from executor.map(func, chunks)
+
+
+def reresolve_titles(titles, workers=1, chunk_size=CHUNK_SIZE):
+    """Resolve ``titles`` again and split them into newly resolved and still unresolved."""
+    # Raises ResolverUnavailable (a RuntimeError) here rather than in the workers, which
+    # inherit the imported module
+    load_resolver()
+    # ---
+    start_time = time.time()
+    # ---
+    resolved = {}
+    # ---
+    for labels in run_in_pool(resolve_chunk, chunked(titles, chunk_size), workers=workers):
+        resolved.update(labels)
+    # ---
+    no_result = [title for title in titles if title not in resolved]
+    # ---
+    return {
+        "total": len(titles),
+        "with_labs": len(resolved),
+        "no_labs": len(no_result),
+        "resolved": resolved,
+        "no_result": no_result,
+        "time": time.time() - start_time,
+    }
+
+
+def reresolve_no_result(day="", limit=0, workers=1, chunk_size=CHUNK_SIZE):
+    """Re-resolve the current no_result set, optionally only the titles logged on ``day``."""
+    titles = get_no_result_titles(day=day, limit=limit)
+    # ---
+    diff = reresolve_titles(titles, workers=workers, chunk_size=chunk_size)
+    diff["day"] = day or ""
+    # ---
+    return diff
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-resolve the no_result titles and report the ones that resolve now.")
+    parser.add_argument("--day", default="", help="only titles logged on this day (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, default=0, help="only the N most requested titles")
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--output", help="write the diff to this JSON file instead of stdout")
+    args = parser.parse_args(argv)
+    # ---
+    diff = reresolve_no_result(day=args.day, limit=args.limit, workers=args.workers, chunk_size=args.chunk_size)
+    # ---
+    text = json.dumps(diff, ensure_ascii=False, indent=4, sort_keys=True)
+    # ---
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"{diff['with_labs']:,} of {diff['total']:,} titles resolve now, diff written to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+gzip and brotli compression of large responses, negotiated from ``Accept-Encoding``.
+
+    COMPRESSION              encodings offered, in order of preference (default "br,gzip";
+                             br only with the ``brotli`` package installed; empty disables)
+    COMPRESS_MIN_SIZE        bodies smaller than this many bytes are sent as they are (default 1024)
+    COMPRESS_GZIP_LEVEL      1 (fastest) to 9 (smallest), default 6
+    COMPRESS_BROTLI_QUALITY  0 (fastest) to 11 (smallest), default 5
+
+Streamed responses are compressed chunk by chunk, with a flush after each chunk, so
+the client still gets every chunk as soon as it is produced. Files sent with
+``send_file`` (static files, profiles) are left alone.
+"""
+import os
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+
+
+class Compressor:
+    """One gzip or brotli stream."""
+
+    def __init__(self, encoding, gzip_level=6, brotli_quality=5):
+        self.encoding = encoding
+        # ---
+        if encoding == "br":
+            self.stream = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits 16 + MAX_WBITS: gzip header and trailer
+            self.stream = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data, flush=False):
+        if self.encoding == "br":
+            out = self.stream.process(data)
+            return out + self.stream.flush() if flush else out
+        # ---
+        out = self.stream.compress(data)
+        return out + self.stream.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self):
+        return self.stream.finish() if self.encoding == "br" else self.stream.flush()
+
+
+def offered_encodings(value):
+    encodings = [x.strip() for x in value.split(",") if x.strip() in ("br", "gzip")]
+    # ---
+    if "br" in encodings and brotli is None:
+        encodings.remove("br")
+    # ---
+    return encodings
+
+
+def choose_encoding(accept_encodings, offered):
+    """Return the offered encoding the client accepts with the highest q, the earlier one on a tie."""
+    best, best_quality = None, 0
+    # ---
+    for encoding in offered:
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    # ---
+    return best
+
+
+def compress_stream(chunks, compressor):
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        if chunk:
+            yield compressor.compress(chunk, flush=True)
+    # ---
+    yield compressor.finish()
+
+
+def compress_response(response):
+    config = current_app.config
+    # ---
+    if not config["COMPRESSION"] or response.mimetype not in COMPRESSIBLE_TYPES:
+        return response
+    # ---
+    # Caches must keep the encodings apart, compressed or not this time
+    response.vary.add("Accept-Encoding")
+    # ---
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or request.method == "HEAD"
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or "no-transform" in response.headers.get("Cache-Control", "")
+    ):
+        return response
+    # ---
+    if not response.is_streamed and response.calculate_content_length() < config["COMPRESS_MIN_SIZE"]:
+        return response
+    # ---
+    encoding = choose_encoding(request.accept_encodings, config["COMPRESSION"])
+    # ---
+    if encoding is None:
+        return response
+    # ---
+    compressor = Compressor(encoding, config["COMPRESS_GZIP_LEVEL"], config["COMPRESS_BROTLI_QUALITY"])
+    # ---
+    if response.is_streamed:
+        chunks = response.response
+        # ---
+        if hasattr(chunks, "close"):
+            response.call_on_close(chunks.close)
+        # ---
+        response.response = compress_stream(chunks, compressor)
+        response.headers.pop("Content-Length", None)
+    else:
+        response.set_data(compressor.compress(response.get_data()) + compressor.finish())
+    # ---
+    response.headers["Content-Encoding"] = encoding
+    # ---
+    # The compressed bytes differ from the ones the validator was computed on
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    # ---
+    return response
+
+
+def init_compression(app):
+    app.config["COMPRESSION"] = offered_encodings(os.getenv("COMPRESSION", "br,gzip"))
+    app.config["COMPRESS_MIN_SIZE"] = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    app.config["COMPRESS_GZIP_LEVEL"] = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    app.config["COMPRESS_BROTLI_QUALITY"] = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+    # ---
+    if not app.config["COMPRESSION"]:
+        return
+    # ---
+    app.after_request(compress_response)
@@ -1,14 +1,35 @@
 """
 Logging configuration with colored output.
+
+``setup_logging_from_env`` reads the settings from the environment:
+    LOG_LEVEL   DEBUG (default), INFO, WARNING, ...
+    LOG_FORMAT  color (default), plain or json
+    LOG_FILE    also write to this file (and warnings to ``<file>.err``)
+    LOG_QUEUE   1 to format and write records on a background thread
 """
 
+import atexit
 import functools
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import re
 import sys
 from pathlib import Path
 
-import colorlog
+# Color tags: '<<red>>', '<<previous>>', '\03{blue}'
+_color_pat = r"((:?\w+|previous);?(:?\w+|previous)?)"
+COLOR_TAG_RE = re.compile(rf"(?:\03{{|<<){_color_pat}(?:}}|>>)")
+
+LOG_FORMATS = ["color", "plain", "json"]
+
+PLAIN_FORMAT = "%(asctime)s - %(name)s - %(levelname)-8s - %(message)s"
+PLAIN_DATEFMT = "%Y-%m-%d %H:%M:%S"
+
+# Attributes of every LogRecord; anything else was passed with extra={...}
+_RECORD_ATTRIBUTES = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "taskName"}
 
 
 @functools.lru_cache(maxsize=1)
@@ -58,15 +79,6 @@ def format_colored_text(textm: str) -> str:
 
     :param textm: The text to print. Can contain color tags.
     """
-    color_table = get_color_table()
-    # Define a pattern for color tags
-    _color_pat = r"((:?\w+|previous);?(:?\w+|previous)?)"
-    # Compile a regex for color tags
-    colorTagR = re.compile(rf"(?:\03{{|<<){_color_pat}(?:}}|>>)")
-
-    # Initialize a stack for color tags
-    color_stack = ["default"]
-
     # If the input is not a string, print it as is and return
     if not isinstance(textm, str):
         return textm
@@ -75,14 +87,19 @@ def format_colored_text(textm: str) -> str:
     if "\03" not in textm and "<<" not in textm:
         return textm
 
+    color_table = get_color_table()
+
+    # Initialize a stack for color tags
+    color_stack = ["default"]
+
     # Split the text into parts based on the color tags
-    text_parts = colorTagR.split(textm) + ["default"]
+    text_parts = COLOR_TAG_RE.split(textm) + ["default"]
 
     # Enumerate the parts for processing
     enu = enumerate(zip(text_parts[::4], text_parts[1::4], strict=False))
 
-    # Initialize the string to be printed
-    toprint = ""
+    # Collect the parts to be printed
+    toprint = []
 
     # Process each part of the text
     for _, (text, next_color) in enu:
@@ -106,11 +123,11 @@ def format_colored_text(textm: str) -> str:
         if cc:
             text = cc % text
 
-        # Add the colored text to the string to be printed
-        toprint += text
+        # Add the colored text to the parts to be printed
+        toprint.append(text)
 
     # Print the final colored text
-    return toprint
+    return "".join(toprint)
 
 
 def wrap_color_messages(format_message):
@@ -133,13 +150,106 @@ def prepare_log_file(log_file, project_logger):
     return log_file
 
 
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the fields passed in ``extra={...}``."""
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record, PLAIN_DATEFMT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        # ---
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                data[key] = value
+        # ---
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        # ---
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def color_formatter():
+    # colorlog is only needed (and imported) for the color format
+    import colorlog
+
+    formatter = colorlog.ColoredFormatter(
+        fmt="%(filename)s:%(lineno)s %(funcName)s() - %(log_color)s%(levelname)-s %(reset)s%(message)s",
+        log_colors={
+            "DEBUG": "cyan",
+            "INFO": "green",
+            "WARNING": "yellow",
+            "ERROR": "red",
+            "CRITICAL": "red,bg_white",
+        },
+    )
+    # message colorizer
+    formatter.formatMessage = wrap_color_messages(formatter.formatMessage)
+
+    return formatter
+
+
+def make_formatter(log_format):
+    if log_format == "json":
+        return JsonFormatter()
+
+    if log_format == "plain":
+        return logging.Formatter(fmt=PLAIN_FORMAT, datefmt=PLAIN_DATEFMT)
+
+    return color_formatter()
+
+
+class ProcessQueueHandler(logging.handlers.QueueHandler):
+    """
+    Put the records on a queue that a ``QueueListener`` thread of this process drains.
+
+    The listener is started by the first record of each process: a thread doesn't
+    survive ``fork()``, and the workers of gunicorn (``preload_app``) and uWSGI
+    (``lazy-apps = false``) are forked from a master that has already imported the app.
+    """
+
+    def __init__(self, handlers):
+        super().__init__(queue.SimpleQueue())
+        self.handlers = handlers
+        self.listener = None
+        self.pid = None
+
+    def start(self):
+        # Records the parent had queued before the fork are the parent's to write
+        self.queue = queue.SimpleQueue()
+        self.listener = logging.handlers.QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        self.pid = os.getpid()
+
+    def stop(self):
+        if self.listener is not None and self.pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+            self.pid = None
+
+    def enqueue(self, record):
+        # Called under the handler lock, which logging re-creates in a forked child
+        if self.pid != os.getpid():
+            self.start()
+        # ---
+        super().enqueue(record)
+
+
 def setup_logging(
     level: str = "WARNING",
     name: str = "app",
     log_file: str | None = None,
+    log_format: str = "color",
+    use_queue: bool = False,
 ) -> None:
     """
     Configure logging for the entire project namespace only.
+
+    With ``use_queue``, the logger only puts records on a queue, and a
+    ``QueueListener`` thread of each process formats them and writes them to the
+    handlers (see ``ProcessQueueHandler``).
     """
     project_logger = logging.getLogger(name)
 
@@ -150,41 +260,56 @@ def setup_logging(
     project_logger.setLevel(numeric_level)
     project_logger.propagate = False
 
-    formatter = colorlog.ColoredFormatter(
-        fmt="%(filename)s:%(lineno)s %(funcName)s() - %(log_color)s%(levelname)-s %(reset)s%(message)s",
-        log_colors={
-            "DEBUG": "cyan",
-            "INFO": "green",
-            "WARNING": "yellow",
-            "ERROR": "red",
-            "CRITICAL": "red,bg_white",
-        },
-    )
-
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    # message colorizer
-    formatter.formatMessage = wrap_color_messages(formatter.formatMessage)
-
+    console_handler.setFormatter(make_formatter(log_format))
     console_handler.setLevel(numeric_level)
 
-    project_logger.addHandler(console_handler)
+    handlers = [console_handler]
 
     if log_file:
         log_file = prepare_log_file(log_file, project_logger)
-        setup_file_handler(project_logger, log_file, numeric_level)
+
+    if log_file:
+        file_format = "json" if log_format == "json" else "plain"
+        handlers.append(make_file_handler(log_file, numeric_level, file_format))
 
         # Separate error log file
         log_file2 = log_file.with_suffix(".err")
-        setup_file_handler(project_logger, log_file2, logging.WARNING)
+        handlers.append(make_file_handler(log_file2, logging.WARNING, file_format))
+
+    if not use_queue:
+        for handler in handlers:
+            project_logger.addHandler(handler)
+        return
 
+    queue_handler = ProcessQueueHandler(handlers)
+    # Flush what is left in the queue at exit
+    atexit.register(queue_handler.stop)
 
-def setup_file_handler(project_logger, log_file, level):
-    file_formatter = logging.Formatter(
-        fmt="%(asctime)s - %(name)s - %(levelname)-8s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
+    project_logger.addHandler(queue_handler)
+
+
+def setup_logging_from_env(name: str = "app") -> None:
+    log_format = os.getenv("LOG_FORMAT", "color").lower()
+
+    if log_format not in LOG_FORMATS:
+        log_format = "color"
+
+    setup_logging(
+        level=os.getenv("LOG_LEVEL", "DEBUG"),
+        name=name,
+        log_file=os.getenv("LOG_FILE") or None,
+        log_format=log_format,
+        use_queue=os.getenv("LOG_QUEUE", "") in ("1", "true", "yes"),
     )
+
+
+def make_file_handler(log_file, level, log_format="plain"):
     file_handler = logging.FileHandler(log_file, mode="a", encoding="utf-8")
-    file_handler.setFormatter(file_formatter)
+    file_handler.setFormatter(make_formatter(log_format))
     file_handler.setLevel(level)
-    project_logger.addHandler(file_handler)
+    return file_handler
+
+
+def setup_file_handler(project_logger, log_file, level):
+    project_logger.addHandler(make_file_handler(log_file, level))
@@ -3,9 +3,49 @@
 db_tables = ["logs", "list_logs"]
 
 from . import logs_db  # logs_db.change_db_path(file)
+from . import slow_requests
+from .logs_db.db import latency_buckets
+from .stats import histogram_summary
 
 
-def view_logs(request):
+order_by_types = [
+    "id",
+    "endpoint",
+    "request_data",
+    "response_status",
+    "response_time",
+    "response_count",
+    "timestamp",
+    "date_only",
+]
+
+
+# Deepest row a DataTables page can start at
+MAX_OFFSET = 10000
+
+
+def log_row(log):
+    # {'id': 1, 'endpoint': 'api', 'request_data': 'Category:1934-35 in Bulgarian football', 'response_status': 'true', 'response_time': 123123.0, 'response_count': 6, 'timestamp': '2025-04-10 01:08:58'}
+    # ---
+    request_data = log["request_data"].replace("_", " ")
+    # ---
+    # 2025-04-23 21:13:18
+    timestamp = log["timestamp"].split(" ")[1]
+    # ---
+    return {
+        "id": log["id"],
+        "endpoint": log["endpoint"],
+        "request_data": request_data,
+        "response_status": log["response_status"],
+        "response_time": log["response_time"],
+        "response_count": log["response_count"],
+        "timestamp": timestamp,
+        "date_only": log["date_only"],
+    }
+
+
+def view_logs(request, with_rows=True):
+    """The /logs page and /api/logs; without ``with_rows``, only the filters and totals (the rows come from /api/logs)."""
     # ---
     db_path = request.args.get("db_path")
     # ---
@@ -39,55 +79,26 @@ def view_logs(request):
     # Offset for pagination
     offset = (page - 1) * per_page
     # ---
-    order_by_types = [
-        "id",
-        "endpoint",
-        "request_data",
-        "response_status",
-        "response_time",
-        "response_count",
-        "timestamp",
-        "date_only",
-    ]
-    # ---
     if order_by not in order_by_types:
         order_by = "timestamp"
     # ---
-    # [{'response_status': 'no_result', 'numbers': 10066}, {'response_status': 'success', 'numbers': 12}
-    # status_table = logs_db.get_response_status(table_name=table_name)
-    status_table = ["no_result"]
+    # ['no_result', 'Category', 'success'], read from the status catalogue
+    status_table = list(logs_db.get_response_status(table_name=table_name))
     # ---
     status = status if (status in status_table or status == "Category") else ""
     # ---
-    logs = logs_db.get_logs(
-        per_page, offset, order, order_by=order_by, status=status, table_name=table_name, like=like, day=day
-    )
-    # ---
-    # Convert to list of dicts
     log_list = []
+    total_logs = 0
     # ---
-    for log in logs:
-        # {'id': 1, 'endpoint': 'api', 'request_data': 'Category:1934-35 in Bulgarian football', 'response_status': 'true', 'response_time': 123123.0, 'response_count': 6, 'timestamp': '2025-04-10 01:08:58'}
-        # ---
-        request_data = log["request_data"].replace("_", " ")
+    if with_rows:
+        logs = logs_db.get_logs(
+            per_page, offset, order, order_by=order_by, status=status, table_name=table_name, like=like, day=day
+        )
         # ---
-        # 2025-04-23 21:13:18
-        timestamp = log["timestamp"].split(" ")[1]
+        # Convert to list of dicts
+        log_list = [log_row(log) for log in logs]
         # ---
-        log_list.append(
-            {
-                "id": log["id"],
-                "endpoint": log["endpoint"],
-                "request_data": request_data,
-                "response_status": log["response_status"],
-                "response_time": log["response_time"],
-                "response_count": log["response_count"],
-                "timestamp": timestamp,
-                "date_only": log["date_only"],
-            }
-        )
-    # ---
-    total_logs = logs_db.count_all(status=status, table_name=table_name, like=like)
+        total_logs = logs_db.count_all(status=status, table_name=table_name, like=like)
     # ---
     # Pagination calculations
     total_pages = (total_logs + per_page - 1) // per_page
@@ -138,6 +149,145 @@ def view_logs(request):
     return result
 
 
+def view_logs_datatables(request):
+    """
+    /api/logs in the DataTables server-side protocol (``draw``, ``start``, ``length``,
+    ``order[0][column]``, ``order[0][dir]``, ``search[value]``), with the filters of /logs.
+
+    The search box matches the start of the title, so it reads the index on request_data.
+    The counts come from the status catalogue where they can, and pages start at
+    ``MAX_OFFSET`` at most.
+    """
+    args = request.args
+    # ---
+    if args.get("db_path"):
+        logs_db.change_db_path(args.get("db_path"))
+    # ---
+    table_name = args.get("table_name", "")
+    # ---
+    if table_name not in db_tables:
+        table_name = "logs"
+    # ---
+    start = max(0, args.get("start", 0, type=int))
+    length = args.get("length", 10, type=int)
+    # -1 is "All" in DataTables: the largest page instead
+    length = 200 if length < 0 else max(1, min(200, length))
+    # ---
+    column = args.get("order[0][column]", type=int)
+    order_by = args.get(f"columns[{column}][data]", "") if column is not None else ""
+    order = args.get("order[0][dir]", "desc").upper()
+    # ---
+    if order_by not in order_by_types:
+        order_by = "response_count"
+    # ---
+    if order not in ["ASC", "DESC"]:
+        order = "DESC"
+    # ---
+    day = args.get("day", "")
+    like = args.get("like", "")
+    search = args.get("search[value]", "").strip()
+    status = args.get("status", "")
+    # ---
+    if status not in logs_db.get_response_status(table_name=table_name) and status != "Category":
+        status = ""
+    # ---
+    filters = {"status": status, "like": like, "day": day, "search": search}
+    # ---
+    # The row counts of the table and of a status come from the status catalogue, kept
+    # by a trigger; only a day, like or search filter is counted on the table (by index)
+    records_total = logs_db.count_catalogued(table_name=table_name)
+    # ---
+    if records_total is None:
+        records_total = logs_db.count_all(table_name=table_name)
+    # ---
+    if day or like or search:
+        records_filtered = logs_db.count_all(table_name=table_name, **filters)
+    elif status:
+        records_filtered = logs_db.count_catalogued(status=status, table_name=table_name)
+        # ---
+        if records_filtered is None:
+            records_filtered = logs_db.count_all(table_name=table_name, status=status)
+    else:
+        records_filtered = records_total
+    # ---
+    result = {
+        # Echoed back so the table drops the responses of superseded requests
+        "draw": args.get("draw", 0, type=int),
+        "recordsTotal": records_total,
+        "recordsFiltered": records_filtered,
+        "data": [],
+    }
+    # ---
+    # OFFSET reads and skips every row before the page: past MAX_OFFSET, narrow the rows instead
+    if start > MAX_OFFSET:
+        result["error"] = f"Only the first {MAX_OFFSET:,} rows can be paged through; search or filter to reach the others."
+        return result
+    # ---
+    logs = logs_db.get_logs(length, start, order, order_by=order_by, table_name=table_name, **filters)
+    # ---
+    result["data"] = [log_row(log) for log in logs]
+    # ---
+    return result
+
+
+def view_slow_requests(request):
+    # ---
+    page = max(1, request.args.get("page", 1, type=int))
+    per_page = max(1, min(200, request.args.get("per_page", 50, type=int)))
+    order = request.args.get("order", "desc").upper()
+    order_by = request.args.get("order_by", "duration")
+    # ?route=/api/list (url_for() reserves "endpoint")
+    endpoint = request.args.get("route", "")
+    # ---
+    if order not in ["ASC", "DESC"]:
+        order = "DESC"
+    # ---
+    if order_by not in logs_db.slow_order_by_types:
+        order_by = "duration"
+    # ---
+    rows = logs_db.get_slow_requests(per_page, (page - 1) * per_page, order, order_by=order_by, endpoint=endpoint)
+    # ---
+    total = logs_db.count_slow_requests(endpoint=endpoint)
+    total_pages = (total + per_page - 1) // per_page
+    # ---
+    result = {
+        "rows": rows,
+        "order_by_types": logs_db.slow_order_by_types,
+        "tab": {
+            "threshold": slow_requests.SLOW_REQUEST_SECONDS,
+            "total": total,
+            "total_pages": total_pages,
+            "page": page,
+            "per_page": per_page,
+            "order": order,
+            "order_by": order_by,
+            "route": endpoint,
+        },
+    }
+    # ---
+    return result
+
+
+def latency_by_day(endpoint=""):
+    # ---
+    # {(day, endpoint): {"counts": [hits per bucket], "max": seconds}}
+    histograms = {}
+    # ---
+    for row in logs_db.get_latency_histogram(endpoint=endpoint):
+        key = (row["date_only"], row["endpoint"])
+        item = histograms.setdefault(key, {"counts": [0] * (len(latency_buckets) + 1), "max": 0.0})
+        item["counts"][row["bucket"]] += row["hits"]
+        item["max"] = max(item["max"], row["max_time"])
+    # ---
+    # {"2025-01-27": {"/api/<title>": {"count": 10, "p50": 0.01, "p90": ..., "p99": ..., "max": ...}}}
+    latency = {}
+    # ---
+    for (day, endpoint_name), item in histograms.items():
+        latency.setdefault(day, {})[endpoint_name] = histogram_summary(latency_buckets, item["counts"], item["max"])
+    # ---
+    return latency
+
+
 def retrieve_logs_by_date(request):
     # ---
     db_path = request.args.get("db_path")
@@ -173,11 +323,14 @@ def retrieve_logs_by_date(request):
     # ---
     sum_all = 0
     # ---
+    latency = latency_by_day()
+    # ---
     for day, results_keys in data_logs.items():
         total = sum(results_keys["results"].values())
         sum_all += total
         # ---
         results_keys["total"] = total
+        results_keys["latency"] = latency.get(day, {})
         # ---
         logs.append(results_keys)
     # ---
@@ -203,9 +356,17 @@ def retrieve_logs_by_date(request):
     return data
 
 
-def retrieve_logs_en_to_ar(day=None):
+def retrieve_logs_en_to_ar(day=None, date_from="", date_to=""):
+    # ---
+    date_range = {}
+    # ---
+    if date_from:
+        date_range["date_from"] = date_from
+    # ---
+    if date_to:
+        date_range["date_to"] = date_to
     # ---
-    logs_data = logs_db.all_logs_en2ar(day=day)
+    logs_data = logs_db.all_logs_en2ar(day=day, **date_range)
     # ---
     data_no_result = [x for x, v in logs_data.items() if v == "no_result"]
     data_result = {x: v for x, v in logs_data.items() if v != "no_result"}
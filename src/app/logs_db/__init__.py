@@ -4,15 +4,26 @@ from .bot import (
     all_logs_en2ar,
     change_db_path,
     count_all,
+    count_catalogued,
+    count_slow_requests,
     db_commit,
     fetch_all,
     fetch_logs_by_date,
+    get_latency_histogram,
+    get_latest_results,
     get_logs,
+    get_no_result_titles,
     get_response_status,
+    get_slow_requests,
     init_db,
     log_request,
+    log_slow_request,
+    slow_order_by_types,
     sum_response_count,
+    write_logs,
 )
+from .db import QueryTooExpensive, query_budget
+from .writer import start_log_writer, stop_log_writer
 
 __all__ = [
     "change_db_path",
@@ -23,7 +34,20 @@ __all__ = [
     "log_request",
     "get_logs",
     "count_all",
+    "count_catalogued",
     "get_response_status",
     "fetch_logs_by_date",
     "all_logs_en2ar",
+    "get_no_result_titles",
+    "get_latest_results",
+    "log_slow_request",
+    "get_slow_requests",
+    "count_slow_requests",
+    "slow_order_by_types",
+    "get_latency_histogram",
+    "QueryTooExpensive",
+    "query_budget",
+    "write_logs",
+    "start_log_writer",
+    "stop_log_writer",
 ]
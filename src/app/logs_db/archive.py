@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Move closed log days out of the hot tables into gzip-compressed JSON lines files.
+
+One file per table and day: ``<main_path>/archive/<db name>/<table>/<YYYY-MM-DD>.jsonl.gz``.
+A per-day summary is kept in the ``archived_days`` table for ``fetch_logs_by_date``,
+and the rows themselves are only read back when a query asks for those days.
+
+Usage (from ``src``):
+    python -m app.logs_db.archive --days 90 [--db-path new_logs.db] [--vacuum]
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+try:
+    from . import db
+except ImportError:
+    import db
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("LOGS_ARCHIVE_AFTER_DAYS", "90"))
+
+# Rows of the day files each worker keeps in memory, the most recently read days first
+ARCHIVE_CACHE_ROWS = int(os.getenv("LOGS_ARCHIVE_CACHE_ROWS", "50000"))
+
+# (path, mtime) -> rows; mtime is part of the key, so a rewritten file is read again
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+archive_tables = ["logs", "list_logs"]
+
+
+def archive_dir(table_name):
+    return db.main_path / "archive" / Path(db.db_path_main[1]).stem / table_name
+
+
+def day_file(table_name, day):
+    return archive_dir(table_name) / f"{day}.jsonl.gz"
+
+
+def _read_day_file(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return tuple(json.loads(line) for line in f if line.strip())
+
+
+def cached_rows():
+    return sum(len(rows) for rows in _cache.values())
+
+
+def _cache_day(key, rows):
+    with _cache_lock:
+        _cache[key] = rows
+        _cache.move_to_end(key)
+        # ---
+        total = cached_rows()
+        # ---
+        # A day larger than the whole budget is not kept at all
+        while total > ARCHIVE_CACHE_ROWS and _cache:
+            _, dropped = _cache.popitem(last=False)
+            total -= len(dropped)
+
+
+def read_day_file(path):
+    path = Path(path)
+    # ---
+    if not path.exists():
+        return ()
+    # ---
+    key = (str(path), path.stat().st_mtime_ns)
+    # ---
+    with _cache_lock:
+        rows = _cache.get(key)
+        # ---
+        if rows is not None:
+            _cache.move_to_end(key)
+            return rows
+    # ---
+    rows = _read_day_file(key[0])
+    _cache_day(key, rows)
+    # ---
+    return rows
+
+
+def write_day_file(path, rows):
+    # Merge with an earlier, interrupted run for the same day
+    merged = {row["id"]: row for row in read_day_file(path)}
+    merged.update({row["id"]: row for row in rows})
+    # ---
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    # ---
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for row_id in sorted(merged):
+            f.write(json.dumps(merged[row_id], ensure_ascii=False) + "\n")
+    # ---
+    os.replace(tmp_path, path)
+
+
+def archived_days(table_name="logs", day="", date_from="", date_to=""):
+    """Return the archived days of ``table_name`` matching a day, a month or a from/to range."""
+    folder = archive_dir(table_name)
+    # ---
+    if not folder.exists():
+        return []
+    # ---
+    days = sorted(p.name.removesuffix(".jsonl.gz") for p in folder.glob("*.jsonl.gz"))
+    # ---
+    if day:
+        days = [d for d in days if d.startswith(day)]
+    # ---
+    if date_from:
+        days = [d for d in days if d >= date_from]
+    # ---
+    if date_to:
+        days = [d for d in days if d <= date_to]
+    # ---
+    return days
+
+
+def load_archived_rows(table_name="logs", day="", date_from="", date_to=""):
+    rows = []
+    # ---
+    for archived_day in archived_days(table_name, day=day, date_from=date_from, date_to=date_to):
+        rows.extend(read_day_file(day_file(table_name, archived_day)))
+    # ---
+    return rows
+
+
+def archive_day(table_name, day):
+    """
+    Write one closed day to its archive file, then summarize and delete its rows and
+    take them out of status_catalogue, in one transaction.
+    """
+    with sqlite3.connect(db.db_path_main[1]) as conn:
+        conn.row_factory = sqlite3.Row
+        # ---
+        rows = [dict(row) for row in conn.execute(f"SELECT * FROM {table_name} WHERE date_only = ?", [day])]
+        # ---
+        if not rows:
+            return 0
+        # ---
+        write_day_file(day_file(table_name, day), rows)
+        # ---
+        conn.execute(
+            f"""
+            INSERT INTO archived_days (table_name, date_only, status_group, title_count, count)
+                SELECT ?, date_only,
+                    CASE WHEN response_status LIKE 'تصنيف%' THEN 'Category' ELSE response_status END AS status_group,
+                    COUNT(request_data), sum(response_count)
+                FROM {table_name}
+                WHERE date_only = ?
+                GROUP BY status_group
+                ON CONFLICT(table_name, date_only, status_group) DO UPDATE SET
+                    title_count = title_count + excluded.title_count,
+                    count = count + excluded.count
+            """,
+            [table_name, day],
+        )
+        # The rows leave the status counts of /api/status and the /logs filters too
+        groups = Counter("Category" if row["response_status"].startswith("تصنيف") else row["response_status"] for row in rows)
+        conn.executemany(
+            "UPDATE status_catalogue SET numbers = max(0, numbers - ?) WHERE table_name = ? AND status_group = ?",
+            [(numbers, table_name, group) for group, numbers in groups.items()],
+        )
+        conn.execute(f"DELETE FROM {table_name} WHERE date_only = ?", [day])
+    conn.commit()
+    # ---
+    return len(rows)
+
+
+def archive_old_days(older_than_days=ARCHIVE_AFTER_DAYS, table_name="logs"):
+    """Archive every day of ``table_name`` older than ``older_than_days`` days; return {day: rows}."""
+    if table_name not in archive_tables:
+        raise ValueError(f"unknown table: {table_name}")
+    # ---
+    # Today is never archived: it is still receiving rows
+    today = datetime.now(timezone.utc).date()
+    cutoff = min(today - timedelta(days=older_than_days), today - timedelta(days=1))
+    # ---
+    days = db.fetch_all(
+        f"SELECT DISTINCT date_only FROM {table_name} WHERE date_only <= ? ORDER BY date_only", [cutoff.isoformat()]
+    )
+    # ---
+    done = {}
+    # ---
+    for row in days:
+        day = row["date_only"]
+        if day and re.fullmatch(r"\d{4}-\d{2}-\d{2}", day):
+            done[day] = archive_day(table_name, day)
+    # ---
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old log days into compressed archive files.")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="archive days older than this")
+    parser.add_argument("--db-path", help="database file name in the databases directory (default: new_logs.db)")
+    parser.add_argument("--table", choices=archive_tables, action="append", help="default: all tables")
+    parser.add_argument("--vacuum", action="store_true", help="reclaim the freed pages afterwards")
+    args = parser.parse_args(argv)
+    # ---
+    if args.db_path:
+        db.change_db_path(args.db_path)
+    # ---
+    db.init_db()
+    # ---
+    for table_name in args.table or archive_tables:
+        done = archive_old_days(args.days, table_name=table_name)
+        print(f"{table_name}: archived {sum(done.values()):,} rows from {len(done):,} days")
+    # ---
+    if args.vacuum:
+        db.db_commit("VACUUM")
+
+
+if __name__ == "__main__":
+    main()
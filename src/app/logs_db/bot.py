@@ -4,51 +4,152 @@
 from .logs_db.bot import change_db_path, db_commit, init_db, fetch_all
 
 """
+import json
+import logging
 import re
+from datetime import date, datetime, timezone
 
 try:
+    from .archive import load_archived_rows
     from .db import change_db_path as _change_db_path
-    from .db import db_commit, fetch_all, init_db
+    from .db import db_commit, db_commit_many, fetch_all, init_db
+    from .writer import queue_log
 except ImportError:
+    from archive import load_archived_rows
     from db import change_db_path as _change_db_path
-    from db import db_commit, fetch_all, init_db
+    from db import db_commit, db_commit_many, fetch_all, init_db
+    from writer import queue_log
+
+logger = logging.getLogger(__name__)
+
+day_pattern = r"\d{4}-\d{2}-\d{2}"
+month_pattern = r"\d{4}-(0[1-9]|1[0-2])"
 
 
 def change_db_path(file):
     return _change_db_path(file)
 
 
+log_request_query = """
+    INSERT INTO {table_name} (
+        endpoint, request_data, response_status, response_time, date_only
+        )
+    VALUES (?, ?, ?, ?, DATE('now'))
+    ON CONFLICT(request_data, response_status, date_only) DO UPDATE SET
+        response_count = response_count + 1,
+        response_time = excluded.response_time,
+        timestamp = CURRENT_TIMESTAMP
+"""
+
+
+# Batch endpoints log to list_logs
+list_endpoints = ("/api/list", "/api/batch")
+
+
+def log_table(endpoint):
+    return "list_logs" if endpoint in list_endpoints else "logs"
+
+
 def log_request(endpoint, request_data, response_status, response_time):
     # ---
-    response_time = round(response_time, 3)
+    row = (endpoint, str(request_data), str(response_status), round(response_time, 3))
     # ---
-    response_status = str(response_status)
+    # Under ASGI a writer thread takes it (see writer.py); True means queued
+    if queue_log(row):
+        return True
     # ---
-    table_name = "logs" if endpoint != "/api/list" else "list_logs"
+    result = db_commit(log_request_query.format(table_name=log_table(endpoint)), row)
     # ---
-    result = db_commit(
-        f"""
-        INSERT INTO {table_name} (
-            endpoint, request_data, response_status, response_time, date_only
-            )
-        VALUES (?, ?, ?, ?, DATE('now'))
-        ON CONFLICT(request_data, response_status, date_only) DO UPDATE SET
-            response_count = response_count + 1,
-            response_time = excluded.response_time,
-            timestamp = CURRENT_TIMESTAMP
-    """,
-        (endpoint, str(request_data), response_status, response_time),
-    )
+    if result is not True:
+        logger.error("Error logging request: %s", result)
+        if "no such table" in str(result):
+            init_db()
+    # ---
+    return result
+
+
+def write_logs(rows):
+    """Write the rows of several log_request calls in one transaction."""
+    by_table = {}
+    # ---
+    for row in rows:
+        by_table.setdefault(log_table(row[0]), []).append(row)
+    # ---
+    result = db_commit_many([(log_request_query.format(table_name=table), items) for table, items in by_table.items()])
     # ---
     if result is not True:
-        print(f"Error logging request: {result}")
+        logger.error("Error logging %d requests: %s", len(rows), result)
         if "no such table" in str(result):
             init_db()
     # ---
     return result
 
 
-def add_status(query, params, status="", like="", day=""):
+def month_bounds(month):
+    """Return the first day of ``month`` (YYYY-MM) and the first day of the month after it."""
+    year, number = (int(x) for x in month.split("-"))
+    # ---
+    start = date(year, number, 1)
+    end = date(year + 1, 1, 1) if number == 12 else date(year, number + 1, 1)
+    # ---
+    return start.isoformat(), end.isoformat()
+
+
+def current_month():
+    # DATE('now') in SQLite is UTC
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+def add_date_range(added, params, day="", date_from="", date_to=""):
+    # ---
+    # Plain comparisons on date_only, so the date_only index can be used
+    if day and re.match(day_pattern, day):
+        added.append("date_only = ?")
+        params.append(day)
+    # ---
+    elif day and re.fullmatch(month_pattern, day):
+        start, end = month_bounds(day)
+        added.append("date_only >= ? AND date_only < ?")
+        params.extend([start, end])
+    # ---
+    if date_from and re.fullmatch(day_pattern, date_from):
+        added.append("date_only >= ?")
+        params.append(date_from)
+    # ---
+    if date_to and re.fullmatch(day_pattern, date_to):
+        added.append("date_only <= ?")
+        params.append(date_to)
+    # ---
+    return added, params
+
+
+def title_prefixes(search):
+    """Title prefixes to look up for a search box value, in both spellings and with or without "Category:"."""
+    prefixes = {search.replace("_", " "), search.replace(" ", "_")}
+    # ---
+    if ":" not in search:
+        prefixes |= {f"Category:{prefix}" for prefix in prefixes}
+    # ---
+    return sorted(prefixes)
+
+
+def add_search(added, params, search=""):
+    # ---
+    # Ranges on request_data (the leading column of the UNIQUE index), not LIKE '%...%',
+    # so a search reads only the matching rows
+    if search:
+        ranges = []
+        # ---
+        for prefix in title_prefixes(search):
+            ranges.append("(request_data >= ? AND request_data < ?)")
+            params.extend([prefix, prefix + "\U0010ffff"])
+        # ---
+        added.append("(" + " OR ".join(ranges) + ")")
+    # ---
+    return added, params
+
+
+def add_status(query, params, status="", like="", day="", date_from="", date_to="", search=""):
     # ---
     if not isinstance(params, list):
         params = list(params)
@@ -65,12 +166,10 @@ def add_status(query, params, status="", like="", day=""):
         added.append("response_status like ?")
         params.append(like)
     # ---
-    # 2025-04-23
-    pattern = r"\d{4}-\d{2}-\d{2}"
+    # 2025-04-23, 2025-04
+    added, params = add_date_range(added, params, day=day, date_from=date_from, date_to=date_to)
     # ---
-    if day and re.match(pattern, day):
-        added.append("date_only = ?")
-        params.append(day)
+    added, params = add_search(added, params, search=search)
     # ---
     if added:
         query += " WHERE " + " AND ".join(added)
@@ -90,7 +189,7 @@ def sum_response_count(status="", table_name="logs", like=""):
     # ---
     result = fetch_all(query, params, fetch_one=True)
     # ---
-    print("result", result)
+    logger.debug("sum_response_count: %s", result)
     # ---
     result = result["count_all"] or 0
     # ---
@@ -99,22 +198,50 @@ def sum_response_count(status="", table_name="logs", like=""):
 
 def get_response_status(table_name="logs"):
     # ---
-    query = f"select response_status, count(response_status) as numbers from {table_name} group by response_status having count(*) > 2"
+    # status_catalogue is maintained by a trigger on every new row (see db.init_db)
+    query = "select status_group from status_catalogue where table_name = ? and numbers > 2 order by numbers desc"
     # ---
-    result = fetch_all(query, ())
+    result = fetch_all(query, (table_name,))
     # ---
-    result = [row["response_status"] for row in result]
+    if not result:
+        # catalogue not created yet in this database: fall back to scanning the table
+        query = f"""
+            select
+                CASE WHEN response_status LIKE 'تصنيف%' THEN 'Category' ELSE response_status END AS status_group,
+                count(*) as numbers
+            from {table_name}
+            group by status_group
+            having count(*) > 2
+            order by numbers desc
+        """
+        result = fetch_all(query, ())
+    # ---
+    result = [row["status_group"] for row in result]
     # ---
     return result
 
 
-def count_all(status="", table_name="logs", like=""):
+def count_catalogued(status="", table_name="logs"):
+    """
+    Rows of ``table_name``, or of the status group ``status``, from status_catalogue
+    instead of a COUNT(*) over the table; None when the catalogue has no rows for it.
+    """
+    # ---
+    rows = fetch_all("select status_group, numbers from status_catalogue where table_name = ?", (table_name,))
+    # ---
+    if not rows:
+        return None
+    # ---
+    return sum(row["numbers"] for row in rows if not status or row["status_group"] == status)
+
+
+def count_all(status="", table_name="logs", like="", day="", search=""):
     # ---
     query = f"SELECT COUNT(*) FROM {table_name}"
     # ---
     params = []
     # ---
-    query, params = add_status(query, params, status=status, like=like)
+    query, params = add_status(query, params, status=status, like=like, day=day, search=search)
     # ---
     result = fetch_all(query, params, fetch_one=True)
     # ---
@@ -129,7 +256,9 @@ def count_all(status="", table_name="logs", like=""):
     return total_logs
 
 
-def get_logs(per_page=10, offset=0, order="DESC", order_by="timestamp", status="", table_name="logs", like="", day=""):
+def get_logs(
+    per_page=10, offset=0, order="DESC", order_by="timestamp", status="", table_name="logs", like="", day="", search=""
+):
     # ---
     if order not in ["ASC", "DESC"]:
         order = "DESC"
@@ -138,9 +267,12 @@ def get_logs(per_page=10, offset=0, order="DESC", order_by="timestamp", status="
     # ---
     params = []
     # ---
-    query, params = add_status(query, params, status=status, like=like, day=day)
+    query, params = add_status(query, params, status=status, like=like, day=day, search=search)
     # ---
-    query += f"ORDER BY {order_by} {order} LIMIT ? OFFSET ?"
+    # id breaks the ties, so rows don't move between pages; the sort indexes end with the rowid
+    tie = f", id {order}" if order_by != "id" else ""
+    # ---
+    query += f" ORDER BY {order_by} {order}{tie} LIMIT ? OFFSET ?"
     # ---
     # {'id': 1, 'endpoint': 'api', 'request_data': 'Category:1934-35 in Bulgarian football', 'response_status': 'true', 'response_time': 123123.0, 'response_count': 6, 'timestamp': '2025-04-10 01:08:58'}
     # ---
@@ -171,36 +303,191 @@ def fetch_logs_by_date(table_name="logs"):
     # ---
     result = fetch_all(query_by_day, ())
     # ---
-    return result
+    # Days moved to the archive files keep their summary in archived_days
+    archived = fetch_all(
+        "SELECT date_only, status_group, title_count, count FROM archived_days WHERE table_name = ? ORDER BY date_only",
+        [table_name],
+    )
+    # ---
+    return archived + result
 
 
-def all_logs_en2ar(day=None):
+def get_no_result_titles(day="", limit=0, table_name="logs"):
     # ---
-    query_by_day = """
-        SELECT request_data, response_status
-        FROM logs
+    query = f"SELECT request_data, sum(response_count) AS numbers FROM {table_name}"
+    # ---
+    query, params = add_status(query, [], status="no_result", day=day or "")
+    # ---
+    query += " GROUP BY request_data ORDER BY numbers DESC"
+    # ---
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    # ---
+    result = fetch_all(query, params)
+    # ---
+    return [row["request_data"] for row in result]
+
+
+def get_latest_results(limit=0, table_name="logs"):
+    # ---
+    # SQLite returns the bare columns from the row holding max(timestamp),
+    # so each title comes with its most recent label and response time.
+    query = f"""
+        SELECT request_data, response_status, response_time, max(timestamp) AS timestamp
+        FROM {table_name}
+        WHERE response_status = 'no_result' OR response_status LIKE 'تصنيف%'
+        GROUP BY request_data
+        ORDER BY request_data
     """
     # ---
     params = []
     # ---
-    if day:
-        if re.match(r"\d{4}-\d{2}-\d{2}", day):
-            query_by_day += " \n where date_only = ? \n "
-            params.append(day)
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    # ---
+    return fetch_all(query, params)
+
+
+def get_month_snapshot(month):
+    # ---
+    row = fetch_all("SELECT data FROM month_snapshots WHERE month = ?", [month], fetch_one=True)
+    # ---
+    return json.loads(row["data"]) if row else None
+
+
+def save_month_snapshot(month, data):
+    # ---
+    return db_commit(
+        "INSERT OR REPLACE INTO month_snapshots (month, data) VALUES (?, ?)",
+        [month, json.dumps(data, ensure_ascii=False)],
+    )
 
-        elif re.match(r"\d{4}-\d{2}", day):
-            query_by_day += " \n where strftime('%Y-%m', date_only) = ? \n "
-            params.append(day)
+
+def all_logs_en2ar(day=None, date_from="", date_to=""):
+    # ---
+    # Closed months can't get new rows (date_only is always today), so they are computed once
+    closed_month = (
+        day and re.fullmatch(month_pattern, day) and day < current_month() and not date_from and not date_to
+    )
+    # ---
+    if closed_month:
+        snapshot = get_month_snapshot(day)
+        if snapshot is not None:
+            return snapshot
+    # ---
+    query_by_day = """
+        SELECT request_data, response_status
+        FROM logs
+    """
+    # ---
+    query_by_day, params = add_status(query_by_day, [], day=day or "", date_from=date_from, date_to=date_to)
     # ---
     query_by_day += """
         GROUP BY request_data, response_status
         ORDER BY request_data;
     """
     # ---
-    print(query_by_day, day)
+    logger.debug("all_logs_en2ar: day=%s %s", day, query_by_day)
     # ---
     data = fetch_all(query_by_day, params)
     # ---
     result = {x["request_data"]: x["response_status"] for x in data}
     # ---
+    archive_day = day if day and (re.match(day_pattern, day) or re.fullmatch(month_pattern, day)) else ""
+    # ---
+    # The archive files are only read for a day, a month or a range, not for all of them
+    archived = []
+    # ---
+    if archive_day or date_from or date_to:
+        archived = load_archived_rows("logs", day=archive_day[:10], date_from=date_from, date_to=date_to)
+    # ---
+    if archived:
+        # rows still in the table are newer than the archived ones; the archived rows
+        # come oldest first, so they are merged newest first for the latest label to win
+        for row in reversed(archived):
+            result.setdefault(row["request_data"], row["response_status"])
+        # ---
+        result = dict(sorted(result.items()))
+    # ---
+    if closed_month:
+        save_month_snapshot(day, result)
+    # ---
     return result
+
+
+slow_order_by_types = ["id", "timestamp", "endpoint", "batch_size", "status_code", "duration"]
+
+
+def log_slow_request(endpoint, request_data, batch_size, status_code, duration, phases, user_agent):
+    # ---
+    return db_commit(
+        """
+        INSERT INTO slow_requests (endpoint, request_data, batch_size, status_code, duration, phases, user_agent)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            endpoint,
+            request_data,
+            batch_size,
+            status_code,
+            round(duration, 6),
+            json.dumps(phases, ensure_ascii=False),
+            user_agent,
+        ),
+    )
+
+
+def get_slow_requests(per_page=50, offset=0, order="DESC", order_by="duration", endpoint=""):
+    # ---
+    if order not in ["ASC", "DESC"]:
+        order = "DESC"
+    # ---
+    if order_by not in slow_order_by_types:
+        order_by = "duration"
+    # ---
+    query = "SELECT * FROM slow_requests "
+    params = []
+    # ---
+    if endpoint:
+        query += "WHERE endpoint = ? "
+        params.append(endpoint)
+    # ---
+    query += f"ORDER BY {order_by} {order}, id DESC LIMIT ? OFFSET ?"
+    params.extend([per_page, offset])
+    # ---
+    rows = fetch_all(query, params)
+    # ---
+    for row in rows:
+        row["phases"] = json.loads(row["phases"]) if row["phases"] else {}
+    # ---
+    return rows
+
+
+def count_slow_requests(endpoint=""):
+    # ---
+    query = "SELECT COUNT(*) AS count FROM slow_requests"
+    params = []
+    # ---
+    if endpoint:
+        query += " WHERE endpoint = ?"
+        params.append(endpoint)
+    # ---
+    row = fetch_all(query, params, fetch_one=True)
+    # ---
+    return row["count"] if row else 0
+
+
+def get_latency_histogram(endpoint=""):
+    # ---
+    query = "SELECT date_only, endpoint, bucket, hits, max_time FROM latency_histogram"
+    params = []
+    # ---
+    if endpoint:
+        query += " WHERE endpoint = ?"
+        params.append(endpoint)
+    # ---
+    query += " ORDER BY date_only, endpoint, bucket"
+    # ---
+    return fetch_all(query, params)
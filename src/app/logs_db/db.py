@@ -4,10 +4,16 @@
 from .db import change_db_path, db_commit, init_db, fetch_all
 
 """
+import logging
 import os
 import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 HOME = os.getenv("HOME")
 main_path = Path(HOME + "/www/python/dbs") if HOME else Path(__file__).parent.parent.parent
 
@@ -16,6 +22,101 @@ if not main_path.exists():
 
 db_path_main = {1: f"{str(main_path)}/new_logs.db"}
 
+# SQLite VM instructions between two checks of the query budget
+PROGRESS_STEPS = 10_000
+
+# Deadline (time.monotonic()) for the reads of the current request, set by query_budget()
+_query_deadline = ContextVar("query_deadline", default=None)
+
+
+class QueryTooExpensive(Exception):
+    """A read query ran past the time budget of the request."""
+
+
+# Counts rows per status group ('تصنيف...' labels collapse into 'Category'), kept up
+# to date by an AFTER INSERT trigger so /api/status never has to scan the logs tables.
+# The upsert in log_request fires the trigger only when a new row is created.
+# The first run backfills the counts from the existing rows, in the same transaction.
+status_catalogue_script = """
+    BEGIN IMMEDIATE;
+    CREATE TABLE IF NOT EXISTS status_catalogue (
+        table_name TEXT NOT NULL,
+        status_group TEXT NOT NULL,
+        numbers INTEGER DEFAULT 0,
+        PRIMARY KEY (table_name, status_group)
+    );
+    {tables}
+    COMMIT;
+"""
+
+status_catalogue_table_script = """
+    INSERT INTO status_catalogue (table_name, status_group, numbers)
+        SELECT '{table_name}', CASE WHEN response_status LIKE 'تصنيف%' THEN 'Category' ELSE response_status END AS status_group, count(*)
+        FROM {table_name}
+        WHERE NOT EXISTS (SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = '{table_name}_status_catalogue')
+        GROUP BY status_group
+        ON CONFLICT(table_name, status_group) DO UPDATE SET numbers = excluded.numbers;
+
+    CREATE TRIGGER IF NOT EXISTS {table_name}_status_catalogue AFTER INSERT ON {table_name}
+    BEGIN
+        INSERT INTO status_catalogue (table_name, status_group, numbers)
+        VALUES ('{table_name}', CASE WHEN NEW.response_status LIKE 'تصنيف%' THEN 'Category' ELSE NEW.response_status END, 1)
+        ON CONFLICT(table_name, status_group) DO UPDATE SET numbers = numbers + 1;
+    END;
+"""
+
+# Upper bounds (seconds) of the response time buckets in latency_histogram; the last bucket has no bound
+latency_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Looked up in the latency_buckets table: a CASE over all the bounds would make the four
+# triggers long, and every new connection (one per log_request) parses the whole schema.
+latency_bucket_expr = (
+    "COALESCE((SELECT min(bucket) FROM latency_buckets WHERE upper_bound >= NEW.response_time), "
+    f"{len(latency_buckets)})"
+)
+
+# Response time histogram per day and endpoint, one hit per logged request: a new row
+# (AFTER INSERT) or another hit on an existing row (the upsert in log_request updates response_count).
+latency_histogram_script = """
+    BEGIN IMMEDIATE;
+    CREATE TABLE IF NOT EXISTS latency_histogram (
+        date_only DATE NOT NULL,
+        endpoint TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        hits INTEGER DEFAULT 0,
+        max_time REAL DEFAULT 0,
+        PRIMARY KEY (date_only, endpoint, bucket)
+    );
+    CREATE TABLE IF NOT EXISTS latency_buckets (
+        bucket INTEGER PRIMARY KEY,
+        upper_bound REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS latency_buckets_upper_bound ON latency_buckets (upper_bound, bucket);
+    INSERT OR REPLACE INTO latency_buckets (bucket, upper_bound) VALUES {bounds};
+    {tables}
+    COMMIT;
+"""
+
+latency_histogram_table_script = """
+    CREATE TRIGGER IF NOT EXISTS {table_name}_latency_insert AFTER INSERT ON {table_name}
+    WHEN NEW.response_time IS NOT NULL
+    BEGIN
+        INSERT INTO latency_histogram (date_only, endpoint, bucket, hits, max_time)
+        VALUES (NEW.date_only, NEW.endpoint, {bucket}, 1, NEW.response_time)
+        ON CONFLICT(date_only, endpoint, bucket) DO UPDATE SET
+            hits = hits + 1, max_time = max(max_time, excluded.max_time);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS {table_name}_latency_update AFTER UPDATE OF response_count ON {table_name}
+    WHEN NEW.response_time IS NOT NULL AND NEW.response_count > OLD.response_count
+    BEGIN
+        INSERT INTO latency_histogram (date_only, endpoint, bucket, hits, max_time)
+        VALUES (NEW.date_only, NEW.endpoint, {bucket}, 1, NEW.response_time)
+        ON CONFLICT(date_only, endpoint, bucket) DO UPDATE SET
+            hits = hits + 1, max_time = max(max_time, excluded.max_time);
+    END;
+"""
+
 
 def change_db_path(file):
     # ---
@@ -41,7 +142,32 @@ def db_commit(query, params=[]):
         return True
 
     except sqlite3.Error as e:
-        print(f"init_db Database error: {e}")
+        logger.error("db_commit Database error: %s", e)
+        return e
+
+
+def db_commit_many(statements):
+    """Run ``(query, rows)`` pairs with executemany, all in one transaction."""
+    try:
+        with sqlite3.connect(db_path_main[1]) as conn:
+            for query, rows in statements:
+                conn.executemany(query, rows)
+        conn.commit()
+        return True
+
+    except sqlite3.Error as e:
+        logger.error("db_commit_many Database error: %s", e)
+        return e
+
+
+def db_executescript(script):
+    try:
+        with sqlite3.connect(db_path_main[1]) as conn:
+            conn.executescript(script)
+        return True
+
+    except sqlite3.Error as e:
+        logger.error("db_executescript Database error: %s", e)
         return e
 
 
@@ -76,10 +202,94 @@ def init_db():
         """
     db_commit(query)
 
+    query = """
+        CREATE TABLE IF NOT EXISTS month_snapshots (
+            month TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+    db_commit(query)
+
+    # Per-day summaries of the days moved out by archive.py, for fetch_logs_by_date
+    query = """
+        CREATE TABLE IF NOT EXISTS archived_days (
+            table_name TEXT NOT NULL,
+            date_only DATE NOT NULL,
+            status_group TEXT NOT NULL,
+            title_count INTEGER DEFAULT 0,
+            count INTEGER DEFAULT 0,
+            PRIMARY KEY (table_name, date_only, status_group)
+        );
+        """
+    db_commit(query)
+
+    # Requests slower than SLOW_REQUEST_SECONDS, one row each (logs keeps only the last response_time)
+    query = """
+        CREATE TABLE IF NOT EXISTS slow_requests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            endpoint TEXT NOT NULL,
+            request_data TEXT,
+            batch_size INTEGER DEFAULT 1,
+            status_code INTEGER,
+            duration REAL NOT NULL,
+            phases TEXT,
+            user_agent TEXT
+        );
+        """
+    db_commit(query)
+    db_commit("CREATE INDEX IF NOT EXISTS slow_requests_duration ON slow_requests (duration)")
+
+    # Range filters on date_only (days, months, from/to); the extra columns make it covering for all_logs_en2ar
+    for table_name in ["logs", "list_logs"]:
+        db_commit(
+            f"CREATE INDEX IF NOT EXISTS {table_name}_date_only ON {table_name} (date_only, request_data, response_status)"
+        )
+        # Sorts of the paged log views (/api/logs, DataTables server-side), with and without a status filter
+        db_commit(f"CREATE INDEX IF NOT EXISTS {table_name}_response_count ON {table_name} (response_count)")
+        db_commit(f"CREATE INDEX IF NOT EXISTS {table_name}_timestamp ON {table_name} (timestamp)")
+        db_commit(
+            f"CREATE INDEX IF NOT EXISTS {table_name}_status_count ON {table_name} (response_status, response_count)"
+        )
+
+    tables = "".join(status_catalogue_table_script.format(table_name=name) for name in ["logs", "list_logs"])
+    db_executescript(status_catalogue_script.format(tables=tables))
+
+    tables = "".join(
+        latency_histogram_table_script.format(table_name=name, bucket=latency_bucket_expr)
+        for name in ["logs", "list_logs"]
+    )
+    bounds = ", ".join(f"({i}, {bound})" for i, bound in enumerate(latency_buckets))
+    db_executescript(latency_histogram_script.format(tables=tables, bounds=bounds))
+
+
+@contextmanager
+def query_budget(seconds):
+    """Abort the fetch_all reads made inside this block once ``seconds`` have passed in total."""
+    deadline = time.monotonic() + seconds
+    current = _query_deadline.get()
+    # ---
+    # A nested budget can't extend the outer one
+    token = _query_deadline.set(deadline if current is None else min(current, deadline))
+    # ---
+    try:
+        yield
+    finally:
+        _query_deadline.reset(token)
+
 
 def fetch_all(query, params=[], fetch_one=False):
+    deadline = _query_deadline.get()
+    # ---
+    if deadline is not None and time.monotonic() > deadline:
+        raise QueryTooExpensive("time budget used up before the query started")
+    # ---
     try:
         with sqlite3.connect(db_path_main[1]) as conn:
+            if deadline is not None:
+                # A true return value interrupts the statement
+                conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_STEPS)
             # Set row factory to return rows as dictionaries
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
@@ -96,7 +306,9 @@ def fetch_all(query, params=[], fetch_one=False):
                 logs = [dict(row) for row in rows]  # Convert all rows to dictionaries
 
     except sqlite3.Error as e:
-        print(f"Database error in view_logs: {e}")
+        if deadline is not None and time.monotonic() > deadline:
+            raise QueryTooExpensive(str(e)) from e
+        logger.error("fetch_all Database error: %s", e)
         if "no such table" in str(e):
             init_db()
         logs = []
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Write the request logs from one background thread, in batches.
+
+Started by the ASGI entry point (``src/asgi.py``): ``log_request`` then only queues the
+row and the request goes on, instead of waiting for the SQLite write lock. The thread
+writes whatever has queued up in one transaction (``write_logs``). When the queue is
+full, or no writer is running (WSGI), ``log_request`` writes the row itself.
+"""
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Rows written in one transaction at most
+MAX_BATCH = 500
+
+# Rows waiting at most; beyond that the request threads write themselves
+MAX_QUEUE = 10_000
+
+_STOP = object()
+
+
+class LogWriter:
+    def __init__(self, write, max_batch=MAX_BATCH, max_queue=MAX_QUEUE):
+        self.write = write
+        self.max_batch = max_batch
+        self.queue = queue.Queue(maxsize=max_queue)
+        # Set by stop(); _STOP may not fit in a full queue
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="log-writer", daemon=True)
+
+    def put(self, row):
+        try:
+            self.queue.put_nowait(row)
+            return True
+        except queue.Full:
+            return False
+
+    def run(self):
+        stopping = False
+        # ---
+        while not stopping:
+            rows = [self.queue.get()]
+            # ---
+            while len(rows) < self.max_batch:
+                try:
+                    rows.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            # ---
+            if any(row is _STOP for row in rows):
+                stopping = True
+                rows = [row for row in rows if row is not _STOP]
+            # ---
+            if rows:
+                try:
+                    self.write(rows)
+                except Exception:
+                    logger.exception("log writer: %d rows lost", len(rows))
+            # ---
+            if self.stopping.is_set() and self.queue.empty():
+                stopping = True
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self, timeout=10):
+        """Write the queued rows, then end the thread; waits ``timeout`` seconds at most."""
+        deadline = time.monotonic() + timeout
+        # ---
+        # Before _STOP: with a full queue the thread ends once it has emptied it
+        self.stopping.set()
+        # ---
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("log writer: queue still full at shutdown, %d rows waiting", self.queue.qsize())
+        # ---
+        self.thread.join(max(0, deadline - time.monotonic()))
+
+
+_writer = None
+
+
+def queue_log(row):
+    """Queue a log row for the writer thread; False when there is none or it is full."""
+    writer = _writer
+    # ---
+    return writer is not None and writer.put(row)
+
+
+def start_log_writer(write=None):
+    global _writer
+    # ---
+    if _writer is not None:
+        return _writer
+    # ---
+    if write is None:
+        from .bot import write_logs as write
+    # ---
+    _writer = LogWriter(write)
+    _writer.start()
+    # ---
+    return _writer
+
+
+def stop_log_writer():
+    global _writer
+    # ---
+    writer, _writer = _writer, None
+    # ---
+    if writer is not None:
+        writer.stop()
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Prometheus metrics, served at ``/metrics``.
+
+With several WSGI worker processes, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty
+directory before the workers start: every process then writes its values to
+files there, and ``/metrics`` adds them up across processes.
+"""
+import logging
+import os
+import time
+
+from flask import Response, g, request
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram
+    from prometheus_client import generate_latest, multiprocess
+except ImportError:
+    CollectorRegistry = None
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000)
+
+if CollectorRegistry is not None:
+    REQUESTS = Counter(
+        "arwikicats_requests_total",
+        "HTTP requests by endpoint, method and status code.",
+        ["endpoint", "method", "status"],
+    )
+    ERRORS = Counter(
+        "arwikicats_request_errors_total",
+        "HTTP responses with a 4xx or 5xx status code.",
+        ["endpoint", "status"],
+    )
+    LATENCY = Histogram(
+        "arwikicats_request_duration_seconds",
+        "Request latency by endpoint.",
+        ["endpoint"],
+        buckets=LATENCY_BUCKETS,
+    )
+    RESOLVER_TIME = Histogram(
+        "arwikicats_resolver_duration_seconds",
+        "Time spent in ArWikiCats per request.",
+        ["endpoint"],
+        buckets=LATENCY_BUCKETS,
+    )
+    DB_WRITE_TIME = Histogram(
+        "arwikicats_db_write_duration_seconds",
+        "Time spent writing the request to the logs database.",
+        ["endpoint"],
+        buckets=LATENCY_BUCKETS,
+    )
+    BATCH_SIZE = Histogram(
+        "arwikicats_batch_size",
+        "Distinct titles per batch request.",
+        ["endpoint"],
+        buckets=BATCH_BUCKETS,
+    )
+    COALESCED = Counter(
+        "arwikicats_coalesced_titles_total",
+        "Titles whose resolution was shared with a concurrent request instead of run again.",
+        ["endpoint"],
+    )
+    RATE_LIMITED = Counter(
+        "arwikicats_rate_limited_total",
+        "Requests refused with 429 by the per-client rate limits.",
+        ["endpoint"],
+    )
+    QUERY_ABORTS = Counter(
+        "arwikicats_query_budget_aborts_total",
+        "Requests whose database reads were cancelled for running past their time budget.",
+        ["endpoint"],
+    )
+    IN_PROGRESS = Gauge(
+        "arwikicats_requests_in_progress",
+        "Requests being handled right now.",
+        multiprocess_mode="livesum",
+    )
+
+
+def enabled():
+    return CollectorRegistry is not None
+
+
+def endpoint_label():
+    # The URL rule, not the path, so titles don't become label values
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+def observe_batch(endpoint, size):
+    if enabled():
+        BATCH_SIZE.labels(endpoint=endpoint).observe(size)
+
+
+def observe_coalesced(endpoint, titles):
+    if enabled() and titles:
+        COALESCED.labels(endpoint=endpoint).inc(titles)
+
+
+def observe_rate_limited(endpoint):
+    if enabled():
+        RATE_LIMITED.labels(endpoint=endpoint).inc()
+
+
+def observe_query_abort(endpoint):
+    if enabled():
+        QUERY_ABORTS.labels(endpoint=endpoint).inc()
+
+
+def before_request():
+    g.metrics_start = time.perf_counter()
+    IN_PROGRESS.inc()
+
+
+def after_request(response):
+    endpoint = endpoint_label()
+    status = str(response.status_code)
+    # ---
+    REQUESTS.labels(endpoint=endpoint, method=request.method, status=status).inc()
+    # ---
+    if response.status_code >= 400:
+        ERRORS.labels(endpoint=endpoint, status=status).inc()
+    # ---
+    LATENCY.labels(endpoint=endpoint).observe(time.perf_counter() - g.get("metrics_start", time.perf_counter()))
+    # ---
+    # Phases recorded by app.timing on API requests
+    timer = g.get("timer")
+    # ---
+    if timer is not None:
+        if "resolve" in timer.phases:
+            RESOLVER_TIME.labels(endpoint=endpoint).observe(timer.phases["resolve"])
+        # ---
+        if "log" in timer.phases:
+            DB_WRITE_TIME.labels(endpoint=endpoint).observe(timer.phases["log"])
+    # ---
+    return response
+
+
+def teardown_request(exc=None):
+    if g.pop("metrics_start", None) is not None:
+        IN_PROGRESS.dec()
+
+
+def metrics_view():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    # ---
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead():
+    # The in-progress gauge of this worker would otherwise stay in the sum
+    multiprocess.mark_process_dead(os.getpid())
+
+
+def init_uwsgi_exit():
+    """
+    uWSGI has no ``child_exit`` hook like gunicorn's: each worker marks itself dead
+    on exit. A worker killed by ``harakiri`` or a signal leaves its gauge file until
+    the next start clears the directory.
+    """
+    try:
+        import uwsgi  # type: ignore
+    except ImportError:
+        return
+    # ---
+    # Set in the master before the fork (lazy-apps = false), so every worker has it
+    uwsgi.atexit = mark_process_dead
+
+
+def init_metrics(app):
+    if not enabled():
+        logger.warning("prometheus_client is not installed, /metrics is disabled")
+        return
+    # ---
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        init_uwsgi_exit()
+    # ---
+    app.before_request(before_request)
+    app.after_request(after_request)
+    app.teardown_request(teardown_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
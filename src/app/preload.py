@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Build the ArWikiCats tables in the WSGI master, before it forks the workers.
+
+Importing ArWikiCats builds part of its label tables; most of the rest is built on the
+first titles that need them (about 2 seconds). ``preload_resolver`` resolves
+``WARMUP_TITLES`` in the master so the workers are forked with the tables built and
+share those pages copy-on-write, instead of each building its own copy.
+
+A collection in a worker writes to the GC header of every tracked object it visits,
+which copies the shared pages one by one; ``gc.freeze()`` moves everything allocated so
+far to the permanent generation, which collections skip. Disabling the GC before the
+imports (as ``app.py`` and ``gunicorn.conf.py`` do) keeps collections in the master
+from leaving freed holes in those pages. Reference counts still dirty the pages of
+the objects a worker actually touches.
+
+``PRELOAD_RESOLVER=1`` enables it for ``app.py`` (set in uwsgi.ini); gunicorn.conf.py
+enables it unless ``PRELOAD_RESOLVER=0``. ``benchmarks/memory.py`` reports the shared
+and unique memory of each worker.
+"""
+import gc
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# One or two titles per resolver family, enough to build the lazily loaded tables
+WARMUP_TITLES = [
+    "Category:1990 births",
+    "Category:1990 deaths",
+    "Category:Sportspeople from Yemen",
+    "Category:2010 establishments in Egypt",
+    "Category:1980s disestablishments in Iraq",
+    "Category:Yemeni footballers",
+    "Category:Egyptian women writers",
+    "Category:French male actors",
+    "Category:20th-century Brazilian painters",
+    "Category:21st-century Saudi Arabian women politicians",
+    "Category:2000s in Japan",
+    "Category:2014 in American football",
+    "Category:Football clubs in Kenya",
+    "Category:Women's football in Italy",
+    "Category:Olympic medalists for Peru",
+    "Category:American expatriate basketball people in Spain",
+    "Category:Norwegian films",
+    "Category:1995 films",
+    "Category:English-language films",
+    "Category:Spanish-language television",
+    "Category:People by nationality",
+    "Category:Muslims",
+    "Category:Universities in India",
+    "Category:Rivers of Canada",
+    "Category:Cities in California",
+    "Category:Airports in Germany",
+    "Category:Ministers of Foreign Affairs of Egypt",
+    "Category:Members of the Parliament of Yemen",
+    "Category:Canada–France relations",
+    "Category:Sport in Morocco by year",
+]
+
+
+def preload_resolver(titles=None):
+    """Import ArWikiCats, resolve the warmup titles, then freeze the heap for the forks."""
+    from .resolver import ResolverUnavailable, load_resolver
+    from .routes import api
+
+    start = time.perf_counter()
+    resolved = 0
+    # ---
+    try:
+        load_resolver()
+    except ResolverUnavailable:
+        logger.warning("preload: ArWikiCats is not installed")
+    else:
+        for title in titles or WARMUP_TITLES:
+            try:
+                api.resolve_arabic_category_label(title)
+                resolved += 1
+            except Exception:
+                logger.exception("preload: failed to resolve %s", title)
+    # ---
+    gc.freeze()
+    gc.enable()
+    # ---
+    seconds = time.perf_counter() - start
+    frozen = gc.get_freeze_count()
+    # ---
+    logger.info("preload: resolved %d titles in %.2fs, %d objects frozen", resolved, seconds, frozen)
+    # ---
+    return {"titles": resolved, "seconds": seconds, "frozen": frozen}
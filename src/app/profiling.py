@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+On-demand request profiling with cProfile.
+
+Disabled unless one of these is set when the app is created:
+    PROFILE_TOKEN        profile a request sent with ``?profile=1&token=<token>``
+                         (or the ``X-Profile-Token`` header); also gates the ``/profiles`` pages
+    PROFILE_SAMPLE_RATE  profile 1 in N API requests of each worker process
+
+Each profile is written to ``<main_path>/profiles`` as a ``.prof`` file (for
+``snakeviz`` or ``pstats``) and a ``.json`` summary of the slowest functions.
+"""
+import hmac
+import itertools
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import current_app, g, request
+
+from .logs_db import db
+
+logger = logging.getLogger(__name__)
+
+TOP_FUNCTIONS = 30
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+
+_sample_counter = itertools.count(1)
+
+
+def profiles_dir():
+    return db.main_path / "profiles"
+
+
+def valid_token(value):
+    token = current_app.config.get("PROFILE_TOKEN")
+    # ---
+    return bool(token and value) and hmac.compare_digest(token.encode("utf-8"), value.encode("utf-8"))
+
+
+def request_token():
+    return request.headers.get("X-Profile-Token") or request.args.get("token", "")
+
+
+def should_profile():
+    """Return "requested", "sampled" or "" for the current request."""
+    if request.args.get("profile") == "1" and valid_token(request_token()):
+        return "requested"
+    # ---
+    sample_rate = current_app.config.get("PROFILE_SAMPLE_RATE", 0)
+    # ---
+    if sample_rate and request.blueprint == "api" and next(_sample_counter) % sample_rate == 0:
+        return "sampled"
+    # ---
+    return ""
+
+
+def top_functions(profiler, limit=TOP_FUNCTIONS):
+    import pstats
+
+    stats = pstats.Stats(profiler)
+    rows = []
+    # ---
+    for (filename, line, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append(
+            {
+                "function": f"{filename}:{line}({name})",
+                "ncalls": ncalls,
+                "tottime": round(tottime, 6),
+                "cumtime": round(cumtime, 6),
+            }
+        )
+    # ---
+    rows.sort(key=lambda row: row["cumtime"], reverse=True)
+    # ---
+    return rows[:limit]
+
+
+def prune_profiles(keep=PROFILE_KEEP):
+    summaries = sorted(profiles_dir().glob("*.json"))
+    # ---
+    for path in summaries[: max(0, len(summaries) - keep)]:
+        path.unlink(missing_ok=True)
+        path.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def save_profile(profiler, reason, status, duration):
+    folder = profiles_dir()
+    folder.mkdir(parents=True, exist_ok=True)
+    # ---
+    now = datetime.now(timezone.utc)
+    endpoint = request.url_rule.rule if request.url_rule else request.path
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", endpoint).strip("_") or "root"
+    name = f"{now:%Y%m%dT%H%M%S}-{slug}-{uuid.uuid4().hex[:6]}"
+    # ---
+    profiler.dump_stats(folder / f"{name}.prof")
+    # ---
+    summary = {
+        "name": name,
+        "created": now.isoformat(timespec="seconds"),
+        "reason": reason,
+        "method": request.method,
+        "endpoint": endpoint,
+        "path": request.path,
+        "query": {k: v for k, v in request.args.items() if k not in ("token", "profile")},
+        "status": status,
+        "duration": round(duration, 6),
+        "top": top_functions(profiler),
+    }
+    # ---
+    with open(folder / f"{name}.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=4)
+    # ---
+    prune_profiles()
+    # ---
+    return name
+
+
+def start_profile():
+    reason = should_profile()
+    # ---
+    if not reason:
+        return
+    # ---
+    # Imported here: most workers never profile, see benchmarks/startup.py
+    import cProfile
+
+    profiler = cProfile.Profile()
+    # ---
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active on this thread
+        return
+    # ---
+    g.profiler = profiler
+    g.profile_reason = reason
+    g.profile_start = time.perf_counter()
+
+
+def stop_profile(response):
+    profiler = g.pop("profiler", None)
+    # ---
+    if profiler is None:
+        return response
+    # ---
+    profiler.disable()
+    # ---
+    try:
+        name = save_profile(profiler, g.profile_reason, response.status_code, time.perf_counter() - g.profile_start)
+    except OSError as e:
+        logger.warning("could not save profile: %s", e)
+        return response
+    # ---
+    response.headers["X-Profile"] = name
+    # ---
+    return response
+
+
+def teardown_profile(exc=None):
+    # The request failed before after_request ran
+    profiler = g.pop("profiler", None)
+    # ---
+    if profiler is not None:
+        profiler.disable()
+
+
+def list_profiles():
+    folder = profiles_dir()
+    # ---
+    if not folder.exists():
+        return []
+    # ---
+    profiles = []
+    # ---
+    for path in sorted(folder.glob("*.json"), reverse=True):
+        try:
+            with open(path, encoding="utf-8") as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue
+        summary.pop("top", None)
+        profiles.append(summary)
+    # ---
+    return profiles
+
+
+def load_profile(name):
+    """Return the summary of profile ``name``, or None."""
+    if not re.fullmatch(r"[\w-]+", name):
+        return None
+    # ---
+    path = profiles_dir() / f"{name}.json"
+    # ---
+    if not path.exists():
+        return None
+    # ---
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def init_profiling(app):
+    app.config["PROFILE_TOKEN"] = os.getenv("PROFILE_TOKEN", "")
+    app.config["PROFILE_SAMPLE_RATE"] = int(os.getenv("PROFILE_SAMPLE_RATE", "0") or 0)
+    # ---
+    # No hooks at all when profiling is off
+    if not app.config["PROFILE_TOKEN"] and not app.config["PROFILE_SAMPLE_RATE"]:
+        return
+    # ---
+    app.before_request(start_profile)
+    app.after_request(stop_profile)
+    app.teardown_request(teardown_profile)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Time budgets for the database reads of the analytics endpoints.
+
+A view decorated with ``with_query_budget(seconds)`` has its ``fetch_all`` reads
+cancelled once they have run ``seconds`` in total, and the request fails with
+"query too expensive, narrow the filter" (HTTP 422) instead of holding the worker.
+``QUERY_BUDGET_SECONDS`` overrides every budget; ``0`` turns them off.
+"""
+import functools
+import json
+import logging
+import os
+
+from flask import Response, render_template, request
+
+from . import metrics
+from .logs_db import QueryTooExpensive, query_budget
+
+logger = logging.getLogger(__name__)
+
+# Budgets of the decorated views, in seconds
+PAGE_BUDGET = 3.0
+EXPORT_BUDGET = 10.0
+
+QUERY_TOO_EXPENSIVE = "query too expensive, narrow the filter"
+
+
+def budget_seconds(default):
+    value = os.getenv("QUERY_BUDGET_SECONDS")
+    # ---
+    return float(value) if value else default
+
+
+def with_query_budget(seconds):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            budget = budget_seconds(seconds)
+            # ---
+            if budget <= 0:
+                return view(*args, **kwargs)
+            # ---
+            with query_budget(budget):
+                return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def handle_query_too_expensive(e):
+    endpoint = request.url_rule.rule if request.url_rule else request.path
+    # ---
+    logger.warning("query budget exceeded on %s %s: %s", endpoint, request.query_string.decode("utf-8", "replace"), e)
+    metrics.observe_query_abort(endpoint)
+    # ---
+    if request.blueprint == "api":
+        return Response(
+            json.dumps({"error": QUERY_TOO_EXPENSIVE}, ensure_ascii=False, indent=4),
+            status=422,
+            content_type="application/json; charset=utf-8",
+        )
+    # ---
+    return render_template("error.html", title="Query too expensive", error=QUERY_TOO_EXPENSIVE), 422
+
+
+def init_query_budgets(app):
+    app.register_error_handler(QueryTooExpensive, handle_query_too_expensive)
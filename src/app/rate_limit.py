@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Token-bucket rate limits per client, shared by the workers of a host.
+
+Each client (its ``User-Agent``, and its IP address with ``RATE_LIMIT_BY_IP=1``) has
+one bucket for single lookups (``/api/<title>``) and one for the titles of batches
+(``/api/list``, ``/api/batch`` and ``/api/no_result/resolve``). A bucket holds up to ``burst`` tokens and refills at ``rate`` tokens
+per second; a lookup takes one token, a batch one per distinct title. A request that
+finds too few tokens gets ``429`` with ``Retry-After`` and is logged as
+``rate_limited``.
+
+The limits are ``rate/burst`` strings (``burst`` defaults to ``rate``), off unless set:
+
+    RATE_LIMIT_LOOKUPS=5/20            # 5 lookups a second, 20 at once
+    RATE_LIMIT_BATCH_TITLES=200/2000   # 200 batch titles a second, 2000 at once
+
+The address is the peer of the connection. Behind proxies, ``PROXY_HOPS`` (default 0,
+1 on Toolforge, set in ``uwsgi.ini``) is the number of trusted proxies that append to
+``X-Forwarded-For``, counted from the end of the header; the addresses before them are
+sent by the client and can be anything. Without proxies the header is ignored.
+
+The buckets are rows of a small SQLite database next to the logs database
+(``RATE_LIMIT_DB`` to move it), so every worker process sees the same state. Errors
+of that database let the request through.
+"""
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from flask import request
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from .logs_db.db import main_path
+
+logger = logging.getLogger(__name__)
+
+# Bucket rows not touched for this long are full again, and are deleted
+IDLE_SECONDS = 3600
+
+# A worker deletes the idle rows once in this many requests
+PRUNE_EVERY = 1000
+
+# The other workers hold the database lock for a few statements at most
+BUSY_TIMEOUT = 1.0
+
+
+def parse_limit(value):
+    """``"rate/burst"`` -> ``(rate, burst)``; None when empty or 0."""
+    if not value:
+        return None
+    # ---
+    rate, _, burst = value.partition("/")
+    rate = float(rate)
+    burst = float(burst) if burst else rate
+    # ---
+    if rate <= 0 or burst <= 0:
+        return None
+    # ---
+    return rate, burst
+
+
+LIMITS = {
+    "lookup": parse_limit(os.getenv("RATE_LIMIT_LOOKUPS", "")),
+    "batch": parse_limit(os.getenv("RATE_LIMIT_BATCH_TITLES", "")),
+}
+
+BY_IP = os.getenv("RATE_LIMIT_BY_IP", "0") == "1"
+
+PROXY_HOPS = int(os.getenv("PROXY_HOPS", "0") or 0)
+
+DB_PATH = os.getenv("RATE_LIMIT_DB") or str(main_path / "rate_limits.db")
+
+_calls = 0
+_calls_lock = threading.Lock()
+_created = set()
+
+
+def connect():
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT, isolation_level=None)
+    # ---
+    if DB_PATH not in _created:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        _created.add(DB_PATH)
+    # ---
+    return conn
+
+
+def take(keys, cost, rate, burst, now=None):
+    """
+    Take ``cost`` tokens from each of the buckets ``keys``, or from none of them.
+
+    Return 0 when taken, otherwise the seconds until they can be.
+    """
+    now = time.time() if now is None else now
+    # A batch larger than the burst goes through when the bucket is full
+    cost = min(cost, burst)
+    # ---
+    conn = connect()
+    # ---
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        # ---
+        placeholders = ", ".join("?" * len(keys))
+        query = f"SELECT key, min(?, tokens + (? - updated) * ?) FROM buckets WHERE key IN ({placeholders})"
+        rows = dict(conn.execute(query, [burst, now, rate, *keys]))
+        tokens = {key: rows.get(key, burst) for key in keys}
+        # ---
+        shortest = min(tokens.values())
+        # ---
+        if shortest < cost:
+            conn.execute("ROLLBACK")
+            return (cost - shortest) / rate
+        # ---
+        conn.executemany(
+            "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+            [(key, value - cost, now) for key, value in tokens.items()],
+        )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    # ---
+    return 0
+
+
+def prune(now=None):
+    now = time.time() if now is None else now
+    conn = connect()
+    # ---
+    try:
+        conn.execute("DELETE FROM buckets WHERE updated < ?", [now - IDLE_SECONDS])
+    finally:
+        conn.close()
+
+
+def client_keys(scope):
+    keys = [f"{scope}:ua:{request.headers.get('User-Agent', '')}"]
+    # ---
+    if BY_IP:
+        # Set from X-Forwarded-For by ProxyFix, see init_rate_limit
+        keys.append(f"{scope}:ip:{request.remote_addr}")
+    # ---
+    return keys
+
+
+def check_rate_limit(scope, cost=1):
+    """Return the seconds the client of the current request has to wait, 0 if none."""
+    global _calls
+    # ---
+    limit = LIMITS.get(scope)
+    # ---
+    if limit is None:
+        return 0
+    # ---
+    with _calls_lock:
+        _calls += 1
+        due = _calls % PRUNE_EVERY == 0
+    # ---
+    try:
+        if due:
+            prune()
+        # ---
+        return take(client_keys(scope), max(1, cost), *limit)
+    except sqlite3.Error as e:
+        logger.error("rate limit store error, request let through: %s", e)
+        return 0
+
+
+def retry_after(seconds):
+    """Retry-After value: whole seconds, at least 1."""
+    return str(max(1, math.ceil(seconds)))
+
+
+def init_rate_limit(app):
+    # remote_addr: the address appended by the last of PROXY_HOPS trusted proxies; with
+    # no proxy configured X-Forwarded-For comes from the client and is not read
+    if PROXY_HOPS > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS)
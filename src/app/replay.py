@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Replay the distinct logged titles through the installed ArWikiCats and compare
+the labels and latencies with a baseline.
+
+The baseline is either the labels recorded in the logs database, or the results
+file of a previous replay (``--baseline``). Latencies are only compared with a
+previous replay: the logged response time covers the whole request, not one
+resolver call.
+
+Usage (from ``src``):
+    python -m app.replay --output replay-new.jsonl
+    python -m app.replay --baseline replay-old.jsonl --output replay-new.jsonl
+"""
+import argparse
+import json
+import time
+
+from .bulk_resolve import chunked, default_workers, run_in_pool
+from .logs_db import change_db_path, get_latest_results
+from .resolver import lazy, load_resolver, resolver_version
+from .stats import latency_summary
+
+resolve_arabic_category_label = lazy("resolve_arabic_category_label")
+
+_warm = {"done": False}
+
+
+def time_chunk(titles):
+    """Resolve each title on its own, returning ``(title, label, seconds)`` tuples."""
+    # The resolver loads its tables on first use; keep that out of the first title's latency
+    if not _warm["done"]:
+        resolve_arabic_category_label("Category:Yemen")
+        _warm["done"] = True
+    # ---
+    results = []
+    # ---
+    for title in titles:
+        start_time = time.perf_counter()
+        label = resolve_arabic_category_label(title)
+        results.append((title, label or "", time.perf_counter() - start_time))
+    # ---
+    return results
+
+
+def load_baseline_from_logs(limit=0):
+    rows = get_latest_results(limit=limit)
+    # ---
+    # No "time": response_time includes Flask, the log write and the network
+    return {
+        row["request_data"]: {"label": "" if row["response_status"] == "no_result" else row["response_status"]}
+        for row in rows
+    }
+
+
+def load_results_file(path):
+    results = {}
+    # ---
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                results[row["title"]] = {"label": row["label"], "time": row["time"]}
+    # ---
+    return results
+
+
+def write_results_file(path, results):
+    # One sorted line per title, so two runs can be compared with diff
+    with open(path, "w", encoding="utf-8") as f:
+        for title in sorted(results):
+            row = {"title": title, "label": results[title]["label"], "time": round(results[title]["time"], 4)}
+            f.write(json.dumps(row, ensure_ascii=False, sort_keys=True) + "\n")
+
+
+def replay_titles(titles, workers=1, chunk_size=100):
+    # Raises ResolverUnavailable (a RuntimeError) here rather than in the workers, which
+    # inherit the imported module
+    load_resolver()
+    # ---
+    results = {}
+    # ---
+    for chunk in run_in_pool(time_chunk, chunked(titles, chunk_size), workers=workers):
+        for title, label, seconds in chunk:
+            results[title] = {"label": label, "time": seconds}
+    # ---
+    return results
+
+
+def compare_results(baseline, current, compare_latency=True):
+    """
+    Compare two ``{title: {"label", "time"}}`` maps over the titles they share.
+
+    Without ``compare_latency`` the baseline has no comparable times, and only the
+    current latencies are reported.
+    """
+    changed = {}
+    newly_resolved = {}
+    newly_broken = {}
+    # ---
+    shared = sorted(set(baseline) & set(current))
+    # ---
+    for title in shared:
+        old = baseline[title]["label"]
+        new = current[title]["label"]
+        # ---
+        if old == new:
+            continue
+        # ---
+        if not old:
+            newly_resolved[title] = new
+        elif not new:
+            newly_broken[title] = old
+        else:
+            changed[title] = {"old": old, "new": new}
+    # ---
+    latency = {"current": latency_summary([current[title]["time"] for title in shared])}
+    # ---
+    if compare_latency:
+        latency["baseline"] = latency_summary([baseline[title]["time"] for title in shared])
+    # ---
+    return {
+        "titles": len(shared),
+        "unchanged": len(shared) - len(changed) - len(newly_resolved) - len(newly_broken),
+        "changed": changed,
+        "newly_resolved": newly_resolved,
+        "newly_broken": newly_broken,
+        "latency": latency,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay logged titles through ArWikiCats and compare with a baseline.")
+    parser.add_argument("--baseline", help="results file of a previous replay (default: the logs database)")
+    parser.add_argument("--output", help="results file to write (default: replay-<version>.jsonl)")
+    parser.add_argument("--report", help="report file to write (default: <output>.report.json)")
+    parser.add_argument("--db-path", help="database file name in the databases directory (default: new_logs.db)")
+    parser.add_argument("--limit", type=int, default=0, help="only replay the first N titles")
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--chunk-size", type=int, default=100)
+    args = parser.parse_args(argv)
+    # ---
+    if args.db_path:
+        change_db_path(args.db_path)
+    # ---
+    version = resolver_version()
+    output = args.output or f"replay-{version}.jsonl"
+    report_path = args.report or f"{output.removesuffix('.jsonl')}.report.json"
+    # ---
+    baseline = load_results_file(args.baseline) if args.baseline else load_baseline_from_logs(limit=args.limit)
+    titles = sorted(baseline)
+    # ---
+    print(f"Replaying {len(titles):,} titles with ArWikiCats {version} on {args.workers} workers")
+    # ---
+    start_time = time.time()
+    current = replay_titles(titles, workers=args.workers, chunk_size=args.chunk_size)
+    # ---
+    report = compare_results(baseline, current, compare_latency=bool(args.baseline))
+    report["resolver_version"] = version
+    report["baseline"] = args.baseline or "logs database"
+    report["time"] = round(time.time() - start_time, 3)
+    # ---
+    write_results_file(output, current)
+    # ---
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=4, sort_keys=True)
+    # ---
+    latency = report["latency"]
+    print(f"changed: {len(report['changed']):,}")
+    print(f"newly resolved: {len(report['newly_resolved']):,}")
+    print(f"newly broken: {len(report['newly_broken']):,}")
+    for name in ["p50", "p90", "p99", "max"]:
+        if "baseline" in latency:
+            print(f"{name}: {latency['baseline'][name] * 1000:.2f} ms -> {latency['current'][name] * 1000:.2f} ms")
+        else:
+            print(f"{name}: {latency['current'][name] * 1000:.2f} ms")
+    if "baseline" not in latency:
+        print("latency not compared: the logs have whole-request times, replay with --baseline to compare")
+    print(f"results: {output}, report: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+ArWikiCats, imported on first use.
+
+Importing ArWikiCats is most of a worker's start time (``python -m benchmarks.startup``)
+and only the routes that resolve titles need it. They hold ``lazy(name)`` stand-ins
+that import it on their first call, so a new worker answers the UI and the log views
+at once. ``preload.py`` resolves titles in the master instead, before forking.
+"""
+import functools
+import importlib
+import logging
+import threading
+import time
+from importlib import metadata
+
+logger = logging.getLogger(__name__)
+
+MODULE = "ArWikiCats"
+
+_lock = threading.Lock()
+_module = None
+_error = None
+
+
+class ResolverUnavailable(RuntimeError):
+    """ArWikiCats is not installed or failed to import."""
+
+
+def load_resolver():
+    """Import ArWikiCats once, for all threads; return the module."""
+    global _module, _error
+    # ---
+    if _module is not None:
+        return _module
+    # ---
+    with _lock:
+        if _module is None and _error is None:
+            start = time.perf_counter()
+            try:
+                _module = importlib.import_module(MODULE)
+            except ImportError as e:
+                _error = e
+                logger.error("ArWikiCats is not available: %s", e)
+            else:
+                logger.info("ArWikiCats imported in %.2fs", time.perf_counter() - start)
+    # ---
+    if _module is None:
+        raise ResolverUnavailable(f"ArWikiCats is not available: {_error}")
+    # ---
+    return _module
+
+
+@functools.cache
+def resolver_version():
+    """Installed version of ArWikiCats, from the package metadata (no import)."""
+    try:
+        return metadata.version(MODULE)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def is_loaded():
+    return _module is not None
+
+
+def lazy(name):
+    """Return a function that calls ``ArWikiCats.<name>``, importing it on the first call."""
+
+    def call(*args, **kwargs):
+        return getattr(load_resolver(), name)(*args, **kwargs)
+
+    call.__name__ = call.__qualname__ = name
+    # ---
+    return call
@@ -1,36 +1,130 @@
 # -*- coding: utf-8 -*-
+import hashlib
 import json
+import os
 import time
 
-from flask import Blueprint, Response, request
+from flask import Blueprint, Response, redirect, request, url_for
 
-from .. import logs_bot
+from .. import logs_bot, metrics
+from ..bulk_resolve import reresolve_no_result, reresolve_titles
 from ..logs_db import get_response_status, log_request
+from ..query_budgets import EXPORT_BUDGET, PAGE_BUDGET, with_query_budget
+from ..rate_limit import check_rate_limit, retry_after
+from ..resolver import ResolverUnavailable, lazy, resolver_version
+from ..single_flight import SingleFlight, canonical_title, split_titles
+from ..slow_requests import init_slow_requests
+from ..timing import init_timing, phase
 
-try:
-    from ArWikiCats import batch_resolve_labels, resolve_arabic_category_label  # type: ignore
-except ImportError:
-    batch_resolve_labels = None
-    resolve_arabic_category_label = None
+# ArWikiCats is imported on the first call, see app/resolver.py
+batch_resolve_labels = lazy("batch_resolve_labels")
+resolve_arabic_category_label = lazy("resolve_arabic_category_label")
+
+# Concurrent requests for the same title wait for one resolution, see app/single_flight.py
+resolutions = SingleFlight()
+
+# Titles per /api/batch request (the query string has to fit in a URL), and its cache lifetime
+BATCH_MAX_TITLES = int(os.getenv("BATCH_MAX_TITLES", "50"))
+BATCH_MAX_AGE = int(os.getenv("BATCH_MAX_AGE", "3600"))
+
+# Titles per /api/no_result/resolve request; they are resolved on the request thread,
+# larger sets go through the CLI (python -m app.bulk_resolve)
+RESOLVE_MAX_TITLES = int(os.getenv("RESOLVE_MAX_TITLES", "500"))
 
 # Create the API Blueprint
 api_bp = Blueprint("api", __name__, url_prefix="/api")
 
+# Server-Timing header and timing fields in the request log
+init_timing(api_bp)
+
+# Requests above SLOW_REQUEST_SECONDS go to the slow_requests table
+init_slow_requests(api_bp)
+
 
 def jsonify(data: dict) -> str:
-    response_json = json.dumps(data, ensure_ascii=False, indent=4)
+    with phase("serialize"):
+        response_json = json.dumps(data, ensure_ascii=False, indent=4)
     return Response(response=response_json, content_type="application/json; charset=utf-8")
 
 
 def check_user_agent(endpoint, data, start_time):
     if not request.headers.get("User-Agent"):
         response_status = "User-Agent missing"
-        log_request(endpoint, data, response_status, time.time() - start_time)
+        with phase("log"):
+            log_request(endpoint, data, response_status, time.perf_counter() - start_time)
         return jsonify({"error": "User-Agent header is required"}), 400
     return None
 
 
+def check_limit(endpoint, data, start_time, scope, cost=1, log=True):
+    # Token buckets per User-Agent (RATE_LIMIT_LOOKUPS, RATE_LIMIT_BATCH_TITLES), see app/rate_limit.py
+    wait = check_rate_limit(scope, cost)
+    # ---
+    if not wait:
+        return None
+    # ---
+    metrics.observe_rate_limited(endpoint)
+    # ---
+    if log:
+        with phase("log"):
+            log_request(endpoint, data, "rate_limited", time.perf_counter() - start_time)
+    # ---
+    response = jsonify({"error": "too many requests, retry later"})
+    response.status_code = 429
+    response.headers["Retry-After"] = retry_after(wait)
+    # ---
+    return response
+
+
+def resolve_title(title, key) -> str:
+    # key: canonical_title(title), what concurrent requests for the title share
+    label, shared = resolutions.do(key, lambda: resolve_arabic_category_label(title))
+    # ---
+    metrics.observe_coalesced("/api/<title>", int(shared))
+    # ---
+    return label
+
+
+class BatchResult:
+    """The parts of ArWikiCats' batch result that /api/list uses, for titles resolved here or elsewhere."""
+
+    def __init__(self, values):
+        # None: skipped by ArWikiCats (empty titles)
+        self.labels = {title: label for title, label in values.items() if label}
+        self.no_labels = [title for title, label in values.items() if label == ""]
+
+
+def resolve_titles(titles) -> BatchResult:
+    def resolve(keys):
+        result = batch_resolve_labels(keys)
+        # ---
+        values = dict.fromkeys(result.no_labels, "")
+        values.update(result.labels)
+        # ---
+        return values
+
+    values, shared = resolutions.do_many([canonical_title(title) for title in titles], resolve)
+    # ---
+    metrics.observe_coalesced("/api/list", shared)
+    # ---
+    return BatchResult(values)
+
+
+def date_range_args() -> dict:
+    # ?from=2025-01-01&to=2025-01-31, only the ones given
+    args = {}
+    # ---
+    if request.args.get("from"):
+        args["date_from"] = request.args.get("from")
+    # ---
+    if request.args.get("to"):
+        args["date_to"] = request.args.get("to")
+    # ---
+    return args
+
+
 @api_bp.route("/logs_by_day", methods=["GET"])
+@with_query_budget(PAGE_BUDGET)
 def get_logs_by_day() -> str:
     result = logs_bot.retrieve_logs_by_date(request)
     result = result.get("logs", [])
@@ -40,16 +134,18 @@ def get_logs_by_day() -> str:
 
 @api_bp.route("/all", methods=["GET"])
 @api_bp.route("/all/<day>", methods=["GET"])
+@with_query_budget(EXPORT_BUDGET)
 def get_logs_all(day=None) -> str:
-    result = logs_bot.retrieve_logs_en_to_ar(day)
+    result = logs_bot.retrieve_logs_en_to_ar(day, **date_range_args())
     # ---
     return jsonify(result)
 
 
 @api_bp.route("/category", methods=["GET"])
 @api_bp.route("/category/<day>", methods=["GET"])
+@with_query_budget(EXPORT_BUDGET)
 def get_logs_category(day=None) -> str:
-    result = logs_bot.retrieve_logs_en_to_ar(day)
+    result = logs_bot.retrieve_logs_en_to_ar(day, **date_range_args())
     # ---
     if "no_result" in result:
         del result["no_result"]
@@ -59,8 +155,9 @@ def get_logs_category(day=None) -> str:
 
 @api_bp.route("/no_result", methods=["GET"])
 @api_bp.route("/no_result/<day>", methods=["GET"])
+@with_query_budget(EXPORT_BUDGET)
 def get_logs_no_result(day=None) -> str:
-    result = logs_bot.retrieve_logs_en_to_ar(day)
+    result = logs_bot.retrieve_logs_en_to_ar(day, **date_range_args())
     # ---
     if "data_result" in result:
         del result["data_result"]
@@ -68,9 +165,69 @@ def get_logs_no_result(day=None) -> str:
     return jsonify(result)
 
 
+@api_bp.route("/no_result/resolve", methods=["POST"])
+def resolve_no_result() -> str:
+    # Re-resolve the no_result set on the server, without logging it as user traffic.
+    # Open like /api/batch: the batch rate limit and RESOLVE_MAX_TITLES bound the work
+    start_time = time.perf_counter()
+    # ---
+    data = request.get_json(silent=True) or {}
+    # ---
+    day = data.get("day", "")
+    limit = data.get("limit", 200)
+    # The rows a table shows, instead of the most requested no_result titles
+    titles = data.get("titles")
+    # ---
+    if not isinstance(day, str) or not isinstance(limit, int):
+        return jsonify({"error": "بيانات غير صالحة"}), 400
+    # ---
+    if titles is not None:
+        if not isinstance(titles, list) or not all(isinstance(title, str) for title in titles):
+            return jsonify({"error": "بيانات غير صالحة"}), 400
+        # ---
+        titles = list(dict.fromkeys(titles))
+        # ---
+        if not titles or len(titles) > RESOLVE_MAX_TITLES:
+            return jsonify({"error": f"بيانات غير صالحة: من 1 إلى {RESOLVE_MAX_TITLES} عنوانا"}), 400
+    # ---
+    limit = max(1, min(RESOLVE_MAX_TITLES, limit))
+    cost = limit if titles is None else len(titles)
+    # ---
+    # Rate limited like a batch of as many titles; a 429 is not logged either
+    limited = check_limit("/api/no_result/resolve", day, start_time, "batch", cost, log=False)
+    if limited:
+        return limited
+    # ---
+    try:
+        # In this thread, in chunks: no worker processes forked from a request
+        if titles is None:
+            result = reresolve_no_result(day=day, limit=limit, workers=1)
+        else:
+            result = reresolve_titles(titles, workers=1)
+    except ResolverUnavailable:
+        return jsonify({"error": "حدث خطأ أثناء تحميل المكتبة"}), 500
+    # ---
+    return jsonify(result)
+
+
 @api_bp.route("/status", methods=["GET"])
+@with_query_budget(PAGE_BUDGET)
 def get_status_table() -> str:
-    result = get_response_status()
+    table_name = request.args.get("table_name", "logs")
+    # ---
+    if table_name not in logs_bot.db_tables:
+        table_name = "logs"
+    # ---
+    result = get_response_status(table_name=table_name)
+    # ---
+    return jsonify(result)
+
+
+@api_bp.route("/slow", methods=["GET"])
+@with_query_budget(PAGE_BUDGET)
+def get_slow_requests() -> str:
+    # ---
+    result = logs_bot.view_slow_requests(request)
     # ---
     return jsonify(result)
 
@@ -78,34 +235,86 @@ def get_status_table() -> str:
 @api_bp.route("/<title>", methods=["GET"])
 def get_title(title) -> str:
     # ---
-    start_time = time.time()
+    start_time = time.perf_counter()
+    # ---
+    with phase("parse"):
+        key = canonical_title(title)
     # ---
     # Check for User-Agent header
     ua_check = check_user_agent("/api/<title>", title, start_time)
     if ua_check:
         return ua_check
     # ---
-    if resolve_arabic_category_label is None:
-        log_request("/api/<title>", title, "error", time.time() - start_time)
-        return jsonify({"error": "حدث خطأ أثناء تحميل المكتبة"}), 500
+    limited = check_limit("/api/<title>", title, start_time, "lookup")
+    if limited:
+        return limited
     # ---
-    label = resolve_arabic_category_label(title)
+    try:
+        with phase("resolve"):
+            label = resolve_title(title, key)
+    except ResolverUnavailable:
+        with phase("log"):
+            log_request("/api/<title>", title, "error", time.perf_counter() - start_time)
+        return jsonify({"error": "حدث خطأ أثناء تحميل المكتبة"}), 500
     # ---
     data = {"result": label}
     # ---
-    delta = time.time() - start_time
+    delta = time.perf_counter() - start_time
     # ---
-    data["sql"] = log_request("/api/<title>", title, label or "no_result", delta)
+    with phase("log"):
+        data["sql"] = log_request("/api/<title>", title, label or "no_result", delta)
     # ---
     return jsonify(data)
 
 
+def batch_response(endpoint, titles, duplicates, start_time):
+    """Resolve the distinct ``titles`` of a batch request and log it; the response of /api/list."""
+    delta = time.perf_counter() - start_time
+    # ---
+    try:
+        with phase("resolve"):
+            result = resolve_titles(titles)
+    except ResolverUnavailable:
+        with phase("log"):
+            log_request(endpoint, titles, "error", delta)
+        response = jsonify({"error": "حدث خطأ أثناء تحميل المكتبة"})
+        response.status_code = 500
+        return response
+    # ---
+    metrics.observe_batch(endpoint, len(titles))
+    # ---
+    len_result = len(result.labels)
+    # ---
+    for x in result.no_labels:
+        if x not in result.labels:
+            result.labels[x] = ""
+    # ---
+    delta2 = time.perf_counter() - start_time
+    # ---
+    response_data = {
+        "results": result.labels,
+        "no_labs": len(result.no_labels),
+        "with_labs": len_result,
+        "duplicates": duplicates,
+        "time": delta2,
+    }
+    # ---
+    # تحديد حالة الاستجابة
+    response_status = "success" if len_result > 0 else "no_result"
+    with phase("log"):
+        log_request(endpoint, titles, response_status, delta2)
+    # ---
+    return jsonify(response_data)
+
+
 @api_bp.route("/list", methods=["POST"])
 def get_titles():
     # ---
-    start_time = time.time()
-    data = request.get_json()
-    titles = data.get("titles", [])
+    start_time = time.perf_counter()
+    # ---
+    with phase("parse"):
+        data = request.get_json()
+        titles = data.get("titles", [])
     # ---
     # Check for User-Agent header
     ua_check = check_user_agent("/api/list", titles, start_time)
@@ -114,51 +323,85 @@ def get_titles():
     # ---
     # تأكد أن البيانات قائمة
     if not isinstance(titles, list):
-        delta = time.time() - start_time
-        log_request("/api/list", titles, "error", delta)
+        delta = time.perf_counter() - start_time
+        with phase("log"):
+            log_request("/api/list", titles, "error", delta)
         return jsonify({"error": "بيانات غير صالحة"}), 400
     # ---
-    delta = time.time() - start_time
-    # ---
     len_titles = len(titles)
     titles = list(set(titles))
     duplicates = len_titles - len(titles)
+    # ---
+    limited = check_limit("/api/list", titles, start_time, "batch", len(titles))
+    if limited:
+        return limited
+    # ---
+    return batch_response("/api/list", titles, duplicates, start_time)
 
-    # print("get_titles:")
-    # print(titles)
 
-    if batch_resolve_labels is None:
-        log_request("/api/list", titles, "error", delta)
-        return jsonify({"error": "حدث خطأ أثناء تحميل المكتبة"}), 500
+@api_bp.route("/batch", methods=["GET"])
+def get_batch():
+    """
+    /api/list as a GET, cacheable by browsers and the front proxy: ?titles=A|B|C
+
+    The titles are redirected to one canonical order, so a set of titles has one URL,
+    and the response carries an ETag of the resolver version and the titles.
+    """
     # ---
-    result = batch_resolve_labels(titles)
+    start_time = time.perf_counter()
     # ---
-    len_result = len(result.labels)
+    with phase("parse"):
+        titles = split_titles(request.args.get("titles"))
     # ---
-    for x in result.no_labels:
-        if x not in result.labels:
-            result.labels[x] = ""
+    ua_check = check_user_agent("/api/batch", titles, start_time)
+    if ua_check:
+        return ua_check
     # ---
-    delta2 = time.time() - start_time
+    if not titles or len(titles) > BATCH_MAX_TITLES:
+        with phase("log"):
+            log_request("/api/batch", titles, "error", time.perf_counter() - start_time)
+        return jsonify({"error": f"بيانات غير صالحة: من 1 إلى {BATCH_MAX_TITLES} عنوانا"}), 400
     # ---
-    response_data = {
-        "results": result.labels,
-        "no_labs": len(result.no_labels),
-        "with_labs": len_result,
-        "duplicates": duplicates,
-        "time": delta2,
-    }
+    canonical = sorted({canonical_title(title) for title in titles})
+    query = "|".join(canonical)
     # ---
-    # تحديد حالة الاستجابة
-    response_status = "success" if len_result > 0 else "no_result"
-    log_request("/api/list", titles, response_status, delta2)
+    if request.args.get("titles") != query or len(request.args) > 1:
+        response = redirect(url_for("api.get_batch", titles=query), code=301)
+        response.cache_control.public = True
+        response.cache_control.max_age = BATCH_MAX_AGE
+        return response
     # ---
-    return jsonify(response_data)
+    etag = hashlib.sha256(f"{resolver_version()}\n{query}".encode("utf-8")).hexdigest()[:32]
+    # ---
+    # Revalidations are answered here, without resolving or logging
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        limited = check_limit("/api/batch", canonical, start_time, "batch", len(canonical))
+        if limited:
+            return limited
+        # ---
+        response = batch_response("/api/batch", canonical, 0, start_time)
+        # ---
+        if response.status_code != 200:
+            return response
+    # ---
+    # Weak: compression changes the bytes, not the labels
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = BATCH_MAX_AGE
+    # ---
+    return response
 
 
 @api_bp.route("/logs", methods=["GET"])
+@with_query_budget(PAGE_BUDGET)
 def logs_api():
     # ---
+    # DataTables tables (serverSide: true) send draw, start, length...
+    if "draw" in request.args:
+        return jsonify(logs_bot.view_logs_datatables(request))
+    # ---
     result = logs_bot.view_logs(request)
     # ---
     return jsonify(result)
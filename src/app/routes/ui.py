@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
-from flask import Blueprint, render_template, request
+from flask import Blueprint, abort, current_app, render_template, request, send_from_directory
 
-from ..logs_bot import retrieve_logs_by_date, view_logs
+from .. import profiling
+from ..logs_bot import retrieve_logs_by_date, view_logs, view_slow_requests
+from ..query_budgets import PAGE_BUDGET, with_query_budget
 
 # Create the UI Blueprint
 ui_bp = Blueprint("ui", __name__)
@@ -13,13 +15,24 @@ def render_index_page() -> str:
 
 
 @ui_bp.route("/logs", methods=["GET"])
+@with_query_budget(PAGE_BUDGET)
 def render_logs_view() -> str:
     # ---
-    result = view_logs(request)
+    # The table loads its rows from /api/logs, a page at a time
+    result = view_logs(request, with_rows=False)
     # ---
     return render_template("logs.html", result=result)
 
 
+@ui_bp.route("/slow", methods=["GET"])
+@with_query_budget(PAGE_BUDGET)
+def render_slow_requests() -> str:
+    # ---
+    result = view_slow_requests(request)
+    # ---
+    return render_template("slow.html", result=result)
+
+
 @ui_bp.route("/no_result", methods=["GET"])
 def render_no_results_page() -> str:
     # ---
@@ -27,6 +40,7 @@ def render_no_results_page() -> str:
 
 
 @ui_bp.route("/logs_by_day", methods=["GET"])
+@with_query_budget(PAGE_BUDGET)
 def render_daily_logs() -> str:
     # ---
     result = retrieve_logs_by_date(request)
@@ -53,3 +67,42 @@ def render_chart() -> str:
 @ui_bp.route("/chart2", methods=["GET"])
 def render_chart2() -> str:
     return render_template("chart2.html")
+
+
+def check_profile_token() -> str:
+    # The profiles pages only exist when PROFILE_TOKEN is set
+    if not current_app.config.get("PROFILE_TOKEN"):
+        abort(404)
+    # ---
+    token = profiling.request_token()
+    # ---
+    if not profiling.valid_token(token):
+        abort(403)
+    # ---
+    return token
+
+
+@ui_bp.route("/profiles", methods=["GET"])
+def render_profiles() -> str:
+    token = check_profile_token()
+    # ---
+    return render_template("profiles.html", profiles=profiling.list_profiles(), token=token)
+
+
+@ui_bp.route("/profiles/<name>", methods=["GET"])
+def render_profile(name) -> str:
+    token = check_profile_token()
+    # ---
+    summary = profiling.load_profile(name)
+    # ---
+    if summary is None:
+        abort(404)
+    # ---
+    return render_template("profile.html", profile=summary, token=token)
+
+
+@ui_bp.route("/profiles/<name>.prof", methods=["GET"])
+def download_profile(name):
+    check_profile_token()
+    # ---
+    return send_from_directory(profiling.profiles_dir(), f"{name}.prof", as_attachment=True)
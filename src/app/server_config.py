@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Worker and thread counts for the WSGI server, from the container's CPU quota.
+
+The pod gets ``cpu: 3`` (``service.template``), but ``os.cpu_count()`` reports the
+CPUs of the node, so the quota is read from the cgroup:
+    cgroup v2: /sys/fs/cgroup/cpu.max              ("300000 100000" or "max 100000")
+    cgroup v1: /sys/fs/cgroup/cpu/cpu.cfs_quota_us and cpu.cfs_period_us
+
+Resolving a title holds the GIL, so there is one process per CPU; a few threads per
+process overlap the SQLite writes and the network I/O with resolving.
+``WEB_WORKERS`` and ``WEB_THREADS`` override the computed values.
+
+Usage (from ``src``):
+    python -m app.server_config
+"""
+import os
+from pathlib import Path
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+THREADS_PER_WORKER = 4
+
+
+def read_text(path):
+    try:
+        return Path(path).read_text().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root=CGROUP_ROOT):
+    """Return the CPU quota of the cgroup as a number of CPUs (may be fractional), or None."""
+    cpu_max = read_text(root / "cpu.max")
+    # ---
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+    # ---
+    quota = read_text(root / "cpu" / "cpu.cfs_quota_us")
+    period = read_text(root / "cpu" / "cpu.cfs_period_us")
+    # ---
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    # ---
+    return None
+
+
+def available_cpus(root=CGROUP_ROOT):
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    # ---
+    limit = cgroup_cpu_limit(root)
+    # ---
+    if limit:
+        # Round down: a worker on a fraction of a CPU gets throttled
+        cpus = min(cpus, max(1, int(limit)))
+    # ---
+    return cpus
+
+
+def worker_layout(root=CGROUP_ROOT):
+    """Return ``(workers, threads)`` for this container."""
+    workers = int(os.getenv("WEB_WORKERS", "0") or 0) or available_cpus(root)
+    threads = int(os.getenv("WEB_THREADS", "0") or 0) or THREADS_PER_WORKER
+    # ---
+    return workers, threads
+
+
+def main():
+    limit = cgroup_cpu_limit()
+    workers, threads = worker_layout()
+    # ---
+    print(f"cgroup cpu limit: {limit if limit is not None else 'none'}")
+    print(f"processes = {workers}")
+    print(f"threads = {threads}")
+
+
+if __name__ == "__main__":
+    main()
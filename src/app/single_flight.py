@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Coalescing of concurrent resolutions of the same titles.
+
+When a popular category page is open in many browsers, the gadget sends the same
+``/api/<title>`` from all of them at once. ``SingleFlight`` lets the first thread
+resolve a title while the threads that ask for it in the meantime wait for that
+result, instead of resolving it again. Batches take part too: ``do_many`` resolves
+only the titles of a batch that no other request is resolving, in one call, and
+waits for the others. Nothing is kept once a resolution ends; this is not a cache.
+
+Titles are keyed by ``canonical_title``, the form ArWikiCats resolves, so
+``Category:A_b`` and ``Category:A b`` share one resolution.
+"""
+import threading
+
+
+def canonical_title(title):
+    """The title as ArWikiCats normalizes it before resolving."""
+    return title.removeprefix("\ufeff").replace("_", " ")
+
+
+def split_titles(value):
+    """The titles of a ``titles=A|B|C`` query string, without the empty ones."""
+    return [title for title in (value or "").split("|") if title.strip()]
+
+
+class Call:
+    """One resolution in flight; the threads waiting for it block on ``done``."""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def result(self):
+        self.done.wait()
+        # ---
+        if self.error is not None:
+            raise self.error
+        # ---
+        return self.value
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def _claim(self, keys):
+        """Split ``keys`` into the calls this thread leads and the ones it waits for."""
+        led = {}
+        followed = {}
+        # ---
+        with self._lock:
+            for key in keys:
+                call = self._calls.get(key)
+                # ---
+                if call is None:
+                    led[key] = self._calls[key] = Call()
+                else:
+                    followed[key] = call
+        # ---
+        return led, followed
+
+    def _release(self, led):
+        with self._lock:
+            for key in led:
+                del self._calls[key]
+        # ---
+        for call in led.values():
+            call.done.set()
+
+    def do(self, key, func):
+        """Return ``(func(), shared)``; ``shared`` is True when another thread ran ``func``."""
+        led, followed = self._claim([key])
+        # ---
+        if followed:
+            return followed[key].result(), True
+        # ---
+        call = led[key]
+        # ---
+        try:
+            call.value = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._release(led)
+        # ---
+        return call.value, False
+
+    def do_many(self, keys, func):
+        """
+        Return ``(values, shared)`` for ``keys``.
+
+        ``func(keys)`` is called once, with the keys no other thread is resolving, and
+        returns a dict of their values; the other keys are waited for. ``shared`` is
+        the number of keys resolved by another thread.
+        """
+        # A thread waits only after its own keys are done, so batches that overlap
+        # in any order can't wait on each other
+        led, followed = self._claim(dict.fromkeys(keys))
+        values = {}
+        # ---
+        if led:
+            try:
+                results = func(list(led))
+                # ---
+                for key, call in led.items():
+                    values[key] = call.value = results.get(key)
+            except BaseException as e:
+                for call in led.values():
+                    call.error = e
+                raise
+            finally:
+                self._release(led)
+        # ---
+        for key, call in followed.items():
+            values[key] = call.result()
+        # ---
+        return values, len(followed)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Record API requests slower than ``SLOW_REQUEST_SECONDS`` (default 1.0, 0 disables)
+in the ``slow_requests`` table, with their phase timings from ``app.timing``.
+"""
+import logging
+import os
+
+from flask import request
+
+from .logs_db import log_slow_request
+from .single_flight import split_titles
+from .timing import current_timer
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "1.0"))
+
+# Titles kept in request_data for a slow batch; batch_size has the real size
+MAX_STORED_TITLES = 100
+
+
+def request_titles():
+    """Return the title or the list of titles of the current API request, or None."""
+    if request.view_args and "title" in request.view_args:
+        return request.view_args["title"]
+    # ---
+    # Already parsed (and cached) by the view
+    data = request.get_json(silent=True) if request.is_json else None
+    # ---
+    if isinstance(data, dict) and isinstance(data.get("titles"), list):
+        return data["titles"]
+    # ---
+    # /api/batch?titles=A|B|C
+    if "titles" in request.args:
+        return split_titles(request.args["titles"])
+    # ---
+    return None
+
+
+def record_slow_request(response):
+    timer = current_timer()
+    # ---
+    if timer is None or SLOW_REQUEST_SECONDS <= 0:
+        return response
+    # ---
+    duration = timer.elapsed()
+    # ---
+    if duration < SLOW_REQUEST_SECONDS:
+        return response
+    # ---
+    titles = request_titles()
+    # ---
+    if isinstance(titles, list):
+        batch_size = len(titles)
+        request_data = str(titles[:MAX_STORED_TITLES])
+    else:
+        batch_size = 1
+        request_data = titles
+    # ---
+    result = log_slow_request(
+        request.url_rule.rule if request.url_rule else request.path,
+        request_data,
+        batch_size,
+        response.status_code,
+        duration,
+        {name: round(seconds, 6) for name, seconds in timer.phases.items()},
+        request.headers.get("User-Agent", ""),
+    )
+    # ---
+    if result is not True:
+        logger.warning("could not record slow request: %s", result)
+    # ---
+    return response
+
+
+def init_slow_requests(blueprint):
+    blueprint.after_request(record_slow_request)
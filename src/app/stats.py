@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Small helpers for latency statistics.
+"""
+import math
+
+
+def percentile(values, q):
+    """Return the ``q`` percentile (0-100) of ``values`` using the nearest-rank method."""
+    if not values:
+        return 0.0
+    # ---
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    # ---
+    return ordered[rank - 1]
+
+
+def latency_summary(values):
+    """Summarize a list of latencies (seconds) as count, mean, p50/p90/p99 and max."""
+    values = [v for v in values if v is not None]
+    # ---
+    if not values:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    # ---
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 6),
+        "p50": round(percentile(values, 50), 6),
+        "p90": round(percentile(values, 90), 6),
+        "p99": round(percentile(values, 99), 6),
+        "max": round(max(values), 6),
+    }
+
+
+def histogram_percentile(bounds, counts, q, max_value):
+    """
+    Return the ``q`` percentile (0-100) of a bucketed distribution.
+
+    ``counts[i]`` is the number of values ``<= bounds[i]``, and ``counts[len(bounds)]``
+    the values above the last bound. The result is the upper bound of the bucket holding
+    the nearest rank, capped at ``max_value``.
+    """
+    total = sum(counts)
+    # ---
+    if not total:
+        return 0.0
+    # ---
+    rank = max(1, math.ceil(q / 100 * total))
+    seen = 0
+    # ---
+    for i, count in enumerate(counts):
+        seen += count
+        if seen >= rank:
+            return min(bounds[i], max_value) if i < len(bounds) else max_value
+    # ---
+    return max_value
+
+
+def histogram_summary(bounds, counts, max_value):
+    """Summarize a bucketed distribution as count, p50/p90/p99 and max."""
+    return {
+        "count": sum(counts),
+        "p50": round(histogram_percentile(bounds, counts, 50, max_value), 6),
+        "p90": round(histogram_percentile(bounds, counts, 90, max_value), 6),
+        "p99": round(histogram_percentile(bounds, counts, 99, max_value), 6),
+        "max": round(max_value, 6),
+    }
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Per-request phase timing, reported in the ``Server-Timing`` header and the request log.
+"""
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+
+from flask import g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+
+class PhaseTimer:
+    """Monotonic timer that adds up the time spent in named phases of one request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def server_timing(self):
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        # ---
+        return ", ".join(parts)
+
+
+def current_timer():
+    if not has_request_context():
+        return None
+    # ---
+    return g.get("timer")
+
+
+def phase(name):
+    """Time ``name`` on the current request's timer; a no-op outside a timed request."""
+    timer = current_timer()
+    # ---
+    return timer.phase(name) if timer else nullcontext()
+
+
+def start_timer():
+    g.timer = PhaseTimer()
+
+
+def add_server_timing(response):
+    timer = current_timer()
+    # ---
+    if timer is None:
+        return response
+    # ---
+    response.headers["Server-Timing"] = timer.server_timing()
+    # ---
+    logger.info(
+        "%s %s %s %.2fms",
+        request.method,
+        request.path,
+        response.status_code,
+        timer.elapsed() * 1000,
+        extra={
+            "endpoint": request.url_rule.rule if request.url_rule else request.path,
+            "status": response.status_code,
+            "duration_ms": round(timer.elapsed() * 1000, 3),
+            "phases_ms": {name: round(seconds * 1000, 3) for name, seconds in timer.phases.items()},
+        },
+    )
+    # ---
+    return response
+
+
+def init_timing(blueprint):
+    blueprint.before_request(start_timer)
+    blueprint.after_request(add_server_timing)
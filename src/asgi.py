@@ -0,0 +1,15 @@
+"""ASGI entry point for the same app, see app/asgi.py.
+
+Usage (from ``src``):
+    uvicorn asgi:app --port 8000 --workers 3
+"""
+
+from __future__ import annotations
+
+from app.asgi import create_asgi_app
+from app.logs_db import init_db
+
+# Creates missing tables, indexes and triggers in existing databases
+init_db()
+
+app = create_asgi_app()
@@ -0,0 +1,96 @@
+"""
+Gunicorn configuration.
+
+Usage (from ``src``):
+    gunicorn -c gunicorn.conf.py
+
+Workers and threads follow the cgroup CPU quota (see ``app/server_config.py``).
+``kill -HUP <master>`` re-reads this file and replaces the workers gracefully; since
+the app is preloaded in the master, new code needs a new master: ``kill -USR2 <master>``,
+then ``kill -QUIT <old master>`` once the new workers answer.
+"""
+
+import gc
+import importlib.util
+import os
+import shutil
+from pathlib import Path
+
+# Not "from app.server_config import ...": app/__init__ would import Flask and the
+# routes here, before preload_app decides where the app is loaded
+spec = importlib.util.spec_from_file_location("server_config", Path(__file__).parent / "app" / "server_config.py")
+server_config = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(server_config)
+
+workers, threads = server_config.worker_layout()
+
+# src/app.py and the src/app/ package share a name, so call the factory directly
+wsgi_app = "app:create_app()"
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+worker_class = "gthread" if threads > 1 else "sync"
+
+# Import the app and build the ArWikiCats tables once in the master; the workers share
+# the pages (see app/preload.py). PRELOAD_RESOLVER=0 loads everything in each worker.
+preload_app = os.getenv("PRELOAD_RESOLVER", "1") != "0"
+
+if preload_app:
+    # Re-enabled by preload_resolver() once the heap is frozen
+    gc.disable()
+
+# Recycle workers to bound memory growth, not all at once
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "5000"))
+max_requests_jitter = max_requests // 10
+
+# A worker silent for longer is killed and replaced
+timeout = int(os.getenv("WEB_TIMEOUT", "60"))
+# Time for in-flight requests on reload or shutdown
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = None
+
+
+def create_tables():
+    # What src/app.py does before create_app(): missing tables, indexes and triggers
+    from app.logs_db import init_db
+
+    init_db()
+
+
+def on_starting(server):
+    # Importing app.logs_db imports the whole app, so only here when it is preloaded
+    if preload_app:
+        create_tables()
+    # ---
+    # Values left by the workers of an earlier run would be added to the new ones
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    # ---
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        Path(multiproc_dir).mkdir(parents=True, exist_ok=True)
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        create_tables()
+
+
+def when_ready(server):
+    # In the master, after the app is loaded and before the first fork
+    if preload_app:
+        from app.preload import preload_resolver
+
+        preload_resolver()
+
+
+def child_exit(server, worker):
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return
+    # ---
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    # ---
+    # Drop the in-progress gauge of the dead worker
+    multiprocess.mark_process_dead(worker.pid)
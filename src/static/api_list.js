@@ -1,66 +1,166 @@
+// Titles are sent in chunks of CHUNK_SIZE, CONCURRENCY requests at a time, and the
+// results and counters are updated as each chunk returns. Finished chunks are kept:
+// submitting the same list again (or "Retry failed") only sends the chunks that failed.
+const CHUNK_SIZE = 100;
+const CONCURRENCY = 3;
+// Automatic retries of a chunk before it is marked as failed
+const MAX_ATTEMPTS = 3;
+
+let listState = null;
+
+function newListState(text) {
+    const all = text.split('\n').map(t => t.trim()).filter(t => t !== "");
+    const titles = [...new Set(all)];
+    // ---
+    const chunks = [];
+    for (let i = 0; i < titles.length; i += CHUNK_SIZE) {
+        chunks.push({ titles: titles.slice(i, i + CHUNK_SIZE), status: "pending", error: null });
+    }
+    // ---
+    return {
+        text: text,
+        chunks: chunks,
+        results: {},
+        with_labs: 0,
+        no_labs: 0,
+        duplicates: all.length - titles.length,
+        titles_done: 0,
+        seconds: 0,
+        running: false,
+    };
+}
+
+function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+async function postChunk(titles) {
+    for (let attempt = 1; ; attempt++) {
+        let wait = 1000 * attempt;
+        // ---
+        try {
+            const response = await fetch("/api/list", {
+                method: "POST",
+                headers: {
+                    "Content-Type": "application/json"
+                },
+                body: JSON.stringify({ titles: titles })
+            });
+            // ---
+            if (response.ok) {
+                const data = await response.json();
+                if (!data.error) return data;
+                throw new Error(data.error);
+            }
+            // ---
+            // 429: wait as long as the server asks
+            const retryAfter = parseInt(response.headers.get("Retry-After"), 10);
+            if (response.status === 429 && retryAfter > 0) wait = retryAfter * 1000;
+            // ---
+            if (response.status < 500 && response.status !== 429) {
+                throw new Error("HTTP " + response.status);
+            }
+            if (attempt >= MAX_ATTEMPTS) throw new Error("HTTP " + response.status);
+        } catch (error) {
+            if (attempt >= MAX_ATTEMPTS || !(error instanceof TypeError)) throw error;
+            // TypeError: the request didn't reach the server; retried below
+        }
+        // ---
+        await sleep(wait);
+    }
+}
+
+function renderListState(state, final) {
+    const failed = state.chunks.filter(c => c.status === "failed").length;
+    const done = state.chunks.filter(c => c.status === "done").length;
+    // ---
+    $("#with_labs").text(state.with_labs).show();
+    $("#no_labs").text(state.no_labs).show();
+    $("#duplicates").text(state.duplicates).show();
+    $("#time").text(state.seconds.toFixed(2) + " s").show();
+    // ---
+    const rate = state.seconds > 0 ? state.titles_done / state.seconds : 0;
+    $("#rate").text(rate.toFixed(0) + " titles/s").show();
+    $("#progress").text(done + " / " + state.chunks.length).show();
+    // ---
+    $("#failed").text(failed);
+    $("#failed_box").toggle(failed > 0);
+    $("#retry_failed").toggle(final && failed > 0);
+    // ---
+    document.getElementById('result').textContent = JSON.stringify(state.results, null, 2);
+}
+
+async function runChunks(state) {
+    const queue = state.chunks.filter(c => c.status !== "done");
+    const timestart = new Date().getTime();
+    const secondsBefore = state.seconds;
+    // ---
+    queue.forEach(c => { c.status = "pending"; });
+    renderListState(state, false);
+    // ---
+    async function worker() {
+        while (queue.length > 0) {
+            const chunk = queue.shift();
+            chunk.status = "running";
+            // ---
+            try {
+                const data = await postChunk(chunk.titles);
+                Object.assign(state.results, data.results);
+                state.with_labs += data.with_labs;
+                state.no_labs += data.no_labs;
+                state.titles_done += chunk.titles.length;
+                chunk.status = "done";
+                chunk.error = null;
+            } catch (error) {
+                chunk.status = "failed";
+                chunk.error = String(error);
+                console.error(error);
+            }
+            // ---
+            state.seconds = secondsBefore + (new Date().getTime() - timestart) / 1000;
+            renderListState(state, false);
+        }
+    }
+    // ---
+    const workers = [];
+    for (let i = 0; i < Math.min(CONCURRENCY, queue.length); i++) {
+        workers.push(worker());
+    }
+    await Promise.all(workers);
+    // ---
+    renderListState(state, true);
+}
+
 async function sendCategories() {
     const titles = document.getElementById('titles').value.trim();
     const resultBox = document.getElementById('result');
     const loading = document.getElementById('loading');
     const notloading = document.getElementById('notloading');
 
-    if (!titles) return;
+    if (!titles || (listState && listState.running)) return;
 
     loading.style.display = 'inline-block';
     notloading.style.display = 'none';
-    resultBox.textContent = '';
     // ---
-    $("#with_labs").hide();
-    $("#no_labs").hide();
-    $("#time").hide();
-    $("#duplicates").hide();
+    // The same list again: keep the finished chunks and send the rest
+    if (!listState || listState.text !== titles) {
+        listState = newListState(titles);
+        resultBox.textContent = '';
+    }
     // ---
     try {
-        const titles_list = titles.split('\n').filter(t => t.trim() !== "");
-        // ---
-        var timestart = new Date().getTime();
-        const response = await fetch("/api/list", {
-            method: "POST",
-            headers: {
-                "Content-Type": "application/json"
-            },
-            body: JSON.stringify({ titles: titles_list })
-        });
-
-        const data = await response.json();
-        // const time = data.time;
-        // ---
-        if (data.error) {
-            console.error(data.error);
-            return;
-        }
-        // ---
-        const with_labs = data.with_labs;
-        const no_labs = data.no_labs;
-        const duplicates = data.duplicates;
-        // ---
-        var timeend = new Date().getTime();
-        var time = (timeend - timestart) / 1000;
-        // ---
-        $("#duplicates").text(duplicates);
-        $("#duplicates").show();
-        // ---
-        $("#with_labs").text(with_labs);
-        $("#with_labs").show();
-        // ---
-        $("#no_labs").text(no_labs);
-        $("#no_labs").show();
-        // ---
-        $("#time").text(time.toFixed(2) + " s");
-        $("#time").show();
-        // ---
-        resultBox.textContent = JSON.stringify(data.results, null, 2);
-        // ---
+        listState.running = true;
+        await runChunks(listState);
     } catch (error) {
         resultBox.textContent = "An error occurred while connecting to the server.";
         console.error(error);
     } finally {
+        listState.running = false;
         loading.style.display = 'none';
         notloading.style.display = 'inline';
     }
 }
+
+function retryFailed() {
+    if (listState) sendCategories();
+}
@@ -2,3 +2,26 @@
 """
 Pytest configuration for the tests directory.
 """
+import pytest
+
+
+@pytest.fixture
+def resolver_unavailable(monkeypatch):
+    """ArWikiCats failing to import: the lazy stand-ins raise ResolverUnavailable."""
+    from src.app import resolver
+
+    monkeypatch.setattr(resolver, "_module", None)
+    monkeypatch.setattr(resolver, "_error", None)
+    monkeypatch.setattr(resolver, "MODULE", "no_such_resolver_module")
+    return resolver
+
+
+@pytest.fixture
+def temp_logs_db(tmp_path, monkeypatch):
+    """The logs database, and the directory of the other files, in tmp_path with all the tables created."""
+    from src.app.logs_db import db
+
+    monkeypatch.setattr(db, "main_path", tmp_path)
+    monkeypatch.setitem(db.db_path_main, 1, str(tmp_path / "new_logs.db"))
+    db.init_db()
+    return db
@@ -143,6 +143,20 @@ class TestApiEndpoints:
             assert response.status_code == 200
             mock_retrieve.assert_called_once_with("2025-01-27")
 
+    def test_all_endpoint_with_date_range(self, client):
+        """Test /api/all passes from/to query arguments."""
+        with patch("src.app.logs_bot.retrieve_logs_en_to_ar") as mock_retrieve:
+            mock_retrieve.return_value = {
+                "tab": {"sum_all": "0"},
+                "no_result": [],
+                "data_result": {}
+            }
+
+            response = client.get("/api/all?from=2025-01-01&to=2025-01-31")
+
+            assert response.status_code == 200
+            mock_retrieve.assert_called_once_with(None, date_from="2025-01-01", date_to="2025-01-31")
+
     def test_category_endpoint(self, client):
         """Test /api/category endpoint."""
         with patch("src.app.logs_bot.retrieve_logs_en_to_ar") as mock_retrieve:
@@ -213,16 +227,16 @@ class TestTitleEndpoint:
                 data = json.loads(response.get_data(as_text=True))
                 assert "result" in data
 
-    def test_title_endpoint_library_not_loaded(self, client):
+    def test_title_endpoint_library_not_loaded(self, client, resolver_unavailable):
         """Test title endpoint handles library not loaded."""
-        with patch("src.app.routes.api.resolve_arabic_category_label", None):
-            with patch("src.app.routes.api.log_request"):
-                response = client.get(
-                    "/api/Category:Test",
-                    headers={"User-Agent": "TestAgent/1.0"}
-                )
+        with patch("src.app.routes.api.log_request") as mock_log:
+            response = client.get(
+                "/api/Category:Test",
+                headers={"User-Agent": "TestAgent/1.0"}
+            )
 
-                assert response.status_code == 500
+            assert response.status_code == 500
+            assert mock_log.call_args.args[2] == "error"
 
 
 class TestListEndpoint:
@@ -300,17 +314,17 @@ class TestListEndpoint:
                 data = json.loads(response.get_data(as_text=True))
                 assert data["duplicates"] == 2
 
-    def test_list_endpoint_library_not_loaded(self, client):
+    def test_list_endpoint_library_not_loaded(self, client, resolver_unavailable):
         """Test list endpoint handles library not loaded."""
-        with patch("src.app.routes.api.batch_resolve_labels", None):
-            with patch("src.app.routes.api.log_request"):
-                response = client.post(
-                    "/api/list",
-                    json={"titles": ["test"]},
-                    headers={"User-Agent": "TestAgent/1.0"}
-                )
+        with patch("src.app.routes.api.log_request") as mock_log:
+            response = client.post(
+                "/api/list",
+                json={"titles": ["test"]},
+                headers={"User-Agent": "TestAgent/1.0"}
+            )
 
-                assert response.status_code == 500
+            assert response.status_code == 500
+            assert mock_log.call_args.args[2] == "error"
 
     def test_list_endpoint_no_labels_added_to_results(self, client):
         """Test list endpoint adds no_labels entries to results with empty strings."""
@@ -333,3 +347,50 @@ class TestListEndpoint:
                 # Category:NotFound should be in results with empty string
                 assert "Category:NotFound" in data["results"]
                 assert data["results"]["Category:NotFound"] == ""
+
+
+class TestServerTiming:
+    """Tests for the Server-Timing header on API responses."""
+
+    @pytest.fixture
+    def client(self):
+        """Create Flask test client."""
+        from src.app import create_app
+        app = create_app()
+        app.config["TESTING"] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_title_endpoint_reports_phases(self, client):
+        """Test that /api/<title> reports parse, resolve, log and serialize phases."""
+        with patch("src.app.routes.api.resolve_arabic_category_label", return_value="تصنيف:اختبار"):
+            with patch("src.app.routes.api.log_request", return_value=True):
+                response = client.get("/api/Category:Test", headers={"User-Agent": "TestAgent/1.0"})
+
+        phases = [part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")]
+        assert phases == ["parse", "resolve", "log", "serialize", "total"]
+
+    def test_list_endpoint_reports_parse_phase(self, client):
+        """Test that /api/list also reports the parse phase."""
+        mock_result = MagicMock()
+        mock_result.labels = {}
+        mock_result.no_labels = []
+
+        with patch("src.app.routes.api.batch_resolve_labels", return_value=mock_result):
+            with patch("src.app.routes.api.log_request"):
+                response = client.post("/api/list", json={"titles": ["A"]}, headers={"User-Agent": "TestAgent/1.0"})
+
+        assert response.headers["Server-Timing"].startswith("parse;dur=")
+
+    def test_phase_timer_accumulates(self):
+        """Test that repeated phases add up."""
+        from src.app.timing import PhaseTimer
+
+        timer = PhaseTimer()
+        with timer.phase("log"):
+            pass
+        with timer.phase("log"):
+            pass
+
+        assert list(timer.phases) == ["log"]
+        assert "total;dur=" in timer.server_timing()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the archival of old log days.
+"""
+import pytest
+
+
+class TestArchiveOldDays:
+    """Tests for archive_old_days and reading the archived days back."""
+
+    @pytest.fixture
+    def archive_db(self, temp_logs_db):
+        """Create a database in a temporary main_path with one old day and today."""
+        db = temp_logs_db
+
+        rows = [
+            ("Category:Old1", "تصنيف:قديم", 3, "2020-01-05"),
+            ("Category:Old2", "no_result", 2, "2020-01-05"),
+            ("Category:Older", "no_result", 1, "2020-01-04"),
+        ]
+        for request_data, status, count, day in rows:
+            db.db_commit(
+                "INSERT INTO logs (endpoint, request_data, response_status, response_count, date_only) VALUES ('/api/<title>', ?, ?, ?, ?)",
+                [request_data, status, count, day],
+            )
+        db.db_commit(
+            "INSERT INTO logs (endpoint, request_data, response_status) VALUES ('/api/<title>', 'Category:Today', 'no_result')"
+        )
+
+        return db
+
+    def test_moves_old_days_out_of_the_table(self, archive_db):
+        """Test that old days are written to files and deleted, and today is kept."""
+        from src.app.logs_db import archive
+
+        done = archive.archive_old_days(30)
+
+        assert done == {"2020-01-04": 1, "2020-01-05": 2}
+        assert archive.day_file("logs", "2020-01-05").exists()
+        remaining = archive_db.fetch_all("SELECT request_data FROM logs")
+        assert [row["request_data"] for row in remaining] == ["Category:Today"]
+
+    def test_archived_days_are_still_queryable(self, archive_db):
+        """Test that all_logs_en2ar and fetch_logs_by_date include archived days."""
+        from src.app.logs_db import archive, bot
+
+        archive.archive_old_days(30)
+
+        assert bot.all_logs_en2ar(day="2020-01-05") == {
+            "Category:Old1": "تصنيف:قديم",
+            "Category:Old2": "no_result",
+        }
+        assert len(bot.all_logs_en2ar(date_from="2020-01-04", date_to="2020-01-04")) == 1
+        assert bot.all_logs_en2ar() == {"Category:Today": "no_result"}
+
+        by_date = [row for row in bot.fetch_logs_by_date() if row["date_only"] == "2020-01-05"]
+        assert {row["status_group"]: row["count"] for row in by_date} == {"Category": 3, "no_result": 2}
+
+    def test_newest_archived_label_wins(self, archive_db):
+        """Test that a title archived on several days keeps its latest label."""
+        from src.app.logs_db import archive, bot
+
+        archive_db.db_commit(
+            "INSERT INTO logs (endpoint, request_data, response_status, date_only) VALUES ('/api/<title>', ?, ?, ?)",
+            ["Category:Older", "تصنيف:أحدث", "2020-01-05"],
+        )
+        archive.archive_old_days(30)
+
+        assert bot.all_logs_en2ar(day="2020-01")["Category:Older"] == "تصنيف:أحدث"
+
+    def test_rerun_does_not_duplicate_rows(self, archive_db):
+        """Test that archiving the same day again merges by row id."""
+        from src.app.logs_db import archive
+
+        archive.archive_old_days(30)
+        rows = archive.read_day_file(archive.day_file("logs", "2020-01-05"))
+
+        archive.write_day_file(archive.day_file("logs", "2020-01-05"), list(rows))
+
+        assert len(archive.read_day_file(archive.day_file("logs", "2020-01-05"))) == 2
+
+    def test_status_catalogue_loses_archived_rows(self, archive_db):
+        """Test that archived rows are taken out of the status counts."""
+        from src.app.logs_db import archive, bot
+
+        assert bot.count_catalogued(status="no_result") == 3
+
+        archive.archive_old_days(30)
+
+        assert bot.count_catalogued(status="no_result") == 1
+        assert bot.count_catalogued(status="Category") == 0
+        assert bot.count_catalogued() == 1
+
+    def test_day_cache_is_bounded(self, archive_db, monkeypatch):
+        """Test that the cache of day files keeps at most ARCHIVE_CACHE_ROWS rows, dropping the oldest days."""
+        from src.app.logs_db import archive
+
+        archive.archive_old_days(30)
+        monkeypatch.setattr(archive, "ARCHIVE_CACHE_ROWS", 2)
+        monkeypatch.setattr(archive, "_cache", archive.OrderedDict())
+
+        archive.read_day_file(archive.day_file("logs", "2020-01-04"))
+        archive.read_day_file(archive.day_file("logs", "2020-01-05"))
+
+        assert archive.cached_rows() == 2
+        assert [key[0] for key in archive._cache] == [str(archive.day_file("logs", "2020-01-05"))]
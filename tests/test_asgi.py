@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the ASGI entry point and the background log writer.
+"""
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+
+def asgi_request(app, method, path, body=b"", headers=None, query_string=b""):
+    """Call an ASGI app once and return (status, headers, body)."""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+
+    start = sent[0]
+    return start["status"], dict((k.decode(), v.decode()) for k, v in start["headers"]), sent[1]["body"]
+
+
+def run_lifespan(app, *events):
+    messages = [{"type": f"lifespan.{event}"} for event in events]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(app({"type": "lifespan"}, receive, send))
+    return sent
+
+
+class TestAsgiApp:
+    """Tests for the Flask app served through AsgiApp."""
+
+    @pytest.fixture
+    def asgi_app(self):
+        from src.app import create_app
+        from src.app.asgi import create_asgi_app
+
+        app = create_app()
+        app.config["TESTING"] = True
+        return create_asgi_app(app, threads=2)
+
+    def test_get_title(self, asgi_app):
+        """Test that /api/<title> runs the Flask view with its headers."""
+        with patch("src.app.routes.api.resolve_arabic_category_label", return_value="تصنيف:اليمن"), patch(
+            "src.app.routes.api.log_request", return_value=True
+        ) as mock_log:
+            status, headers, body = asgi_request(
+                asgi_app, "GET", "/api/Category:Yemen", headers={"User-Agent": "test"}
+            )
+
+        assert status == 200
+        assert json.loads(body)["result"] == "تصنيف:اليمن"
+        assert "Server-Timing" in headers
+        assert mock_log.call_args.args[1] == "Category:Yemen"
+
+    def test_post_list(self, asgi_app):
+        """Test that the request body reaches the view."""
+        from types import SimpleNamespace
+
+        result = SimpleNamespace(labels={"Category:A": "تصنيف:أ"}, no_labels=[])
+
+        with patch("src.app.routes.api.batch_resolve_labels", return_value=result), patch(
+            "src.app.routes.api.log_request", return_value=True
+        ):
+            status, _, body = asgi_request(
+                asgi_app,
+                "POST",
+                "/api/list",
+                body=json.dumps({"titles": ["Category:A"]}).encode(),
+                headers={"User-Agent": "test", "Content-Type": "application/json"},
+            )
+
+        assert status == 200
+        assert json.loads(body)["results"] == {"Category:A": "تصنيف:أ"}
+
+    def test_query_string_and_unicode_path(self, asgi_app):
+        """Test that non-ASCII paths and query strings are passed as WSGI expects."""
+        with patch("src.app.routes.api.resolve_arabic_category_label", return_value="") as mock_resolve, patch(
+            "src.app.routes.api.log_request", return_value=True
+        ):
+            status, _, _ = asgi_request(
+                asgi_app, "GET", "/api/Category:Café", headers={"User-Agent": "test"}, query_string=b"x=1"
+            )
+
+        assert status == 200
+        assert mock_resolve.call_args.args[0] == "Category:Café"
+
+    def test_busy_returns_503(self):
+        """Test that requests beyond max_pending are refused at once."""
+        from src.app.asgi import AsgiApp
+
+        asgi_app = AsgiApp(lambda environ, start_response: [], max_pending=0)
+
+        status, headers, _ = asgi_request(asgi_app, "GET", "/api/Category:Yemen")
+
+        assert status == 503
+        assert headers["Retry-After"] == "1"
+
+    def test_lifespan_starts_and_stops_the_log_writer(self, asgi_app):
+        """Test the lifespan messages and that the writer is gone after shutdown."""
+        from src.app.logs_db import writer
+
+        assert run_lifespan(asgi_app, "startup", "shutdown") == [
+            "lifespan.startup.complete",
+            "lifespan.shutdown.complete",
+        ]
+        assert writer._writer is None
+
+
+class TestLogWriter:
+    """Tests for the queued log writes."""
+
+    @pytest.fixture
+    def temp_db(self, temp_logs_db):
+        """Point the logs database at a new temporary file."""
+        return temp_logs_db
+
+    def test_queued_rows_are_written_on_stop(self, temp_db):
+        """Test that log_request only queues while the writer runs, and stop writes the rest."""
+        from src.app.logs_db import bot, start_log_writer, stop_log_writer
+
+        start_log_writer()
+        try:
+            for _ in range(3):
+                assert bot.log_request("/api/<title>", "Category:A", "تصنيف:أ", 0.01) is True
+            bot.log_request("/api/list", ["Category:B"], "success", 0.02)
+        finally:
+            stop_log_writer()
+
+        logs = temp_db.fetch_all("SELECT request_data, response_count FROM logs")
+        list_logs = temp_db.fetch_all("SELECT request_data FROM list_logs")
+
+        assert logs == [{"request_data": "Category:A", "response_count": 3}]
+        assert list_logs == [{"request_data": "['Category:B']"}]
+
+    def test_full_queue_falls_back_to_direct_write(self):
+        """Test that put() refuses rows once the queue is full."""
+        from src.app.logs_db.writer import LogWriter
+
+        log_writer = LogWriter(write=lambda rows: True, max_queue=1)
+
+        assert log_writer.put(("/api/<title>", "A", "x", 0.1)) is True
+        assert log_writer.put(("/api/<title>", "B", "x", 0.1)) is False
+
+    def test_stop_with_full_queue_and_stuck_writer(self):
+        """Test that stop() returns after its timeout when the queue is full and the writer hangs."""
+        import threading
+        import time
+
+        from src.app.logs_db.writer import LogWriter
+
+        release = threading.Event()
+        log_writer = LogWriter(write=lambda rows: release.wait(), max_batch=1, max_queue=1)
+        log_writer.start()
+
+        log_writer.put(("/api/<title>", "A", "x", 0.1))
+        while not log_writer.queue.empty():
+            time.sleep(0.001)
+        log_writer.put(("/api/<title>", "B", "x", 0.1))
+
+        start_time = time.monotonic()
+        log_writer.stop(timeout=0.2)
+
+        assert time.monotonic() - start_time < 1
+        assert log_writer.thread.is_alive()
+
+        # Once the write returns, the thread empties the queue and ends without _STOP
+        release.set()
+        log_writer.thread.join(1)
+
+        assert not log_writer.thread.is_alive()
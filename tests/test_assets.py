@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the hashed, precompressed static files.
+"""
+import gzip
+import json
+
+import pytest
+
+
+class TestBuildAssets:
+    """Tests for build_assets."""
+
+    @pytest.fixture
+    def static_dir(self, tmp_path):
+        static = tmp_path / "static"
+        static.mkdir()
+        (static / "api.js").write_text("console.log('تصنيف');\n" * 50, encoding="utf-8")
+        (static / "style.css").write_text("body { color: red; }\n", encoding="utf-8")
+        return static
+
+    def test_hashed_files_and_variants(self, static_dir):
+        """Test the manifest, the hashed copies and the .gz variant."""
+        from src.app.assets import build_assets
+
+        manifest = build_assets(static_dir)
+        dist = static_dir / "dist"
+
+        assert set(manifest) == {"api.js", "style.css"}
+        assert manifest["api.js"].startswith("api.") and manifest["api.js"].endswith(".js")
+        assert (dist / manifest["api.js"]).read_bytes() == (static_dir / "api.js").read_bytes()
+        assert gzip.decompress((dist / f"{manifest['api.js']}.gz").read_bytes()) == (static_dir / "api.js").read_bytes()
+        assert json.loads((dist / "manifest.json").read_text(encoding="utf-8")) == manifest
+
+    def test_new_content_new_name_and_cleanup(self, static_dir):
+        """Test that a change gives a new name and only the previous build is kept."""
+        from src.app.assets import build_assets
+
+        first = build_assets(static_dir)["style.css"]
+        (static_dir / "style.css").write_text("body { color: blue; }\n", encoding="utf-8")
+        second = build_assets(static_dir)["style.css"]
+        (static_dir / "style.css").write_text("body { color: green; }\n", encoding="utf-8")
+        third = build_assets(static_dir)["style.css"]
+
+        dist = static_dir / "dist"
+
+        assert len({first, second, third}) == 3
+        assert not (dist / first).exists()
+        assert not (dist / f"{first}.gz").exists()
+        assert (dist / second).exists()
+        assert (dist / third).exists()
+
+
+class TestServeAssets:
+    """Tests for asset_url and /static/dist/."""
+
+    @pytest.fixture
+    def app(self, tmp_path):
+        from src.app import create_app
+        from src.app.assets import build_assets, load_manifest
+
+        static = tmp_path / "static"
+        static.mkdir()
+        (static / "theme.js").write_text("document.body.dataset.theme = 'dark';\n" * 40, encoding="utf-8")
+        build_assets(static)
+
+        app = create_app()
+        app.config["TESTING"] = True
+        app.config["ASSETS_DIR"] = str(static / "dist")
+        app.extensions["assets"] = load_manifest(static / "dist")
+        return app
+
+    def test_asset_url(self, app):
+        """Test that built files get the hashed URL and others the plain one."""
+        from src.app.assets import asset_url
+
+        with app.test_request_context("/"):
+            assert asset_url("theme.js") == f"/static/dist/{app.extensions['assets']['theme.js']}"
+            assert asset_url("style.css") == "/static/style.css"
+
+    def test_immutable_and_precompressed(self, app):
+        """Test the cache headers and the choice of the variant."""
+        url = f"/static/dist/{app.extensions['assets']['theme.js']}"
+        client = app.test_client()
+
+        plain = client.get(url, headers={"Accept-Encoding": ""})
+        gzipped = client.get(url, headers={"Accept-Encoding": "gzip"})
+
+        assert plain.status_code == 200
+        assert "immutable" in plain.headers["Cache-Control"]
+        assert "max-age=31536000" in plain.headers["Cache-Control"]
+        assert "Content-Encoding" not in plain.headers
+        assert gzipped.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(gzipped.data) == plain.data
+        assert gzipped.content_type.startswith("text/javascript")
+
+        plain.close()
+        gzipped.close()
+
+    def test_manifest_and_variants_not_served(self, app):
+        """Test that only the hashed files themselves have URLs."""
+        name = app.extensions["assets"]["theme.js"]
+        client = app.test_client()
+
+        assert client.get("/static/dist/manifest.json").status_code == 404
+        assert client.get(f"/static/dist/{name}.gz").status_code == 404
+        assert client.get("/static/dist/missing.0000000000.js").status_code == 404
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the cacheable GET batch endpoint, /api/batch.
+"""
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+class TestBatchEndpoint:
+    """Tests for /api/batch."""
+
+    @pytest.fixture
+    def client(self):
+        from src.app import create_app
+
+        app = create_app()
+        app.config["TESTING"] = True
+        with app.test_client() as client:
+            yield client
+
+    @pytest.fixture
+    def batch(self):
+        def resolve(titles):
+            result = MagicMock()
+            result.labels = {t: f"تصنيف:{t}" for t in titles if t != "Category:None"}
+            result.no_labels = [t for t in titles if t not in result.labels]
+            return result
+
+        with patch("src.app.routes.api.batch_resolve_labels", side_effect=resolve) as mock_batch:
+            yield mock_batch
+
+    def test_redirects_to_canonical_order(self, client, batch):
+        """Test that the titles are sorted, deduplicated and normalized in one URL."""
+        with patch("src.app.routes.api.log_request"):
+            response = client.get("/api/batch?titles=Category:B_c|Category:A|Category:A", headers={"User-Agent": "t"})
+
+        assert response.status_code == 301
+        assert response.location == "/api/batch?titles=Category:A%7CCategory:B+c"
+        assert not batch.called
+
+    def test_list_shape_and_cache_headers(self, client, batch):
+        """Test that the canonical URL answers like /api/list, with a weak ETag."""
+        with patch("src.app.routes.api.log_request") as mock_log:
+            response = client.get("/api/batch?titles=Category:A|Category:None", headers={"User-Agent": "t"})
+
+        data = json.loads(response.data)
+
+        assert response.status_code == 200
+        assert data["results"] == {"Category:A": "تصنيف:Category:A", "Category:None": ""}
+        assert (data["with_labs"], data["no_labs"], data["duplicates"]) == (1, 1, 0)
+        assert response.headers["ETag"].startswith('W/"')
+        assert "public" in response.headers["Cache-Control"]
+        assert "max-age=" in response.headers["Cache-Control"]
+        assert mock_log.call_args.args[0] == "/api/batch"
+
+    def test_not_modified(self, client, batch):
+        """Test that a matching If-None-Match gets 304 without resolving."""
+        url = "/api/batch?titles=Category:A"
+
+        with patch("src.app.routes.api.log_request"):
+            etag = client.get(url, headers={"User-Agent": "t"}).headers["ETag"]
+            response = client.get(url, headers={"User-Agent": "t", "If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert batch.call_count == 1
+
+    def test_etag_follows_resolver_version(self, client, batch):
+        """Test that a new ArWikiCats version gives a new ETag."""
+        url = "/api/batch?titles=Category:A"
+
+        with patch("src.app.routes.api.log_request"):
+            with patch("src.app.routes.api.resolver_version", return_value="1.0"):
+                old = client.get(url, headers={"User-Agent": "t"}).headers["ETag"]
+            with patch("src.app.routes.api.resolver_version", return_value="1.1"):
+                response = client.get(url, headers={"User-Agent": "t", "If-None-Match": old})
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != old
+
+    def test_title_count_bounded(self, client, batch):
+        """Test that an empty or too long list is refused."""
+        from src.app.routes import api
+
+        too_many = "|".join(f"Category:{i:03}" for i in range(api.BATCH_MAX_TITLES + 1))
+
+        with patch("src.app.routes.api.log_request"):
+            assert client.get("/api/batch?titles=", headers={"User-Agent": "t"}).status_code == 400
+            assert client.get(f"/api/batch?titles={too_many}", headers={"User-Agent": "t"}).status_code == 400
+
+        assert not batch.called
+
+    def test_logged_to_list_logs(self):
+        """Test that /api/batch requests go to the list_logs table."""
+        from src.app.logs_db.bot import log_table
+
+        assert log_table("/api/batch") == "list_logs"
+        assert log_table("/api/list") == "list_logs"
+        assert log_table("/api/<title>") == "logs"
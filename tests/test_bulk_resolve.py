@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the server-side re-resolution of no_result titles.
+"""
+import json
+import sqlite3
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _batch_result(labels, no_labels):
+    result = MagicMock()
+    result.labels = labels
+    result.no_labels = no_labels
+    return result
+
+
+class TestReresolveTitles:
+    """Tests for reresolve_titles."""
+
+    def test_splits_resolved_and_no_result(self):
+        """Test that titles are split into resolved and still unresolved."""
+        from src.app.bulk_resolve import reresolve_titles
+
+        with patch("src.app.bulk_resolve.batch_resolve_labels") as mock_batch:
+            mock_batch.return_value = _batch_result({"Category:A": "تصنيف:أ"}, ["Category:B"])
+
+            result = reresolve_titles(["Category:A", "Category:B"], workers=1)
+
+        assert result["resolved"] == {"Category:A": "تصنيف:أ"}
+        assert result["no_result"] == ["Category:B"]
+        assert result["total"] == 2
+        assert result["with_labs"] == 1
+
+    def test_normalized_titles(self):
+        """Test that labels keyed by the normalized title count for the titles that were sent."""
+        from src.app.bulk_resolve import reresolve_titles
+
+        with patch("src.app.bulk_resolve.batch_resolve_labels") as mock_batch:
+            mock_batch.return_value = _batch_result(
+                {"Category:1990 births": "تصنيف:مواليد 1990", "Category:1991 births": "تصنيف:مواليد 1991"},
+                ["Category:1992 births"],
+            )
+
+            result = reresolve_titles(
+                ["Category:1990_births", "\ufeffCategory:1991 births", "Category:1992_births"], workers=1
+            )
+
+        assert result["resolved"] == {
+            "Category:1990_births": "تصنيف:مواليد 1990",
+            "\ufeffCategory:1991 births": "تصنيف:مواليد 1991",
+        }
+        assert result["no_result"] == ["Category:1992_births"]
+        assert result["total"] == 3
+        assert result["with_labs"] + result["no_labs"] == result["total"]
+
+    def test_resolves_in_chunks(self):
+        """Test that titles are sent to the resolver in chunks."""
+        from src.app.bulk_resolve import reresolve_titles
+
+        with patch("src.app.bulk_resolve.batch_resolve_labels") as mock_batch:
+            mock_batch.return_value = _batch_result({}, [])
+
+            reresolve_titles([f"Category:{i}" for i in range(5)], workers=1, chunk_size=2)
+
+        assert mock_batch.call_count == 3
+
+    def test_library_not_loaded(self, resolver_unavailable):
+        """Test that a missing library raises ResolverUnavailable before any chunk is sent."""
+        from src.app.bulk_resolve import reresolve_titles
+
+        with pytest.raises(resolver_unavailable.ResolverUnavailable):
+            reresolve_titles(["Category:A"], workers=4)
+
+
+class TestGetNoResultTitles:
+    """Tests for get_no_result_titles."""
+
+    @pytest.fixture
+    def temp_db(self, tmp_path):
+        """Create temp database with no_result rows on two days."""
+        db_file = tmp_path / "test_no_result.db"
+        conn = sqlite3.connect(str(db_file))
+        conn.execute("""
+            CREATE TABLE logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                endpoint TEXT NOT NULL,
+                request_data TEXT NOT NULL,
+                response_status TEXT NOT NULL,
+                response_time REAL,
+                response_count INTEGER DEFAULT 1,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                date_only DATE DEFAULT (DATE('now'))
+            );
+        """)
+        rows = [
+            ("Category:A", "no_result", 1, "2025-01-26"),
+            ("Category:A", "no_result", 1, "2025-01-27"),
+            ("Category:B", "no_result", 5, "2025-01-27"),
+            ("Category:C", "تصنيف:ج", 9, "2025-01-27"),
+        ]
+        conn.executemany(
+            "INSERT INTO logs (endpoint, request_data, response_status, response_count, date_only) VALUES ('/api/<title>', ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+        conn.close()
+        yield str(db_file)
+
+    def test_distinct_titles_by_popularity(self, temp_db):
+        """Test that titles are distinct and ordered by total requests."""
+        from src.app.logs_db import bot, db
+
+        original_path = db.db_path_main[1]
+        db.db_path_main[1] = temp_db
+
+        try:
+            assert bot.get_no_result_titles() == ["Category:B", "Category:A"]
+            assert bot.get_no_result_titles(limit=1) == ["Category:B"]
+            assert bot.get_no_result_titles(day="2025-01-26") == ["Category:A"]
+        finally:
+            db.db_path_main[1] = original_path
+
+
+class TestResolveNoResultEndpoint:
+    """Tests for the POST /api/no_result/resolve endpoint."""
+
+    @pytest.fixture
+    def app(self):
+        """Create the Flask app."""
+        from src.app import create_app
+        app = create_app()
+        app.config["TESTING"] = True
+        return app
+
+    @pytest.fixture
+    def client(self, app):
+        """Create Flask test client."""
+        with app.test_client() as client:
+            yield client
+
+    def test_returns_diff_without_logging(self, client):
+        """Test that the endpoint returns the diff, resolves in-process and does not log user traffic."""
+        diff = {"total": 1, "resolved": {"Category:A": "تصنيف:أ"}, "no_result": []}
+
+        with patch("src.app.routes.api.reresolve_no_result", return_value=diff) as mock_run:
+            with patch("src.app.routes.api.log_request") as mock_log:
+                response = client.post(
+                    "/api/no_result/resolve",
+                    json={"day": "2025-01-27", "limit": 10},
+                )
+
+        assert response.status_code == 200
+        assert json.loads(response.get_data(as_text=True))["resolved"] == {"Category:A": "تصنيف:أ"}
+        assert mock_run.call_args.kwargs == {"day": "2025-01-27", "limit": 10, "workers": 1}
+        mock_log.assert_not_called()
+
+    def test_limit_is_capped(self, client):
+        """Test that the limit is capped at RESOLVE_MAX_TITLES."""
+        from src.app.routes.api import RESOLVE_MAX_TITLES
+
+        with patch("src.app.routes.api.reresolve_no_result", return_value={}) as mock_run:
+            client.post("/api/no_result/resolve", json={"limit": 100000})
+
+        assert mock_run.call_args.kwargs["limit"] == RESOLVE_MAX_TITLES
+
+    def test_open_without_token(self, app, client):
+        """Test that the endpoint needs no PROFILE_TOKEN, set or not."""
+        app.config["PROFILE_TOKEN"] = "secret"
+
+        with patch("src.app.routes.api.reresolve_titles", return_value={}) as mock_titles:
+            response = client.post("/api/no_result/resolve", json={"titles": ["Category:A"]})
+
+        assert response.status_code == 200
+        mock_titles.assert_called_once()
+
+    def test_rate_limited(self, client):
+        """Test that a client out of batch tokens gets 429, without a log row."""
+        with patch("src.app.routes.api.check_rate_limit", return_value=3.5) as mock_check:
+            with patch("src.app.routes.api.reresolve_no_result") as mock_run:
+                with patch("src.app.routes.api.log_request") as mock_log:
+                    response = client.post(
+                        "/api/no_result/resolve", json={"limit": 50}
+                    )
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "4"
+        assert mock_check.call_args.args == ("batch", 50)
+        mock_run.assert_not_called()
+        mock_log.assert_not_called()
+
+    def test_resolves_given_titles(self, client):
+        """Test that the titles of the rows a table shows are resolved instead of the top of the no_result set."""
+        diff = {"total": 2, "resolved": {}, "no_result": ["Category:B", "Category:A"]}
+
+        with patch("src.app.routes.api.reresolve_titles", return_value=diff) as mock_titles:
+            with patch("src.app.routes.api.reresolve_no_result") as mock_set:
+                with patch("src.app.routes.api.check_rate_limit", return_value=0) as mock_check:
+                    response = client.post(
+                        "/api/no_result/resolve",
+                        json={"titles": ["Category:B", "Category:A", "Category:B"]},
+                        )
+
+        assert response.status_code == 200
+        assert mock_titles.call_args.args == (["Category:B", "Category:A"],)
+        assert mock_check.call_args.args == ("batch", 2)
+        mock_set.assert_not_called()
+
+    def test_invalid_titles(self, client):
+        """Test that titles must be a non-empty list of strings within RESOLVE_MAX_TITLES."""
+        from src.app.routes.api import RESOLVE_MAX_TITLES
+
+        too_many = [f"Category:{i}" for i in range(RESOLVE_MAX_TITLES + 1)]
+
+        for titles in ("Category:A", [1], [], too_many):
+            response = client.post("/api/no_result/resolve", json={"titles": titles})
+
+            assert response.status_code == 400
+
+    def test_invalid_limit(self, client):
+        """Test that a non-integer limit is rejected."""
+        response = client.post("/api/no_result/resolve", json={"limit": "all"})
+
+        assert response.status_code == 400
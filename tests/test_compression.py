@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the negotiated gzip / brotli compression of responses.
+"""
+import gzip
+import json
+
+import pytest
+from flask import Response
+
+
+class TestCompression:
+    """Tests for compress_response."""
+
+    @pytest.fixture
+    def app(self, temp_logs_db):
+        """Create the app with two extra routes: a large JSON body and a streamed one."""
+        from src.app import create_app
+
+        app = create_app()
+        app.config["TESTING"] = True
+
+        @app.route("/test/large")
+        def large():
+            data = {f"Category:{i}": f"تصنيف:{i}" for i in range(500)}
+            response = Response(json.dumps(data, ensure_ascii=False), content_type="application/json; charset=utf-8")
+            response.set_etag("v1")
+            return response
+
+        @app.route("/test/small")
+        def small():
+            return Response('{"result": "تصنيف:اليمن"}', content_type="application/json")
+
+        @app.route("/test/stream")
+        def stream():
+            def generate():
+                for i in range(100):
+                    yield f"line {i} تصنيف\n"
+
+            return Response(generate(), mimetype="text/plain")
+
+        return app
+
+    def test_gzip(self, app):
+        """Test that a large JSON body is gzipped when the client asks for it."""
+        client = app.test_client()
+
+        plain = client.get("/test/large").data
+        response = client.get("/test/large", headers={"Accept-Encoding": "gzip, deflate"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert gzip.decompress(response.data) == plain
+        assert int(response.headers["Content-Length"]) == len(response.data) < len(plain)
+
+    def test_no_accept_encoding(self, app):
+        """Test that clients without Accept-Encoding get the body as it is."""
+        response = app.test_client().get("/test/large", headers={"Accept-Encoding": ""})
+
+        assert "Content-Encoding" not in response.headers
+        assert json.loads(response.data)["Category:1"] == "تصنيف:1"
+
+    def test_small_body_not_compressed(self, app):
+        """Test the minimum size."""
+        response = app.test_client().get("/test/small", headers={"Accept-Encoding": "gzip"})
+
+        assert "Content-Encoding" not in response.headers
+        assert "Accept-Encoding" in response.headers["Vary"]
+
+    def test_q_values(self, app):
+        """Test that the client's preference wins and q=0 refuses an encoding."""
+        client = app.test_client()
+        app.config["COMPRESSION"] = ["br", "gzip"]
+
+        preferred = client.get("/test/large", headers={"Accept-Encoding": "br;q=0.5, gzip;q=1"})
+        refused = client.get("/test/large", headers={"Accept-Encoding": "gzip;q=0"})
+
+        assert preferred.headers["Content-Encoding"] == "gzip"
+        assert "Content-Encoding" not in refused.headers
+
+    def test_brotli(self, app):
+        """Test that brotli is preferred when installed."""
+        brotli = pytest.importorskip("brotli")
+        client = app.test_client()
+
+        plain = client.get("/test/large").data
+        response = client.get("/test/large", headers={"Accept-Encoding": "gzip, br"})
+
+        assert response.headers["Content-Encoding"] == "br"
+        assert brotli.decompress(response.data) == plain
+
+    def test_streamed_response(self, app):
+        """Test that a streamed response stays streamed and decompresses to the whole body."""
+        response = app.test_client().get("/test/stream", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in response.headers
+        assert response.is_streamed
+        assert gzip.decompress(response.data).decode("utf-8").splitlines()[-1] == "line 99 تصنيف"
+
+    def test_etag_becomes_weak(self, app):
+        """Test that a strong ETag is weakened on the compressed body."""
+        response = app.test_client().get("/test/large", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["ETag"] == 'W/"v1"'
+
+    def test_disabled(self, temp_logs_db, monkeypatch):
+        """Test that COMPRESSION= turns it off."""
+        from src.app import create_app
+
+        monkeypatch.setenv("COMPRESSION", "")
+        app = create_app()
+
+        response = app.test_client().get("/api/logs?per_page=200", headers={"Accept-Encoding": "gzip"})
+
+        assert "Content-Encoding" not in response.headers
@@ -212,6 +212,39 @@ class TestAllLogsEn2Ar:
         finally:
             db.db_path_main[1] = original_path
 
+    def test_all_logs_en2ar_with_date_range(self, temp_db_with_logs):
+        """Test all_logs_en2ar with from/to bounds (inclusive)."""
+        from src.app.logs_db import db, bot
+
+        original_path = db.db_path_main[1]
+        db.db_path_main[1] = temp_db_with_logs
+
+        try:
+            assert len(bot.all_logs_en2ar(date_from="2025-01-27")) == 2
+            assert len(bot.all_logs_en2ar(date_to="2025-01-26")) == 1
+            assert len(bot.all_logs_en2ar(date_from="2025-01-26", date_to="2025-01-27")) == 3
+        finally:
+            db.db_path_main[1] = original_path
+
+    def test_closed_month_uses_snapshot(self, temp_db_with_logs):
+        """Test that a closed month is stored once and then served from its snapshot."""
+        from src.app.logs_db import db, bot
+
+        original_path = db.db_path_main[1]
+        db.db_path_main[1] = temp_db_with_logs
+
+        try:
+            db.init_db()
+            first = bot.all_logs_en2ar(day="2025-01")
+
+            db.db_commit("DELETE FROM logs")
+            second = bot.all_logs_en2ar(day="2025-01")
+
+            assert second == first
+            assert len(second) == 3
+        finally:
+            db.db_path_main[1] = original_path
+
 
 class TestFetchLogsByDate:
     """Tests for fetch_logs_by_date function."""
@@ -406,3 +439,70 @@ class TestInitDb:
             assert "list_logs" in tables
         finally:
             db.db_path_main[1] = original_path
+
+
+class TestStatusCatalogue:
+    """Tests for the status catalogue maintained by init_db's triggers."""
+
+    @pytest.fixture
+    def catalogue_db(self, tmp_path):
+        """Create a database with rows written before the catalogue existed."""
+        from src.app.logs_db import db
+
+        db_file = tmp_path / "test_catalogue.db"
+        original_path = db.db_path_main[1]
+        db.db_path_main[1] = str(db_file)
+
+        db.db_commit("""
+            CREATE TABLE logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                endpoint TEXT NOT NULL,
+                request_data TEXT NOT NULL,
+                response_status TEXT NOT NULL,
+                response_time REAL,
+                response_count INTEGER DEFAULT 1,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                date_only DATE DEFAULT (DATE('now')),
+                UNIQUE(request_data, response_status, date_only)
+            );
+        """)
+        for i in range(3):
+            db.db_commit(
+                "INSERT INTO logs (endpoint, request_data, response_status) VALUES (?, ?, ?)",
+                ["/api/<title>", f"old_{i}", "no_result"],
+            )
+
+        try:
+            yield db
+        finally:
+            db.db_path_main[1] = original_path
+
+    def _numbers(self, db, status_group):
+        row = db.fetch_all(
+            "SELECT numbers FROM status_catalogue WHERE table_name = 'logs' AND status_group = ?",
+            [status_group],
+            fetch_one=True,
+        )
+        return row["numbers"] if row else 0
+
+    def test_init_db_backfills_existing_rows(self, catalogue_db):
+        """Test that the first init_db counts the rows already in the table."""
+        catalogue_db.init_db()
+        catalogue_db.init_db()
+
+        assert self._numbers(catalogue_db, "no_result") == 3
+
+    def test_new_rows_update_catalogue(self, catalogue_db):
+        """Test that only new rows are counted, with labels grouped as Category."""
+        from src.app.logs_db import bot
+
+        catalogue_db.init_db()
+
+        bot.log_request("/api/<title>", "new", "no_result", 0.1)
+        bot.log_request("/api/<title>", "new", "no_result", 0.1)
+        for i in range(3):
+            bot.log_request("/api/<title>", f"label_{i}", f"تصنيف:{i}", 0.1)
+
+        assert self._numbers(catalogue_db, "no_result") == 4
+        assert self._numbers(catalogue_db, "Category") == 3
+        assert bot.get_response_status() == ["no_result", "Category"]
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the per-day latency histogram.
+"""
+import pytest
+
+
+class TestHistogramPercentile:
+    """Tests for the bucketed percentile helpers."""
+
+    def test_percentile_is_the_bucket_bound(self):
+        """Test that the percentile is the upper bound of the bucket holding the rank."""
+        from src.app.stats import histogram_percentile, histogram_summary
+
+        bounds = (0.01, 0.1, 1.0)
+        counts = [50, 40, 9, 1]
+
+        assert histogram_percentile(bounds, counts, 50, 3.0) == 0.01
+        assert histogram_percentile(bounds, counts, 90, 3.0) == 0.1
+        assert histogram_percentile(bounds, counts, 99, 3.0) == 1.0
+        assert histogram_percentile(bounds, counts, 100, 3.0) == 3.0
+        assert histogram_summary(bounds, [0, 0, 0, 0], 0.0)["p50"] == 0.0
+
+    def test_percentile_capped_at_max(self):
+        """Test that a bucket bound above the largest value is replaced by the max."""
+        from src.app.stats import histogram_percentile
+
+        assert histogram_percentile((0.01, 0.1), [0, 4, 0], 50, 0.05) == 0.05
+
+
+class TestLatencyHistogramTriggers:
+    """Tests for the triggers that fill latency_histogram."""
+
+    @pytest.fixture
+    def temp_db(self, temp_logs_db):
+        """Point the logs database at a new temporary file."""
+        return temp_logs_db
+
+    def test_every_logged_request_is_counted(self, temp_db):
+        """Test that new rows and upsert hits both add to the histogram."""
+        from src.app.logs_bot import latency_by_day
+        from src.app.logs_db import get_latency_histogram, log_request
+
+        log_request("/api/<title>", "Category:A", "no_result", 0.004)
+        log_request("/api/<title>", "Category:A", "no_result", 0.2)
+        log_request("/api/<title>", "Category:B", "no_result", 0.004)
+        log_request("/api/list", ["Category:A"], "success", 3.0)
+
+        rows = get_latency_histogram(endpoint="/api/<title>")
+
+        assert sum(row["hits"] for row in rows) == 3
+
+        day, by_endpoint = next(iter(latency_by_day().items()))
+
+        assert by_endpoint["/api/<title>"]["count"] == 3
+        assert by_endpoint["/api/<title>"]["p50"] == 0.005
+        assert by_endpoint["/api/<title>"]["max"] == 0.2
+        assert by_endpoint["/api/list"]["p99"] == 3.0
+
+    def test_logs_by_day_includes_latency(self, temp_db):
+        """Test that /api/logs_by_day returns the latency summary of each day."""
+        from src.app import create_app
+        from src.app.logs_db import log_request
+
+        log_request("/api/<title>", "Category:A", "no_result", 0.02)
+
+        app = create_app()
+        app.config["TESTING"] = True
+
+        data = app.test_client().get("/api/logs_by_day").get_json()
+
+        assert data[0]["latency"]["/api/<title>"]["p50"] == 0.02
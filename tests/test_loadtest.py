@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the traffic replay load tester.
+"""
+import sqlite3
+from collections import Counter
+
+import pytest
+
+
+class TestWorkload:
+    """Tests for building the request mix from a logs database."""
+
+    @pytest.fixture
+    def logs_db_path(self, temp_logs_db):
+        """Create a logs database with a popular title, a rare one and two logged batches."""
+        db = temp_logs_db
+
+        rows = [
+            ("logs", "Category:Popular", 90, "2025-01-01"),
+            ("logs", "Category:Rare", 10, "2025-01-01"),
+            ("logs", "Category:Other day", 5, "2025-02-01"),
+            ("list_logs", str(["Category:A", "Category:B"]), 20, "2025-01-01"),
+            ("list_logs", str(["Category:C"]), 5, "2025-01-01"),
+            ("list_logs", "not a list", 7, "2025-01-01"),
+        ]
+        for table, request_data, count, day in rows:
+            db.db_commit(
+                f"INSERT INTO {table} (endpoint, request_data, response_status, response_count, date_only) VALUES ('/api/list', ?, 'success', ?, ?)",
+                [request_data, count, day],
+            )
+
+        return db.db_path_main[1]
+
+    def test_load_workload(self, logs_db_path):
+        """Test that titles and parsed batches come with their counts, filtered by day."""
+        from benchmarks.loadtest import load_workload, workload_summary
+
+        workload = load_workload(logs_db_path, day="2025-01")
+
+        assert sorted(workload["singles"]) == [("Category:Popular", 90), ("Category:Rare", 10)]
+        assert sorted(workload["batches"]) == [(["Category:A", "Category:B"], 20), (["Category:C"], 5)]
+        assert workload_summary(workload)["batch_share"] == 0.2
+
+    def test_request_stream_follows_the_weights(self, logs_db_path):
+        """Test that the generated stream keeps the popularity skew and is reproducible."""
+        from benchmarks.loadtest import load_workload, request_stream
+
+        workload = load_workload(logs_db_path, day="2025-01")
+
+        stream = list(request_stream(workload, 2000, seed=1, batch_share=0.0))
+        counts = Counter(title for _, title in stream)
+
+        assert counts["Category:Popular"] > 5 * counts["Category:Rare"]
+        assert stream == list(request_stream(workload, 2000, seed=1, batch_share=0.0))
+
+    def test_parse_batch(self):
+        """Test parsing the str(list) form of list_logs.request_data."""
+        from benchmarks.loadtest import parse_batch
+
+        assert parse_batch("['Category:A', 'Category:B']") == ["Category:A", "Category:B"]
+        assert parse_batch("[]") is None
+        assert parse_batch("Category:A") is None
+
+
+class TestBuildReport:
+    """Tests for build_report."""
+
+    def test_error_rates(self):
+        """Test that 4xx/5xx and connection failures count as errors."""
+        from benchmarks.loadtest import build_report
+
+        results = [
+            {"kind": "single", "status": 200, "time": 0.01, "lag": 0.0},
+            {"kind": "single", "status": 500, "time": 0.02, "lag": 0.0},
+            {"kind": "batch", "status": "connection", "time": 1.0, "lag": 0.0},
+            {"kind": "batch", "status": 200, "time": 0.5, "lag": 0.0},
+        ]
+
+        report = build_report(results, wall=2.0, rate=2)
+
+        assert report["throughput"] == 2.0
+        assert report["kinds"]["single"]["error_rate"] == 0.5
+        assert report["kinds"]["batch"]["statuses"] == {"connection": 1, "200": 1}
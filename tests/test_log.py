@@ -61,6 +61,28 @@ class TestAddStatus:
         assert "date_only = ?" in result_query
         assert "2025-01-27" in result_params
 
+    def test_add_status_with_month(self):
+        """Test add_status turns a month into a date_only range."""
+        from src.app.logs_db.bot import add_status
+
+        result_query, result_params = add_status("SELECT * FROM logs", [], day="2024-12")
+
+        assert "date_only >= ? AND date_only < ?" in result_query
+        assert "strftime" not in result_query
+        assert result_params == ["2024-12-01", "2025-01-01"]
+
+    def test_add_status_with_from_to(self):
+        """Test add_status adds inclusive from/to bounds."""
+        from src.app.logs_db.bot import add_status
+
+        result_query, result_params = add_status(
+            "SELECT * FROM logs", [], date_from="2025-01-01", date_to="2025-01-31"
+        )
+
+        assert "date_only >= ?" in result_query
+        assert "date_only <= ?" in result_query
+        assert result_params == ["2025-01-01", "2025-01-31"]
+
     def test_add_status_with_invalid_day(self):
         """Test add_status ignores invalid day format."""
         from src.app.logs_db.bot import add_status
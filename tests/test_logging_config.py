@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the logging configuration.
+"""
+import json
+import logging
+import os
+import time
+
+import pytest
+
+
+class TestFormatColoredText:
+    """Tests for format_colored_text."""
+
+    def test_color_tags(self):
+        """Test that color tags become ANSI codes and 'previous' restores the color."""
+        from src.app.logging_config import format_colored_text
+
+        assert format_colored_text("a <<red>>b<<previous>> c") == "a \033[91mb\033[00m c"
+        assert format_colored_text("no tags") == "no tags"
+        assert format_colored_text(5) == 5
+
+
+class TestSetupLogging:
+    """Tests for the plain, JSON and queued logging setups."""
+
+    def test_json_format_includes_extra_fields(self, tmp_path):
+        """Test that the JSON file log has one object per line with the extra fields."""
+        from src.app.logging_config import setup_logging
+
+        log_file = tmp_path / "app.log"
+        setup_logging(level="INFO", name="test_json_logger", log_file=str(log_file), log_format="json")
+        logger = logging.getLogger("test_json_logger")
+
+        logger.info("GET %s", "/api/x", extra={"duration_ms": 1.5})
+        logger.debug("not written")
+        for handler in logger.handlers:
+            handler.flush()
+
+        lines = log_file.read_text(encoding="utf-8").splitlines()
+        data = json.loads(lines[0])
+
+        assert len(lines) == 1
+        assert data["message"] == "GET /api/x"
+        assert data["level"] == "INFO"
+        assert data["duration_ms"] == 1.5
+
+    def test_queue_writes_on_listener_thread(self, tmp_path):
+        """Test that with use_queue the logger only has a QueueHandler and records still reach the file."""
+        import logging.handlers
+
+        from src.app.logging_config import setup_logging
+
+        log_file = tmp_path / "queued.log"
+        setup_logging(level="INFO", name="test_queue_logger", log_file=str(log_file), log_format="plain", use_queue=True)
+        logger = logging.getLogger("test_queue_logger")
+
+        logger.warning("queued message")
+        queue_handler = logger.handlers[0]
+
+        assert isinstance(queue_handler, logging.handlers.QueueHandler)
+
+        # The listener drains the queue on a background thread
+        err_file = log_file.with_suffix(".err")
+        for _ in range(100):
+            if err_file.exists() and "queued message" in err_file.read_text(encoding="utf-8"):
+                break
+            time.sleep(0.01)
+
+        assert "queued message" in log_file.read_text(encoding="utf-8")
+        assert "queued message" in err_file.read_text(encoding="utf-8")
+
+    def test_from_env(self, monkeypatch):
+        """Test that LOG_LEVEL and LOG_FORMAT are read from the environment."""
+        from src.app.logging_config import JsonFormatter, setup_logging_from_env
+
+        monkeypatch.setenv("LOG_LEVEL", "WARNING")
+        monkeypatch.setenv("LOG_FORMAT", "json")
+        setup_logging_from_env(name="test_env_logger")
+        logger = logging.getLogger("test_env_logger")
+
+        assert logger.level == logging.WARNING
+        assert isinstance(logger.handlers[0].formatter, JsonFormatter)
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+    def test_queue_in_forked_child(self, tmp_path):
+        """Test that a child forked after the first record starts its own listener and writes its records."""
+        from src.app.logging_config import setup_logging
+
+        log_file = tmp_path / "forked.log"
+        setup_logging(level="INFO", name="test_fork_logger", log_file=str(log_file), log_format="plain", use_queue=True)
+        logger = logging.getLogger("test_fork_logger")
+        queue_handler = logger.handlers[0]
+
+        # The listener thread of this process is running, as in a preloading master
+        logger.info("from the parent")
+        pid = os.fork()
+
+        if pid == 0:
+            logger.info("from the child")
+            queue_handler.stop()
+            os._exit(0)
+
+        os.waitpid(pid, 0)
+        queue_handler.stop()
+
+        text = log_file.read_text(encoding="utf-8")
+
+        assert "from the parent" in text
+        assert "from the child" in text
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the DataTables server-side mode of /api/logs.
+"""
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture
+def logs_db(temp_logs_db):
+    """A logs database with a few rows, used by the app for the test."""
+    db = temp_logs_db
+
+    rows = [
+        ("/api/<title>", "Category:Yemen", "تصنيف:اليمن", 5, "2025-01-27"),
+        ("/api/<title>", "Category:Yemeni_people", "تصنيف:يمنيون", 2, "2025-01-27"),
+        ("/api/<title>", "Category:Films", "no_result", 9, "2025-01-26"),
+        ("/api/<title>", "Category:Football", "no_result", 1, "2025-01-27"),
+        ("/api/<title>", "Category:Zoos", "no_result", 4, "2025-01-25"),
+    ]
+    conn = sqlite3.connect(db.db_path_main[1])
+    conn.executemany(
+        "INSERT INTO logs (endpoint, request_data, response_status, response_count, date_only) VALUES (?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+    return db
+
+
+class TestLogsDataTables:
+    """Tests for /api/logs?draw=..."""
+
+    COLUMNS = "&".join(
+        f"columns[{i}][data]={name}"
+        for i, name in enumerate(["id", "request_data", "response_status", "response_time", "response_count"])
+    )
+
+    @pytest.fixture
+    def client(self, logs_db):
+        from src.app import create_app
+
+        app = create_app()
+        app.config["TESTING"] = True
+        with app.test_client() as client:
+            yield client
+
+    def get(self, client, query):
+        return client.get(f"/api/logs?{self.COLUMNS}&{query}").get_json()
+
+    def test_page_and_counts(self, client):
+        """Test the protocol fields and one sorted page."""
+        data = self.get(client, "draw=7&start=1&length=2&order[0][column]=4&order[0][dir]=desc")
+
+        assert data["draw"] == 7
+        assert data["recordsTotal"] == 5
+        assert data["recordsFiltered"] == 5
+        assert [row["response_count"] for row in data["data"]] == [5, 4]
+        assert data["data"][0]["request_data"] == "Category:Yemen"
+
+    def test_status_filter(self, client):
+        """Test that the status parameter of /logs filters the rows and the count."""
+        data = self.get(client, "draw=1&start=0&length=10&order[0][column]=4&order[0][dir]=asc&status=no_result")
+
+        assert data["recordsTotal"] == 5
+        assert data["recordsFiltered"] == 3
+        assert [row["request_data"] for row in data["data"]] == ["Category:Football", "Category:Zoos", "Category:Films"]
+
+    def test_search_matches_title_start(self, client):
+        """Test that the search box matches the start of the title, in either spelling, without "Category:"."""
+        data = self.get(client, "draw=1&start=0&length=10&search[value]=Yemeni people")
+
+        assert data["recordsFiltered"] == 1
+        assert data["data"][0]["request_data"] == "Category:Yemeni people"
+
+        data = self.get(client, "draw=1&start=0&length=10&search[value]=Yemen")
+
+        assert data["recordsFiltered"] == 2
+
+    def test_counts_from_status_catalogue(self, client):
+        """Test that the table and status counts are read from the status catalogue, without a COUNT(*) of the table."""
+        with patch("src.app.logs_db.count_all", side_effect=AssertionError("COUNT(*) over the table")):
+            data = self.get(client, "draw=1&start=0&length=2&status=no_result")
+            data_all = self.get(client, "draw=2&start=0&length=2")
+
+        assert data["recordsTotal"] == 5
+        assert data["recordsFiltered"] == 3
+        assert data_all["recordsFiltered"] == 5
+
+    def test_offset_is_capped(self, client):
+        """Test that a page starting past MAX_OFFSET reads no rows and reports an error to the table."""
+        from src.app.logs_bot import MAX_OFFSET
+
+        with patch("src.app.logs_db.get_logs") as mock_get_logs:
+            data = self.get(client, f"draw=3&start={MAX_OFFSET + 10}&length=10")
+
+        assert data["data"] == []
+        assert data["recordsTotal"] == 5
+        assert "error" in data
+        mock_get_logs.assert_not_called()
+
+    def test_invalid_values(self, client):
+        """Test that unknown columns and out of range lengths fall back to safe values."""
+        data = self.get(client, "draw=x&start=-5&length=-1&order[0][column]=99&order[0][dir]=sideways")
+
+        assert data["draw"] == 0
+        assert len(data["data"]) == 5
+
+    def test_paged_mode_unchanged(self, client):
+        """Test that /api/logs without draw keeps its page/per_page format."""
+        data = client.get("/api/logs?per_page=2").get_json()
+
+        assert set(data) >= {"logs", "tab", "status_table"}
+        assert len(data["logs"]) == 2
+
+
+class TestLogsQueryPlans:
+    """The queries of the paged log views read indexes, not the whole table."""
+
+    def plan(self, logs_db, query, params):
+        conn = sqlite3.connect(logs_db.db_path_main[1])
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        conn.close()
+        return [row[3] for row in rows]
+
+    @pytest.mark.parametrize(
+        "filters, order_by, index",
+        [
+            ({}, "response_count", "logs_response_count"),
+            ({}, "timestamp", "logs_timestamp"),
+            ({"status": "no_result"}, "response_count", "logs_status_count"),
+            ({"search": "Yemen"}, "response_count", "sqlite_autoindex_logs_1"),
+        ],
+    )
+    def test_page_query_uses_index(self, logs_db, filters, order_by, index):
+        """Test that a page of rows is read through an index, and only a search sorts its matches."""
+        from src.app.logs_db.bot import add_status
+
+        query, params = add_status("SELECT * FROM logs ", [], **filters)
+        plan = self.plan(logs_db, f"{query} ORDER BY {order_by} DESC, id DESC LIMIT 10", params)
+
+        assert any(f"USING INDEX {index}" in line for line in plan)
+        assert all("USING" in line for line in plan if line.startswith(("SCAN", "SEARCH")))
+        assert any("TEMP B-TREE" in line for line in plan) == ("search" in filters)
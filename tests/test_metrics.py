@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the Prometheus /metrics endpoint.
+"""
+import os
+import sys
+import types
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+
+class TestMetricsEndpoint:
+    """Tests for /metrics."""
+
+    @pytest.fixture
+    def client(self):
+        """Create Flask test client."""
+        from src.app import create_app
+        app = create_app()
+        app.config["TESTING"] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_counts_requests_by_url_rule(self, client):
+        """Test that requests are counted per URL rule, not per title."""
+        with patch("src.app.routes.api.resolve_arabic_category_label", return_value="تصنيف:اختبار"):
+            with patch("src.app.routes.api.log_request", return_value=True):
+                client.get("/api/Category:Test", headers={"User-Agent": "TestAgent/1.0"})
+
+        response = client.get("/metrics")
+        text = response.get_data(as_text=True)
+
+        assert response.status_code == 200
+        assert 'arwikicats_requests_total{endpoint="/api/<title>",method="GET",status="200"}' in text
+        assert 'arwikicats_resolver_duration_seconds_count{endpoint="/api/<title>"}' in text
+        assert 'arwikicats_db_write_duration_seconds_count{endpoint="/api/<title>"}' in text
+        assert "Category:Test" not in text
+
+    def test_counts_errors(self, client):
+        """Test that 4xx responses are counted as errors."""
+        with patch("src.app.routes.api.log_request"):
+            client.get("/api/Category:Test", headers={"User-Agent": ""})
+
+        text = client.get("/metrics").get_data(as_text=True)
+
+        assert 'arwikicats_request_errors_total{endpoint="/api/<title>",status="400"}' in text
+
+    def test_observe_batch(self, client):
+        """Test that batch sizes are recorded, and no resolver cache counter is exported."""
+        from src.app import metrics
+
+        before = metrics.BATCH_SIZE.labels(endpoint="/api/list")._sum.get()
+
+        metrics.observe_batch("/api/list", 5)
+
+        assert metrics.BATCH_SIZE.labels(endpoint="/api/list")._sum.get() == before + 5
+        assert "arwikicats_resolver_cache_total" not in client.get("/metrics").get_data(as_text=True)
+
+    def test_uwsgi_workers_mark_themselves_dead(self, monkeypatch):
+        """Test that under uWSGI the exit hook drops the gauge file of the worker."""
+        from src.app import metrics
+
+        fake_uwsgi = types.ModuleType("uwsgi")
+        monkeypatch.setitem(sys.modules, "uwsgi", fake_uwsgi)
+
+        metrics.init_uwsgi_exit()
+
+        assert fake_uwsgi.atexit is metrics.mark_process_dead
+
+        with patch("src.app.metrics.multiprocess.mark_process_dead") as mock_dead:
+            fake_uwsgi.atexit()
+
+        mock_dead.assert_called_once_with(os.getpid())
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for preloading the resolver before forking and for the worker memory report.
+"""
+import gc
+from unittest.mock import patch
+
+import pytest
+
+
+class TestPreloadResolver:
+    """Tests for preload_resolver."""
+
+    def test_resolves_titles_and_freezes(self):
+        """Test that the warmup titles go through the resolver and the heap is frozen."""
+        from src.app.preload import preload_resolver
+
+        gc.disable()
+        try:
+            with patch("src.app.routes.api.resolve_arabic_category_label") as mock_resolve:
+                result = preload_resolver(["Category:A", "Category:B"])
+
+            assert [c.args[0] for c in mock_resolve.call_args_list] == ["Category:A", "Category:B"]
+            assert result["titles"] == 2
+            assert result["frozen"] > 0
+            assert gc.isenabled()
+        finally:
+            gc.unfreeze()
+            gc.enable()
+
+    def test_failing_title_does_not_stop_preload(self):
+        """Test that an exception from the resolver is logged and the rest continue."""
+        from src.app.preload import preload_resolver
+
+        try:
+            with patch(
+                "src.app.routes.api.resolve_arabic_category_label", side_effect=[ValueError("bad"), "تصنيف:ب"]
+            ):
+                result = preload_resolver(["Category:A", "Category:B"])
+
+            assert result["titles"] == 1
+        finally:
+            gc.unfreeze()
+
+
+class TestWorkerMemory:
+    """Tests for the smaps_rollup parsing in benchmarks/memory.py."""
+
+    def test_parse_smaps_rollup(self):
+        """Test that the kB values are read and other lines ignored."""
+        from benchmarks.memory import parse_smaps_rollup
+
+        text = (
+            "55d0c0000000-7ffd00000000 ---p 00000000 00:00 0                          [rollup]\n"
+            "Rss:              102400 kB\n"
+            "Pss:               51200 kB\n"
+            "Shared_Clean:      61440 kB\n"
+            "Shared_Dirty:      10240 kB\n"
+            "Private_Clean:      1024 kB\n"
+            "Private_Dirty:     29696 kB\n"
+            "Referenced:       102400 kB\n"
+        )
+
+        values = parse_smaps_rollup(text)
+
+        assert values["Rss"] == 102400
+        assert values["Private_Dirty"] == 29696
+        assert "Referenced" not in values
+
+    def test_process_memory_of_this_process(self):
+        """Test that shared and unique add up to the RSS of a live process."""
+        import os
+
+        from benchmarks.memory import process_memory
+
+        if not os.path.exists("/proc/self/smaps_rollup"):
+            pytest.skip("needs Linux /proc/<pid>/smaps_rollup")
+
+        memory = process_memory(os.getpid())
+
+        assert memory["rss"] > 0
+        assert abs(memory["shared"] + memory["unique"] - memory["rss"]) < 1
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for on-demand request profiling.
+"""
+from unittest.mock import patch
+
+import pytest
+
+
+class TestProfiling:
+    """Tests for ?profile=1, sampling and the /profiles pages."""
+
+    @pytest.fixture
+    def make_client(self, tmp_path, monkeypatch):
+        """Return a factory for test clients with the given profiling environment."""
+        from src.app.logs_db import db
+
+        monkeypatch.setattr(db, "main_path", tmp_path)
+
+        def make(**env):
+            for key in ["PROFILE_TOKEN", "PROFILE_SAMPLE_RATE"]:
+                monkeypatch.delenv(key, raising=False)
+            for key, value in env.items():
+                monkeypatch.setenv(key, value)
+
+            from src.app import create_app
+
+            app = create_app()
+            app.config["TESTING"] = True
+            return app.test_client()
+
+        return make
+
+    def get_title(self, client, url):
+        with patch("src.app.routes.api.resolve_arabic_category_label", return_value="تصنيف:اختبار"):
+            with patch("src.app.routes.api.log_request", return_value=True):
+                return client.get(url, headers={"User-Agent": "TestAgent/1.0"})
+
+    def test_disabled_without_configuration(self, make_client, tmp_path):
+        """Test that no hooks run and the pages don't exist when profiling is off."""
+        client = make_client()
+
+        response = self.get_title(client, "/api/Category:Test?profile=1&token=")
+
+        assert "X-Profile" not in response.headers
+        assert not (tmp_path / "profiles").exists()
+        assert client.get("/profiles").status_code == 404
+
+    def test_profile_with_token(self, make_client, tmp_path):
+        """Test that ?profile=1 with the right token stores a profile and its summary."""
+        client = make_client(PROFILE_TOKEN="secret")
+
+        assert "X-Profile" not in self.get_title(client, "/api/Category:Test?profile=1&token=wrong").headers
+
+        response = self.get_title(client, "/api/Category:Test?profile=1&token=secret")
+        name = response.headers["X-Profile"]
+
+        assert response.status_code == 200
+        assert (tmp_path / "profiles" / f"{name}.prof").exists()
+
+        page = client.get(f"/profiles/{name}?token=secret")
+        assert page.status_code == 200
+        assert "Cumulative time" in page.get_data(as_text=True)
+
+        listing = client.get("/profiles?token=secret").get_data(as_text=True)
+        assert "/api/Category:Test" in listing
+
+        download = client.get(f"/profiles/{name}.prof?token=secret")
+        assert download.status_code == 200
+
+    def test_pages_need_the_token(self, make_client):
+        """Test that the profiles pages reject a missing or wrong token."""
+        client = make_client(PROFILE_TOKEN="secret")
+
+        assert client.get("/profiles").status_code == 403
+        assert client.get("/profiles?token=wrong").status_code == 403
+        assert client.get("/profiles?token=secret").status_code == 200
+
+    def test_sampling(self, make_client, tmp_path):
+        """Test that 1 in N API requests is profiled without a token."""
+        client = make_client(PROFILE_SAMPLE_RATE="2")
+
+        responses = [self.get_title(client, "/api/Category:Test") for _ in range(4)]
+
+        assert sum("X-Profile" in r.headers for r in responses) == 2
+        assert len(list((tmp_path / "profiles").glob("*.json"))) == 2
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the time budgets of database reads.
+"""
+from unittest.mock import patch
+
+import pytest
+
+# Runs for many seconds without a budget
+SLOW_QUERY = "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) SELECT count(*) FROM n"
+
+
+class TestQueryBudget:
+    """Tests for query_budget and fetch_all."""
+
+    @pytest.fixture
+    def temp_db(self, temp_logs_db):
+        """Point the logs database at a new temporary file."""
+        return temp_logs_db
+
+    def test_runaway_query_is_cancelled(self, temp_db):
+        """Test that a statement running past the budget raises QueryTooExpensive."""
+        import time
+
+        start = time.monotonic()
+
+        with pytest.raises(temp_db.QueryTooExpensive):
+            with temp_db.query_budget(0.05):
+                temp_db.fetch_all(SLOW_QUERY)
+
+        assert time.monotonic() - start < 2
+
+    def test_queries_within_budget(self, temp_db):
+        """Test that quick reads are unaffected and the budget ends with the block."""
+        with temp_db.query_budget(5):
+            assert temp_db.fetch_all("SELECT 1 AS one") == [{"one": 1}]
+
+        assert temp_db._query_deadline.get() is None
+
+    def test_nested_budget_keeps_the_earlier_deadline(self, temp_db):
+        """Test that an inner budget can't extend the outer one."""
+        with temp_db.query_budget(1):
+            outer = temp_db._query_deadline.get()
+            with temp_db.query_budget(100):
+                assert temp_db._query_deadline.get() == outer
+
+
+class TestQueryBudgetEndpoints:
+    """Tests for the 422 response and the abort counter."""
+
+    @pytest.fixture
+    def client(self, temp_logs_db, monkeypatch):
+        """Create a Flask test client with a tiny budget."""
+        from src.app import create_app
+
+        monkeypatch.setenv("QUERY_BUDGET_SECONDS", "0.05")
+        app = create_app()
+        app.config["TESTING"] = True
+        with app.test_client() as client:
+            yield client
+
+    def slow_fetch(self, *args, **kwargs):
+        from src.app.logs_db import db
+
+        return db.fetch_all(SLOW_QUERY)
+
+    def test_api_returns_422(self, client):
+        """Test that an analytics API endpoint returns a clear error and counts the abort."""
+        from src.app import metrics
+
+        with patch("src.app.logs_db.bot.fetch_all", side_effect=self.slow_fetch):
+            response = client.get("/api/all/2025-01-27")
+
+        assert response.status_code == 422
+        assert response.get_json() == {"error": "query too expensive, narrow the filter"}
+
+        if metrics.enabled():
+            assert metrics.QUERY_ABORTS.labels(endpoint="/api/all/<day>")._value.get() >= 1
+
+    def test_ui_returns_422(self, client):
+        """Test that the logs page shows the error page."""
+        with patch("src.app.logs_db.bot.fetch_all", side_effect=self.slow_fetch):
+            response = client.get("/logs")
+
+        assert response.status_code == 422
+        assert "narrow the filter" in response.get_data(as_text=True)
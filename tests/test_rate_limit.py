@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the per-client token buckets.
+"""
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.fixture
+def rate_limit(tmp_path, monkeypatch):
+    """app.rate_limit with its buckets in a temporary database."""
+    from src.app import rate_limit
+
+    monkeypatch.setattr(rate_limit, "DB_PATH", str(tmp_path / "rate_limits.db"))
+    return rate_limit
+
+
+class TestTokenBucket:
+    """Tests for take and parse_limit."""
+
+    def test_parse_limit(self):
+        """Test the rate/burst strings."""
+        from src.app.rate_limit import parse_limit
+
+        assert parse_limit("5/20") == (5.0, 20.0)
+        assert parse_limit("2") == (2.0, 2.0)
+        assert parse_limit("") is None
+        assert parse_limit("0") is None
+
+    def test_burst_then_refill(self, rate_limit):
+        """Test that the burst is spent, then tokens come back at the rate."""
+        keys = ["lookup:ua:bot"]
+
+        assert [rate_limit.take(keys, 1, 2, 3, now=100) for _ in range(3)] == [0, 0, 0]
+        assert rate_limit.take(keys, 1, 2, 3, now=100) == pytest.approx(0.5)
+        assert rate_limit.take(keys, 1, 2, 3, now=100.5) == 0
+        assert rate_limit.take(keys, 1, 2, 3, now=1000) == 0
+
+    def test_all_buckets_or_none(self, rate_limit):
+        """Test that a request refused by one bucket takes nothing from the others."""
+        assert rate_limit.take(["batch:ip:10.0.0.1"], 8, 1, 10, now=0) == 0
+        assert rate_limit.take(["batch:ua:bot", "batch:ip:10.0.0.1"], 5, 1, 10, now=0) == pytest.approx(3)
+        assert rate_limit.take(["batch:ua:bot"], 10, 1, 10, now=0) == 0
+
+    def test_cost_above_burst(self, rate_limit):
+        """Test that a batch larger than the burst passes on a full bucket."""
+        assert rate_limit.take(["batch:ua:bot"], 500, 10, 100, now=0) == 0
+        assert rate_limit.take(["batch:ua:bot"], 1, 10, 100, now=0) > 0
+
+    def test_prune(self, rate_limit):
+        """Test that idle buckets are deleted."""
+        rate_limit.take(["lookup:ua:old"], 1, 1, 1, now=0)
+        rate_limit.take(["lookup:ua:new"], 1, 1, 1, now=rate_limit.IDLE_SECONDS)
+
+        rate_limit.prune(now=rate_limit.IDLE_SECONDS + 1)
+
+        conn = rate_limit.connect()
+        keys = [row[0] for row in conn.execute("SELECT key FROM buckets")]
+        conn.close()
+        assert keys == ["lookup:ua:new"]
+
+
+class TestRateLimitedApi:
+    """Tests for the 429 responses of /api/<title> and /api/list."""
+
+    @pytest.fixture
+    def client(self, rate_limit, monkeypatch):
+        from src.app import create_app
+
+        monkeypatch.setattr(rate_limit, "LIMITS", {"lookup": (0.001, 2), "batch": (0.001, 3)})
+        app = create_app()
+        app.config["TESTING"] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_lookups_limited_per_user_agent(self, client):
+        """Test that a client past its burst gets 429 with Retry-After, and others don't."""
+        with patch("src.app.routes.api.resolve_arabic_category_label", return_value="تصنيف:اليمن"):
+            with patch("src.app.routes.api.log_request", return_value=True) as mock_log:
+                codes = [client.get("/api/Category:Yemen", headers={"User-Agent": "bot"}).status_code for _ in range(3)]
+                limited = client.get("/api/Category:Yemen", headers={"User-Agent": "bot"})
+                other = client.get("/api/Category:Yemen", headers={"User-Agent": "other"})
+
+        assert codes == [200, 200, 429]
+        assert limited.status_code == 429
+        assert int(limited.headers["Retry-After"]) >= 1
+        assert "error" in json.loads(limited.data)
+        assert other.status_code == 200
+        assert mock_log.call_args_list[2].args[2] == "rate_limited"
+
+    def test_batch_counts_distinct_titles(self, client):
+        """Test that /api/list takes one token per distinct title."""
+        result = MagicMock()
+        result.labels = {}
+        result.no_labels = []
+
+        with patch("src.app.routes.api.batch_resolve_labels", return_value=result):
+            with patch("src.app.routes.api.log_request"):
+                first = client.post("/api/list", json={"titles": ["A", "B", "A"]}, headers={"User-Agent": "bot"})
+                second = client.post("/api/list", json={"titles": ["C", "D"]}, headers={"User-Agent": "bot"})
+                third = client.post("/api/list", json={"titles": ["C"]}, headers={"User-Agent": "bot"})
+
+        assert [first.status_code, second.status_code, third.status_code] == [200, 429, 200]
+
+    def test_by_ip(self, client, rate_limit, monkeypatch):
+        """Test that with RATE_LIMIT_BY_IP a new User-Agent from the same address is still limited."""
+        monkeypatch.setattr(rate_limit, "BY_IP", True)
+
+        with patch("src.app.routes.api.resolve_arabic_category_label", return_value=""):
+            with patch("src.app.routes.api.log_request", return_value=True):
+                codes = [
+                    client.get(
+                        "/api/A", headers={"User-Agent": f"bot-{i}"}, environ_base={"REMOTE_ADDR": "10.0.0.1"}
+                    ).status_code
+                    for i in range(3)
+                ]
+
+        assert codes == [200, 200, 429]
+
+    def test_by_ip_ignores_client_forwarded_for(self, rate_limit, monkeypatch):
+        """Test that the address is the one the proxy appended, not one the client sent in X-Forwarded-For."""
+        from src.app import create_app
+
+        monkeypatch.setattr(rate_limit, "LIMITS", {"lookup": (0.001, 2), "batch": (0.001, 3)})
+        monkeypatch.setattr(rate_limit, "BY_IP", True)
+        monkeypatch.setattr(rate_limit, "PROXY_HOPS", 1)
+        client = create_app().test_client()
+
+        with patch("src.app.routes.api.resolve_arabic_category_label", return_value=""):
+            with patch("src.app.routes.api.log_request", return_value=True):
+                codes = [
+                    client.get(
+                        "/api/A",
+                        headers={"User-Agent": f"bot-{i}", "X-Forwarded-For": f"192.0.2.{i}, 10.0.0.1"},
+                        environ_base={"REMOTE_ADDR": f"172.16.0.{i}"},
+                    ).status_code
+                    for i in range(3)
+                ]
+
+        assert codes == [200, 200, 429]
+
+    def test_forwarded_for_not_read_without_proxy(self, client, rate_limit, monkeypatch):
+        """Test that without PROXY_HOPS the connection address is used, whatever X-Forwarded-For says."""
+        monkeypatch.setattr(rate_limit, "BY_IP", True)
+
+        with patch("src.app.routes.api.resolve_arabic_category_label", return_value=""):
+            with patch("src.app.routes.api.log_request", return_value=True):
+                codes = [
+                    client.get(
+                        "/api/A",
+                        headers={"User-Agent": f"bot-{i}", "X-Forwarded-For": f"192.0.2.{i}"},
+                        environ_base={"REMOTE_ADDR": "172.16.0.1"},
+                    ).status_code
+                    for i in range(3)
+                ]
+
+        assert codes == [200, 200, 429]
+
+    def test_disabled_by_default(self, client, rate_limit, monkeypatch):
+        """Test that no bucket is touched without limits."""
+        monkeypatch.setattr(rate_limit, "LIMITS", {"lookup": None, "batch": None})
+
+        with patch("src.app.routes.api.resolve_arabic_category_label", return_value=""):
+            with patch("src.app.routes.api.log_request", return_value=True):
+                codes = {client.get("/api/A", headers={"User-Agent": "bot"}).status_code for _ in range(5)}
+
+        assert codes == {200}
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the replay/regression runner and the latency helpers.
+"""
+from unittest.mock import patch
+
+import pytest
+
+
+class TestLatencySummary:
+    """Tests for the stats helpers."""
+
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentiles."""
+        from src.app.stats import percentile
+
+        values = list(range(1, 101))
+
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile(values, 100) == 100
+        assert percentile([], 50) == 0.0
+
+    def test_latency_summary_skips_missing_values(self):
+        """Test that None latencies are ignored."""
+        from src.app.stats import latency_summary
+
+        result = latency_summary([0.1, None, 0.3])
+
+        assert result["count"] == 2
+        assert result["max"] == 0.3
+
+
+class TestCompareResults:
+    """Tests for compare_results."""
+
+    def test_classifies_changes(self):
+        """Test changed, newly resolved and newly broken titles."""
+        from src.app.replay import compare_results
+
+        baseline = {
+            "Category:Same": {"label": "تصنيف:نفس", "time": 0.1},
+            "Category:Changed": {"label": "تصنيف:قديم", "time": 0.1},
+            "Category:New": {"label": "", "time": 0.1},
+            "Category:Broken": {"label": "تصنيف:مكسور", "time": 0.1},
+        }
+        current = {
+            "Category:Same": {"label": "تصنيف:نفس", "time": 0.2},
+            "Category:Changed": {"label": "تصنيف:جديد", "time": 0.2},
+            "Category:New": {"label": "تصنيف:جديد", "time": 0.2},
+            "Category:Broken": {"label": "", "time": 0.2},
+        }
+
+        report = compare_results(baseline, current)
+
+        assert report["unchanged"] == 1
+        assert report["changed"] == {"Category:Changed": {"old": "تصنيف:قديم", "new": "تصنيف:جديد"}}
+        assert report["newly_resolved"] == {"Category:New": "تصنيف:جديد"}
+        assert report["newly_broken"] == {"Category:Broken": "تصنيف:مكسور"}
+        assert report["latency"]["current"]["p50"] == 0.2
+        assert report["latency"]["baseline"]["p50"] == 0.1
+
+    def test_logs_baseline_latency_not_compared(self):
+        """Test that a baseline without comparable times reports only the current latencies."""
+        from src.app.replay import compare_results
+
+        baseline = {"Category:A": {"label": "تصنيف:أ"}}
+        current = {"Category:A": {"label": "تصنيف:أ", "time": 0.2}}
+
+        report = compare_results(baseline, current, compare_latency=False)
+
+        assert report["unchanged"] == 1
+        assert report["latency"]["current"]["p50"] == 0.2
+        assert "baseline" not in report["latency"]
+
+
+class TestReplayTitles:
+    """Tests for replay_titles and the results file."""
+
+    def test_replay_and_round_trip(self, tmp_path):
+        """Test that replayed results survive a write/read round trip."""
+        from src.app.replay import load_results_file, replay_titles, write_results_file
+
+        with patch("src.app.replay.resolve_arabic_category_label", side_effect=lambda t: "تصنيف:أ" if t == "A" else ""):
+            with patch("src.app.replay.load_resolver"):
+                results = replay_titles(["B", "A"], workers=1)
+
+        path = tmp_path / "replay.jsonl"
+        write_results_file(path, results)
+
+        loaded = load_results_file(path)
+        assert loaded["A"]["label"] == "تصنيف:أ"
+        assert loaded["B"]["label"] == ""
+        assert path.read_text(encoding="utf-8").splitlines()[0].startswith('{"label": "تصنيف:أ"')
+
+    def test_library_not_loaded(self, resolver_unavailable):
+        """Test that a missing library raises ResolverUnavailable before any title is replayed."""
+        from src.app.replay import replay_titles
+
+        with pytest.raises(resolver_unavailable.ResolverUnavailable):
+            replay_titles(["A"], workers=4)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the lazy import of ArWikiCats and the startup report.
+"""
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+class TestLazyResolver:
+    """Tests for app.resolver."""
+
+    @pytest.fixture
+    def fresh_state(self, monkeypatch):
+        """Forget the imported module for the duration of a test."""
+        from src.app import resolver
+
+        monkeypatch.setattr(resolver, "_module", None)
+        monkeypatch.setattr(resolver, "_error", None)
+        return resolver
+
+    def test_app_starts_without_arwikicats(self, tmp_path):
+        """Test that create_app() and a UI request don't import ArWikiCats."""
+        (tmp_path / "www" / "python" / "dbs").mkdir(parents=True)
+        code = (
+            "import sys\n"
+            "from app import create_app\n"
+            "app = create_app()\n"
+            "app.test_client().get('/logs')\n"
+            "print('ArWikiCats' in sys.modules)\n"
+        )
+
+        process = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=SRC_DIR,
+            env={"HOME": str(tmp_path), "PATH": "", "LOG_LEVEL": "WARNING"},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        assert process.stdout.strip().splitlines()[-1] == "False"
+
+    def test_lazy_imports_once(self, fresh_state):
+        """Test that the module is imported on the first call only."""
+
+        class FakeModule:
+            @staticmethod
+            def resolve_arabic_category_label(title):
+                return f"تصنيف:{title}"
+
+        with patch.object(fresh_state.importlib, "import_module", return_value=FakeModule) as mock_import:
+            resolve = fresh_state.lazy("resolve_arabic_category_label")
+
+            assert not mock_import.called
+            assert resolve("A") == "تصنيف:A"
+            assert resolve("B") == "تصنيف:B"
+
+        assert mock_import.call_count == 1
+        assert fresh_state.is_loaded()
+
+    def test_missing_module(self, fresh_state, monkeypatch):
+        """Test that a failed import raises ResolverUnavailable, and is not retried."""
+        monkeypatch.setattr(fresh_state, "MODULE", "no_such_resolver_module")
+        resolve = fresh_state.lazy("resolve_arabic_category_label")
+
+        with pytest.raises(fresh_state.ResolverUnavailable):
+            resolve("A")
+
+        monkeypatch.setattr(fresh_state, "MODULE", "json")
+
+        with pytest.raises(fresh_state.ResolverUnavailable):
+            resolve("A")
+
+    def test_api_error_when_unavailable(self, fresh_state, monkeypatch):
+        """Test that /api/<title> answers 500 when the import fails."""
+        from src.app import create_app
+
+        monkeypatch.setattr(fresh_state, "MODULE", "no_such_resolver_module")
+        app = create_app()
+        app.config["TESTING"] = True
+
+        with patch("src.app.routes.api.log_request") as mock_log:
+            response = app.test_client().get("/api/Category:Yemen", headers={"User-Agent": "test"})
+
+        assert response.status_code == 500
+        assert mock_log.call_args.args[2] == "error"
+
+
+class TestStartupReport:
+    """Tests for benchmarks/startup.py."""
+
+    def test_parse_importtime(self):
+        """Test reading the -X importtime lines."""
+        from benchmarks.startup import parse_importtime, slowest_packages
+
+        text = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     flask.globals\n"
+            "import time:      3000 |       5000 |   flask\n"
+            "import time:       900 |        900 |   jinja2\n"
+            "some other line\n"
+        )
+
+        entries = parse_importtime(text)
+
+        assert [e["module"] for e in entries] == ["flask.globals", "flask", "jinja2"]
+        assert [e["depth"] for e in entries] == [2, 1, 1]
+        assert entries[1]["cumulative_us"] == 5000
+        assert slowest_packages(entries, top=1) == [("flask", 3.12)]
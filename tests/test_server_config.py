@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the worker layout computed from the cgroup CPU quota.
+"""
+
+
+class TestCgroupCpuLimit:
+    """Tests for cgroup_cpu_limit and worker_layout."""
+
+    def test_cgroup_v2(self, tmp_path):
+        """Test reading cpu.max."""
+        from src.app.server_config import cgroup_cpu_limit
+
+        (tmp_path / "cpu.max").write_text("300000 100000\n")
+
+        assert cgroup_cpu_limit(tmp_path) == 3.0
+
+    def test_cgroup_v2_unlimited(self, tmp_path):
+        """Test that "max" means no limit."""
+        from src.app.server_config import cgroup_cpu_limit
+
+        (tmp_path / "cpu.max").write_text("max 100000\n")
+
+        assert cgroup_cpu_limit(tmp_path) is None
+
+    def test_cgroup_v1(self, tmp_path):
+        """Test reading cpu.cfs_quota_us and cpu.cfs_period_us."""
+        from src.app.server_config import cgroup_cpu_limit
+
+        (tmp_path / "cpu").mkdir()
+        (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("250000\n")
+        (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+
+        assert cgroup_cpu_limit(tmp_path) == 2.5
+
+    def test_layout_follows_quota(self, tmp_path, monkeypatch):
+        """Test that the quota caps the workers, rounded down, and the env overrides it."""
+        from src.app import server_config
+
+        monkeypatch.delenv("WEB_WORKERS", raising=False)
+        monkeypatch.delenv("WEB_THREADS", raising=False)
+        monkeypatch.setattr(server_config.os, "sched_getaffinity", lambda pid: set(range(64)), raising=False)
+        (tmp_path / "cpu.max").write_text("250000 100000\n")
+
+        assert server_config.worker_layout(tmp_path) == (2, server_config.THREADS_PER_WORKER)
+
+        monkeypatch.setenv("WEB_WORKERS", "5")
+        monkeypatch.setenv("WEB_THREADS", "1")
+
+        assert server_config.worker_layout(tmp_path) == (5, 1)
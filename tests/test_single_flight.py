@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the coalescing of concurrent resolutions.
+"""
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+
+def waiting(flight):
+    """Threads blocked on the calls in flight."""
+    with flight._lock:
+        # Event.wait goes through the Condition of the Event
+        return sum(len(call.done._cond._waiters) for call in flight._calls.values())
+
+
+def wait_for_waiters(flight, count):
+    """Block until ``count`` threads are waiting for a resolution of another thread."""
+    while waiting(flight) < count:
+        threading.Event().wait(0.001)
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight."""
+
+    def test_canonical_title(self):
+        """Test that the key is the title as ArWikiCats normalizes it."""
+        from src.app.single_flight import canonical_title
+
+        assert canonical_title("\ufeffCategory:Sportspeople_from_Yemen") == "Category:Sportspeople from Yemen"
+
+    def test_concurrent_calls_share_one_run(self):
+        """Test that callers arriving while a key is in flight get the leader's value."""
+        from src.app.single_flight import SingleFlight
+
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return "تصنيف:اليمن"
+
+        with ThreadPoolExecutor(4) as pool:
+            leader = pool.submit(flight.do, "Category:Yemen", slow)
+            while not calls:
+                threading.Event().wait(0.001)
+            followers = [pool.submit(flight.do, "Category:Yemen", slow) for _ in range(3)]
+            wait_for_waiters(flight, 3)
+            release.set()
+
+            assert leader.result() == ("تصنيف:اليمن", False)
+            assert [f.result() for f in followers] == [("تصنيف:اليمن", True)] * 3
+
+        assert len(calls) == 1
+        assert flight.in_flight() == 0
+
+    def test_error_reaches_followers(self):
+        """Test that an error of the leader is raised in the waiting threads, and not kept."""
+        from src.app.single_flight import SingleFlight
+
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def failing():
+            started.set()
+            release.wait(5)
+            raise RuntimeError("resolver failed")
+
+        with ThreadPoolExecutor(2) as pool:
+            leader = pool.submit(flight.do, "A", failing)
+            started.wait(5)
+            follower = pool.submit(flight.do, "A", failing)
+            wait_for_waiters(flight, 1)
+            release.set()
+
+            for future in (leader, follower):
+                with pytest.raises(RuntimeError):
+                    future.result()
+
+        assert flight.do("A", lambda: "ok") == ("ok", False)
+
+    def test_overlapping_batches(self):
+        """Test that a batch resolves only the keys no other batch is resolving."""
+        from src.app.single_flight import SingleFlight
+
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        batches = []
+
+        def resolve(keys):
+            batches.append(sorted(keys))
+            if len(batches) == 1:
+                started.set()
+                release.wait(5)
+            return {key: key.lower() for key in keys}
+
+        with ThreadPoolExecutor(2) as pool:
+            first = pool.submit(flight.do_many, ["A", "B"], resolve)
+            started.wait(5)
+            second = pool.submit(flight.do_many, ["B", "C", "A"], resolve)
+            wait_for_waiters(flight, 1)
+            release.set()
+
+            assert first.result() == ({"A": "a", "B": "b"}, 0)
+            assert second.result() == ({"C": "c", "B": "b", "A": "a"}, 2)
+
+        assert batches == [["A", "B"], ["C"]]
+
+
+class TestCoalescedApi:
+    """Tests for the coalescing in /api/<title> and /api/list."""
+
+    @pytest.fixture
+    def app(self, temp_logs_db):
+        from src.app import create_app
+
+        app = create_app()
+        app.config["TESTING"] = True
+        return app
+
+    def test_title_requests_share_resolution(self, app):
+        """Test that concurrent requests for one title, spelled two ways, resolve it once."""
+        from src.app.routes import api
+
+        release = threading.Event()
+        calls = []
+
+        def resolve(title):
+            calls.append(title)
+            release.wait(5)
+            return "تصنيف:اليمن"
+
+        def get(title):
+            with app.test_client() as client:
+                return client.get(f"/api/{title}", headers={"User-Agent": "test"})
+
+        with patch("src.app.routes.api.resolve_arabic_category_label", side_effect=resolve):
+            with patch("src.app.routes.api.log_request", return_value=True):
+                with ThreadPoolExecutor(3) as pool:
+                    first = pool.submit(get, "Category:Yemen_people")
+                    while not calls:
+                        threading.Event().wait(0.001)
+                    others = [pool.submit(get, t) for t in ("Category:Yemen people", "Category:Yemen_people")]
+                    wait_for_waiters(api.resolutions, 2)
+                    release.set()
+
+                    responses = [first.result()] + [f.result() for f in others]
+
+        assert calls == ["Category:Yemen_people"]
+        assert [json.loads(r.data)["result"] for r in responses] == ["تصنيف:اليمن"] * 3
+
+    def test_list_merges_shared_titles(self, app):
+        """Test that /api/list reports titles resolved by another request like its own."""
+        from src.app.routes import api
+
+        release = threading.Event()
+        batches = []
+
+        def batch(titles):
+            batches.append(sorted(titles))
+            if len(batches) == 1:
+                release.wait(5)
+            labels = {t: f"تصنيف:{t}" for t in titles if t != "Category:None"}
+            return SimpleNamespace(labels=labels, no_labels=[t for t in titles if t not in labels])
+
+        def post(titles):
+            with app.test_client() as client:
+                return client.post("/api/list", json={"titles": titles}, headers={"User-Agent": "test"})
+
+        with patch("src.app.routes.api.batch_resolve_labels", side_effect=batch):
+            with patch("src.app.routes.api.log_request"):
+                with ThreadPoolExecutor(2) as pool:
+                    first = pool.submit(post, ["Category:A", "Category:None"])
+                    while not batches:
+                        threading.Event().wait(0.001)
+                    second = pool.submit(post, ["Category:A", "Category:None", "Category:B"])
+                    wait_for_waiters(api.resolutions, 1)
+                    release.set()
+
+                    data = json.loads(second.result().data)
+                    first.result()
+
+        assert batches == [["Category:A", "Category:None"], ["Category:B"]]
+        assert data["results"] == {"Category:A": "تصنيف:Category:A", "Category:B": "تصنيف:Category:B", "Category:None": ""}
+        assert data["with_labs"] == 2
+        assert data["no_labs"] == 1
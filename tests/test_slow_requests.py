@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the slow request capture, /api/slow and /slow.
+"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+class TestSlowRequests:
+    """Tests for recording requests above SLOW_REQUEST_SECONDS."""
+
+    @pytest.fixture
+    def client(self, temp_logs_db):
+        """Create a Flask test client writing to a temporary database."""
+        from src.app import create_app
+
+        app = create_app()
+        app.config["TESTING"] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_records_slow_title(self, client):
+        """Test that a request over the threshold is stored with its phases and user agent."""
+        from src.app.logs_db import get_slow_requests
+
+        with patch("src.app.slow_requests.SLOW_REQUEST_SECONDS", 1e-9):
+            with patch("src.app.routes.api.resolve_arabic_category_label", return_value="تصنيف:اختبار"):
+                client.get("/api/Category:Slow", headers={"User-Agent": "SlowAgent/1.0"})
+
+        rows = get_slow_requests()
+
+        assert len(rows) == 1
+        assert rows[0]["endpoint"] == "/api/<title>"
+        assert rows[0]["request_data"] == "Category:Slow"
+        assert rows[0]["batch_size"] == 1
+        assert rows[0]["status_code"] == 200
+        assert rows[0]["user_agent"] == "SlowAgent/1.0"
+        assert "resolve" in rows[0]["phases"]
+
+    def test_records_batch_size(self, client):
+        """Test that a slow /api/list request stores the number of titles."""
+        from src.app.logs_db import get_slow_requests
+
+        result = MagicMock()
+        result.labels = {"Category:A": "تصنيف:أ"}
+        result.no_labels = ["Category:B"]
+
+        with patch("src.app.slow_requests.SLOW_REQUEST_SECONDS", 1e-9):
+            with patch("src.app.routes.api.batch_resolve_labels", return_value=result):
+                client.post(
+                    "/api/list",
+                    json={"titles": ["Category:A", "Category:B"]},
+                    headers={"User-Agent": "SlowAgent/1.0"},
+                )
+
+        rows = get_slow_requests(endpoint="/api/list")
+
+        assert rows[0]["batch_size"] == 2
+
+    def test_records_get_batch_titles(self, client):
+        """Test that a slow /api/batch request stores the titles of its query string."""
+        from src.app.logs_db import get_slow_requests
+
+        result = MagicMock()
+        result.labels = {"Category:A": "تصنيف:أ", "Category:B": "", "Category:C": "تصنيف:ج"}
+        result.no_labels = ["Category:B"]
+
+        with patch("src.app.slow_requests.SLOW_REQUEST_SECONDS", 1e-9):
+            with patch("src.app.routes.api.batch_resolve_labels", return_value=result):
+                response = client.get(
+                    "/api/batch?titles=Category:A|Category:B|Category:C",
+                    headers={"User-Agent": "SlowAgent/1.0"},
+                )
+
+        rows = get_slow_requests(endpoint="/api/batch")
+
+        assert response.status_code == 200
+        assert rows[0]["batch_size"] == 3
+        assert rows[0]["request_data"] == str(["Category:A", "Category:B", "Category:C"])
+
+    def test_fast_requests_are_not_recorded(self, client):
+        """Test that requests under the threshold are not stored."""
+        from src.app.logs_db import count_slow_requests
+
+        with patch("src.app.slow_requests.SLOW_REQUEST_SECONDS", 60):
+            with patch("src.app.routes.api.resolve_arabic_category_label", return_value=""):
+                client.get("/api/Category:Fast", headers={"User-Agent": "SlowAgent/1.0"})
+
+        assert count_slow_requests() == 0
+
+    def test_api_and_page_sorting(self, client):
+        """Test /api/slow ordering and that /slow renders."""
+        from src.app.logs_db import log_slow_request
+
+        log_slow_request("/api/<title>", "Category:A", 1, 200, 2.0, {"resolve": 1.9}, "ua")
+        log_slow_request("/api/list", "['Category:B']", 1, 200, 5.0, {"resolve": 4.9}, "ua")
+
+        data = client.get("/api/slow?order_by=duration&order=ASC").get_json()
+
+        assert [row["duration"] for row in data["rows"]] == [2.0, 5.0]
+        assert data["tab"]["total"] == 2
+
+        by_endpoint = client.get("/api/slow?route=/api/list").get_json()
+        assert [row["request_data"] for row in by_endpoint["rows"]] == ["['Category:B']"]
+
+        page = client.get("/slow")
+        assert page.status_code == 200
+        assert "Category:A" in page.get_data(as_text=True)
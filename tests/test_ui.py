@@ -58,10 +58,12 @@ class TestUIRoutes:
             assert response.status_code == 200
 
     def test_no_result_page(self, client):
-        """Test that no_result page renders successfully."""
+        """Test that no_result page renders successfully, with the Start All button."""
         response = client.get("/no_result")
 
         assert response.status_code == 200
+        assert b'id="run_all"' in response.data
+        assert b"X-Profile-Token" not in response.data
 
     def test_logs_by_day_page(self, client):
         """Test that logs_by_day page renders with mocked data."""
@@ -83,6 +85,13 @@ class TestUIRoutes:
 
         assert response.status_code == 200
 
+    def test_list_page_progress(self, client):
+        """Test that the list page has the chunk progress counters and the retry button."""
+        html = client.get("/list").get_data(as_text=True)
+
+        for element in ('id="progress"', 'id="rate"', 'id="failed"', 'id="retry_failed"'):
+            assert element in html
+
     def test_chart_page(self, client):
         """Test that chart page renders successfully."""
         response = client.get("/chart")
@@ -11,7 +11,7 @@ class TestUserAgentHeader:
     """Tests for User-Agent header validation in API endpoints."""
 
     @pytest.fixture
-    def client(self):
+    def client(self, temp_logs_db):
         """Create Flask test client."""
         app = create_app()
         app.config["TESTING"] = True
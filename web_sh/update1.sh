@@ -42,6 +42,9 @@ if source "$HOME/www/python/venv/bin/activate"; then
     # pip install -r $HOME/www/python/src/requirements.txt
     pip install -r "$TARGET_DIR"/requirements.txt -U
     # exit 1
+
+    # Hashed and precompressed copies of static/ in static/dist/ (see src/app/assets.py)
+    (cd "$TARGET_DIR" && python -m app.assets) || echo "Failed to build the static assets" >&2
 else
     echo "Failed to activate virtual environment" >&2
 fi